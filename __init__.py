@@ -23,9 +23,6 @@
  This script initializes the plugin, making it known to QGIS.
 """
 
-from .lessonregistry import QLessonRegistry
-lessonsRegistry = QLessonRegistry()
-
 # noinspection PyPep8Naming
 def classFactory(iface):  # pylint: disable=invalid-name
     """Load Qlesson class from file Qlesson.
@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+"""
+***************************************************************************
+    bench_import_time.py
+    ---------------------
+    Date                 : July 2023
+    Copyright            : (C) 2023 by Pascal Ogola
+    Email                : passies95 at gmail dot com
+***************************************************************************
+*                                                                         *
+*   This program is free software; you can redistribute it and/or modify  *
+*   it under the terms of the GNU General Public License as published by  *
+*   the Free Software Foundation; either version 2 of the License, or     *
+*   (at your option) any later version.                                   *
+*                                                                         *
+***************************************************************************
+
+Measures what QGIS pays for the plugin at startup: importing the plugin
+package and its Qlesson class, i.e. everything classFactory() does before
+the user opens the dock. Every sample runs in a fresh interpreter.
+
+Run with a Python interpreter that can import qgis, e.g.
+
+    python benchmarks/bench_import_time.py --repeat 10
+"""
+
+__author__ = 'Pascal Ogola'
+__date__ = 'July 2023'
+__copyright__ = '(C) 2023, Pascal Ogola'
+
+# This will get replaced with a git SHA1 when you do a git archive
+
+__revision__ = '$Format:%H$'
+
+import os
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+
+benchmarksPath = os.path.dirname(os.path.abspath(__file__))
+pluginPath = os.path.dirname(benchmarksPath)
+
+# modules which should only be loaded once the dock is opened
+HEAVY_MODULES = ['yaml', 'qlesson_dockwidget', 'lessonregistry', 'lesson']
+
+SAMPLE = '''
+import sys, time, json, importlib
+# use the stubs only when real QGIS is not available
+try:
+    import qgis.core  # noqa: F401
+except ImportError:
+    sys.path.insert(0, {stubs!r})
+sys.path.insert(0, {parent!r})
+from qgis.PyQt.QtWidgets import QApplication
+app = QApplication.instance() or QApplication([])
+start = time.perf_counter()
+package = importlib.import_module({name!r})
+importlib.import_module({name!r} + '.qlesson')
+elapsed = time.perf_counter() - start
+loaded = [m for m in {heavy!r} if (m if m == 'yaml' else {name!r} + '.' + m) in sys.modules]
+print(json.dumps({{'seconds': elapsed, 'loaded': loaded}}))
+'''
+
+
+def sample():
+    code = SAMPLE.format(stubs=os.path.join(benchmarksPath, 'stubs'),
+                         parent=os.path.dirname(pluginPath),
+                         name=os.path.basename(pluginPath),
+                         heavy=HEAVY_MODULES)
+    output = subprocess.run([sys.executable, '-c', code], check=True,
+                            stdout=subprocess.PIPE, universal_newlines=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Plugin import time benchmark')
+    parser.add_argument('--repeat', type=int, default=10)
+    args = parser.parse_args()
+
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    results = [sample() for _ in range(args.repeat)]
+    times = sorted(r['seconds'] for r in results)
+
+    print('plugin import: median {:.1f} ms, min {:.1f} ms ({} runs)'.format(statistics.median(times) * 1000,
+                                                                           times[0] * 1000,
+                                                                           len(times)))
+    print('modules loaded at import: {}'.format(', '.join(results[0]['loaded']) or 'none'))
+
+
+if __name__ == '__main__':
+    main()
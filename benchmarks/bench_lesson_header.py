@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+"""
+***************************************************************************
+    bench_lesson_header.py
+    ---------------------
+    Date                 : July 2023
+    Copyright            : (C) 2023 by Pascal Ogola
+    Email                : passies95 at gmail dot com
+***************************************************************************
+*                                                                         *
+*   This program is free software; you can redistribute it and/or modify  *
+*   it under the terms of the GNU General Public License as published by  *
+*   the Free Software Foundation; either version 2 of the License, or     *
+*   (at your option) any later version.                                   *
+*                                                                         *
+***************************************************************************
+
+Compares reading a lesson id with Lesson.idFromYaml against a full
+parse of the lesson.yaml file.
+
+Run with a Python interpreter that can import qgis, e.g.
+
+    python benchmarks/bench_lesson_header.py --steps 50 --locales 5
+"""
+
+__author__ = 'Pascal Ogola'
+__date__ = 'July 2023'
+__copyright__ = '(C) 2023, Pascal Ogola'
+
+# This will get replaced with a git SHA1 when you do a git archive
+
+__revision__ = '$Format:%H$'
+
+import os
+import sys
+import argparse
+import importlib
+import tempfile
+import timeit
+
+import yaml
+
+benchmarksPath = os.path.dirname(os.path.abspath(__file__))
+pluginPath = os.path.dirname(benchmarksPath)
+
+# use the stubs only when real QGIS is not available
+try:
+    import qgis.core  # noqa: F401
+except ImportError:
+    sys.path.insert(0, os.path.join(benchmarksPath, 'stubs'))
+
+sys.path.insert(0, os.path.dirname(pluginPath))
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+
+def lessonDocument(steps, locales):
+    localized = dict()
+    for locale in ['en'] + ['l{}'.format(i) for i in range(1, locales)]:
+        localized[locale] = {'displayName': 'Benchmark lesson',
+                             'group': 'Benchmark',
+                             'description': 'lesson.html',
+                             'steps': [{'name': 'Step {}'.format(i),
+                                        'description': 'step_{}.html'.format(i),
+                                        'prepare': {'name': 'prepare', 'params': [i, 'layer']},
+                                        'check': {'name': 'check', 'params': [i]}
+                                       } for i in range(steps)]
+                            }
+
+    lesson = {'name': 'benchmark', 'groupId': 'benchmark'}
+    lesson.update(localized)
+    return {'lesson': lesson}
+
+
+# documents the header reader has to hand over to the full parser
+SPECIAL_DOCUMENTS = [
+    # anchor and alias for the group id
+    'groups:\n  main: &group core\nlesson:\n  groupId: *group\n  name: anchored\n',
+    # merge key pulling the header from an anchored mapping
+    'base: &base\n  groupId: core\n  name: merged\nlesson:\n  <<: *base\n',
+    # complex mapping key before the header
+    'lesson:\n  ? [a, b]\n  : complex\n  groupId: core\n  name: complex\n',
+    # non-string name
+    'lesson:\n  groupId: core\n  name: 2023\n',
+]
+
+
+def checkSpecialDocuments(lesson, tmp):
+    lessonFile = os.path.join(tmp, 'special.yaml')
+    for document in SPECIAL_DOCUMENTS:
+        with open(lessonFile, 'w', encoding='utf-8') as f:
+            f.write(document)
+
+        try:
+            with open(lessonFile, encoding='utf-8') as f:
+                data = yaml.load(f, Loader=lesson.YamlLoader)
+        except yaml.YAMLError:
+            # lessons the loader rejects must not get an id either
+            try:
+                lesson.Lesson.idFromYaml(lessonFile)
+            except yaml.YAMLError:
+                continue
+            raise AssertionError(document)
+
+        expected = '{}:{}'.format(data['lesson']['groupId'], data['lesson']['name'])
+        assert lesson.Lesson.idFromYaml(lessonFile) == expected, document
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Lesson header reader benchmark')
+    parser.add_argument('--steps', type=int, default=30)
+    parser.add_argument('--locales', type=int, default=3)
+    parser.add_argument('--repeat', type=int, default=200)
+    args = parser.parse_args()
+
+    lesson = importlib.import_module('{}.lesson'.format(os.path.basename(pluginPath)))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        lessonFile = os.path.join(tmp, 'lesson.yaml')
+        with open(lessonFile, 'w', encoding='utf-8') as f:
+            yaml.safe_dump(lessonDocument(args.steps, args.locales), f, sort_keys=False)
+
+        def fullParse():
+            with open(lessonFile, encoding='utf-8') as f:
+                data = yaml.load(f, Loader=lesson.YamlLoader)
+            return '{}:{}'.format(data['lesson']['groupId'], data['lesson']['name'])
+
+        assert fullParse() == lesson.Lesson.idFromYaml(lessonFile)
+        checkSpecialDocuments(lesson, tmp)
+        size = os.path.getsize(lessonFile)
+
+        full = min(timeit.repeat(fullParse, number=args.repeat, repeat=3)) / args.repeat
+        header = min(timeit.repeat(lambda: lesson.Lesson.idFromYaml(lessonFile), number=args.repeat, repeat=3)) / args.repeat
+
+    print('lesson.yaml: {} steps, {} locales, {} bytes'.format(args.steps, args.locales, size))
+    print('full parse   {:10.1f} us'.format(full * 1e6))
+    print('header read  {:10.1f} us'.format(header * 1e6))
+    print('speedup      {:10.1f}x'.format(full / header))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,147 @@
+# -*- coding: utf-8 -*-
+"""
+***************************************************************************
+    bench_memory.py
+    ---------------------
+    Date                 : July 2023
+    Copyright            : (C) 2023 by Pascal Ogola
+    Email                : passies95 at gmail dot com
+***************************************************************************
+*                                                                         *
+*   This program is free software; you can redistribute it and/or modify  *
+*   it under the terms of the GNU General Public License as published by  *
+*   the Free Software Foundation; either version 2 of the License, or     *
+*   (at your option) any later version.                                   *
+*                                                                         *
+***************************************************************************
+
+Measures memory held by loaded lessons with tracemalloc: bytes per lesson
+registered in the library, and bytes per step of lessons whose steps are
+built. Uses the same stubs and library generator as run_benchmarks.py, e.g.
+
+    python benchmarks/bench_memory.py --lessons 5000 --materialize 500
+
+Results are compared with memory_baseline.json, recorded with the default
+arguments before lessons and steps used slotted records, or with the
+JSON results of a previous run given with --compare.
+"""
+
+__author__ = 'Pascal Ogola'
+__date__ = 'July 2023'
+__copyright__ = '(C) 2023, Pascal Ogola'
+
+# This will get replaced with a git SHA1 when you do a git archive
+
+__revision__ = '$Format:%H$'
+
+import os
+import gc
+import sys
+import json
+import shutil
+import argparse
+import importlib
+import tempfile
+import tracemalloc
+
+benchmarksPath = os.path.dirname(os.path.abspath(__file__))
+pluginPath = os.path.dirname(benchmarksPath)
+
+# use the stubs only when real QGIS is not available
+try:
+    import qgis.core  # noqa: F401
+except ImportError:
+    sys.path.insert(0, os.path.join(benchmarksPath, 'stubs'))
+
+sys.path.insert(0, benchmarksPath)
+sys.path.insert(0, os.path.dirname(pluginPath))
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+from generate_library import generateLibrary  # noqa: E402
+
+
+def allocated(function):
+    """Returns result of function and bytes it left allocated."""
+    gc.collect()
+    before = tracemalloc.get_traced_memory()[0]
+    result = function()
+    gc.collect()
+    return result, tracemalloc.get_traced_memory()[0] - before
+
+
+def compareResults(results, arguments, baselineFile):
+    with open(baselineFile, encoding='utf-8') as f:
+        baseline = json.load(f)
+
+    different = [key for key, value in baseline['arguments'].items()
+                 if key != 'output' and arguments.get(key) != value]
+    if different:
+        print('\nbaseline was recorded with different {}'.format(', '.join(different)))
+
+    print('\n{:20} {:>12} {:>12} {:>8}'.format('bytes', 'baseline', 'current', 'ratio'))
+    for name in ('bytesPerLesson', 'bytesPerStep'):
+        before = baseline['results'][name]
+        print('{:20} {:12.0f} {:12.0f} {:8.2f}'.format(name, before, results[name], results[name] / before))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Lesson memory benchmark')
+    parser.add_argument('--lessons', type=int, default=2000)
+    parser.add_argument('--materialize', type=int, default=200, help='lessons whose steps are built')
+    parser.add_argument('--locales', type=int, default=2)
+    parser.add_argument('--steps', type=int, default=10)
+    parser.add_argument('--functions', type=int, default=10)
+    parser.add_argument('--output', help='write results to this JSON file')
+    parser.add_argument('--compare', default=os.path.join(benchmarksPath, 'memory_baseline.json'),
+                        help='JSON results of a previous run')
+    args = parser.parse_args()
+
+    workDir = tempfile.mkdtemp(prefix='qlesson-memory-')
+    os.environ.setdefault('QLESSON_BENCH_SETTINGS', os.path.join(workDir, 'settings'))
+    try:
+        from qgis.core import QgsApplication, QgsSettings
+        app = QgsApplication.instance() or QgsApplication([])  # noqa: F841
+
+        name = os.path.basename(pluginPath)
+        registryModule = importlib.import_module('{}.lessonregistry'.format(name))
+
+        root = os.path.join(workDir, 'library')
+        generateLibrary(root, args.lessons, args.locales, args.steps, 200, args.functions)
+        paths = [os.path.join(root, 'builtin'), root]
+
+        # fill the lesson catalog, so that only lesson objects are measured
+        registryModule.QLessonRegistry().loadLessons(paths)
+        del registryModule.QLessonRegistry.instance
+
+        QgsSettings().setValue('qlesson/materializedLessons', args.materialize)
+
+        def loadLibrary():
+            registry = registryModule.QLessonRegistry()
+            registry.loadCatalog(paths)
+            return registry
+
+        tracemalloc.start()
+        registry, libraryBytes = allocated(loadLibrary)
+        lessons = list(registry.lessons.values())[:args.materialize]
+        _, stepBytes = allocated(lambda: [lesson.materialize() for lesson in lessons])
+        tracemalloc.stop()
+
+        steps = sum(len(lesson.steps) for lesson in lessons) or 1
+        results = {'bytesPerLesson': libraryBytes / max(1, len(registry.lessons)),
+                   'bytesPerStep': stepBytes / steps}
+    finally:
+        shutil.rmtree(workDir, True)
+
+    print('{} lessons loaded:   {:10.0f} bytes per lesson'.format(args.lessons, results['bytesPerLesson']))
+    print('{} steps built:      {:10.0f} bytes per step'.format(steps, results['bytesPerStep']))
+
+    if args.compare:
+        compareResults(results, vars(args), args.compare)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({'arguments': vars(args), 'results': results}, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
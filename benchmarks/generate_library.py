@@ -0,0 +1,178 @@
+# -*- coding: utf-8 -*-
+"""
+***************************************************************************
+    generate_library.py
+    ---------------------
+    Date                 : July 2023
+    Copyright            : (C) 2023 by Pascal Ogola
+    Email                : passies95 at gmail dot com
+***************************************************************************
+*                                                                         *
+*   This program is free software; you can redistribute it and/or modify  *
+*   it under the terms of the GNU General Public License as published by  *
+*   the Free Software Foundation; either version 2 of the License, or     *
+*   (at your option) any later version.                                   *
+*                                                                         *
+***************************************************************************
+
+Creates a synthetic lesson library: <root>/<group>/<lesson>/ directories
+with lesson.yaml, localized HTML descriptions, functions.py and,
+optionally, project data. Works without QGIS, e.g.
+
+    python benchmarks/generate_library.py /tmp/library --lessons 50000 --locales 3
+"""
+
+__author__ = 'Pascal Ogola'
+__date__ = 'July 2023'
+__copyright__ = '(C) 2023, Pascal Ogola'
+
+# This will get replaced with a git SHA1 when you do a git archive
+
+__revision__ = '$Format:%H$'
+
+import os
+import random
+import argparse
+
+import yaml
+
+LOCALES = ['en', 'de', 'fr', 'es', 'pt_BR', 'it', 'ru', 'ja', 'zh_CN', 'sw']
+
+WORDS = ('layer raster vector buffer clip dissolve attribute table field '
+         'projection map canvas symbol label style query select feature').split()
+
+
+def paragraph(rng, size):
+    words = list()
+    length = 0
+    while length < size:
+        word = rng.choice(WORDS)
+        words.append(word)
+        length += len(word) + 1
+
+    return ' '.join(words)
+
+
+def html(rng, title, size):
+    return '<html><body><h2>{}</h2><p>{}</p></body></html>'.format(title, paragraph(rng, size))
+
+
+def functionsModule(count):
+    lines = ['# generated lesson functions', '']
+    for i in range(count):
+        lines.extend(['def prepare_{}(value, layer=None):'.format(i),
+                      '    return value',
+                      '',
+                      'def check_{}(value):'.format(i),
+                      '    return True',
+                      ''])
+
+    return '\n'.join(lines)
+
+
+def lessonDocument(groupId, name, locales, steps, functions, recommended):
+    document = {'name': name, 'groupId': groupId}
+    if recommended:
+        document['recommended'] = [{'groupId': g, 'name': n} for g, n in recommended]
+
+    for locale in locales:
+        document[locale] = {'displayName': '{} {}'.format(name.replace('_', ' ').title(), locale),
+                            'group': '{} ({})'.format(groupId, locale),
+                            'description': 'lesson.html',
+                            'steps': [{'name': 'Step {}'.format(i + 1),
+                                       'description': 'step_{}.html'.format(i),
+                                       'prepare': {'name': 'prepare_{}'.format(i % max(1, functions)),
+                                                   'params': [i, 'layer']},
+                                       'check': {'name': 'check_{}'.format(i % max(1, functions)),
+                                                 'params': [i]}
+                                      } if functions else
+                                      {'name': 'Step {}'.format(i + 1),
+                                       'description': 'step_{}.html'.format(i)}
+                                      for i in range(steps)]
+                           }
+
+    return {'lesson': document}
+
+
+def writeLesson(root, groupId, name, rng, locales, steps, htmlSize, functions,
+                recommended=None, projectFiles=0):
+    lessonDir = os.path.join(root, groupId, name)
+    os.makedirs(lessonDir, exist_ok=True)
+
+    with open(os.path.join(lessonDir, 'lesson.yaml'), 'w', encoding='utf-8') as f:
+        yaml.safe_dump(lessonDocument(groupId, name, locales, steps, functions, recommended),
+                       f, sort_keys=False, allow_unicode=True)
+
+    with open(os.path.join(lessonDir, 'functions.py'), 'w', encoding='utf-8') as f:
+        f.write(functionsModule(functions))
+
+    for locale in locales:
+        localeDir = os.path.join(lessonDir, locale)
+        os.makedirs(localeDir, exist_ok=True)
+        with open(os.path.join(localeDir, 'lesson.html'), 'w', encoding='utf-8') as f:
+            f.write(html(rng, name, htmlSize))
+        for i in range(steps):
+            with open(os.path.join(localeDir, 'step_{}.html'.format(i)), 'w', encoding='utf-8') as f:
+                f.write(html(rng, 'Step {}'.format(i + 1), htmlSize))
+
+    if projectFiles:
+        writeProjectData(os.path.join(lessonDir, 'data'), projectFiles, rng)
+
+    return lessonDir
+
+
+def writeProjectData(dataDir, files, rng, fileSize=256 * 1024):
+    os.makedirs(dataDir, exist_ok=True)
+    with open(os.path.join(dataDir, 'project.qgs'), 'w', encoding='utf-8') as f:
+        f.write('<qgis projectname="benchmark"></qgis>')
+
+    for i in range(files):
+        extension = '.tif' if i % 2 else '.gpkg'
+        with open(os.path.join(dataDir, 'layer_{}{}'.format(i, extension)), 'wb') as f:
+            f.write(bytes(rng.getrandbits(8) for _ in range(256)) * (fileSize // 256))
+
+    return os.path.join(dataDir, 'project.qgs')
+
+
+def generateLibrary(root, lessons, locales=1, steps=10, htmlSize=1000, functions=10,
+                    groupSize=100, groupPrefix='group', projectFiles=0, seed=0):
+    """Writes lessons into root, groupSize lessons per group, and returns
+    list of (groupId, name) of the generated lessons. Every lesson
+    recommends the next one in its group.
+    """
+    rng = random.Random(seed)
+    locales = LOCALES[:max(1, min(locales, len(LOCALES)))]
+
+    ids = [('{}_{}'.format(groupPrefix, i // groupSize), 'lesson_{}'.format(i)) for i in range(lessons)]
+    for i, (groupId, name) in enumerate(ids):
+        recommended = None
+        if i + 1 < len(ids) and ids[i + 1][0] == groupId:
+            recommended = [ids[i + 1]]
+
+        writeLesson(root, groupId, name, rng, locales, steps, htmlSize, functions,
+                    recommended, projectFiles)
+
+    return ids
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Synthetic lesson library generator')
+    parser.add_argument('root', help='directory to write lessons into')
+    parser.add_argument('--lessons', type=int, default=100)
+    parser.add_argument('--locales', type=int, default=1)
+    parser.add_argument('--steps', type=int, default=10)
+    parser.add_argument('--html-size', type=int, default=1000, help='characters of text per HTML file')
+    parser.add_argument('--functions', type=int, default=10, help='prepare/check pairs in functions.py')
+    parser.add_argument('--group-size', type=int, default=100)
+    parser.add_argument('--project-files', type=int, default=0, help='data files next to project.qgs')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    ids = generateLibrary(args.root, args.lessons, args.locales, args.steps, args.html_size,
+                          args.functions, args.group_size, projectFiles=args.project_files,
+                          seed=args.seed)
+    print('{} lessons in {} groups written to {}'.format(len(ids), len({g for g, _ in ids}), args.root))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,325 @@
+# -*- coding: utf-8 -*-
+"""
+***************************************************************************
+    run_benchmarks.py
+    ---------------------
+    Date                 : July 2023
+    Copyright            : (C) 2023 by Pascal Ogola
+    Email                : passies95 at gmail dot com
+***************************************************************************
+*                                                                         *
+*   This program is free software; you can redistribute it and/or modify  *
+*   it under the terms of the GNU General Public License as published by  *
+*   the Free Software Foundation; either version 2 of the License, or     *
+*   (at your option) any later version.                                   *
+*                                                                         *
+***************************************************************************
+
+Times the plugin hot paths against synthetic lesson libraries. Runs on a
+plain Python with PyQt5 and PyYAML, QGIS is replaced by the stubs in
+benchmarks/stubs. Results are written as JSON and can be compared with a
+previous run, e.g.
+
+    python benchmarks/run_benchmarks.py --sizes 10,1000,50000 --output new.json
+    python benchmarks/run_benchmarks.py --output new.json --compare baseline.json
+
+Comparison exits with status 1 if any benchmark got slower than the
+threshold allows.
+"""
+
+__author__ = 'Pascal Ogola'
+__date__ = 'July 2023'
+__copyright__ = '(C) 2023, Pascal Ogola'
+
+# This will get replaced with a git SHA1 when you do a git archive
+
+__revision__ = '$Format:%H$'
+
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import zipfile
+import argparse
+import platform
+import importlib
+import statistics
+import tempfile
+
+benchmarksPath = os.path.dirname(os.path.abspath(__file__))
+pluginPath = os.path.dirname(benchmarksPath)
+
+# use the stubs only when real QGIS is not available
+try:
+    import qgis.core  # noqa: F401
+except ImportError:
+    sys.path.insert(0, os.path.join(benchmarksPath, 'stubs'))
+
+sys.path.insert(0, benchmarksPath)
+sys.path.insert(0, os.path.dirname(pluginPath))
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+from generate_library import generateLibrary, writeProjectData  # noqa: E402
+
+
+def measure(function, repeat, setup=None, number=1):
+    """Returns median wall time of a single call, in seconds."""
+    times = list()
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+
+        start = time.perf_counter()
+        for _ in range(number):
+            function()
+        times.append((time.perf_counter() - start) / number)
+
+    return statistics.median(times)
+
+
+class Benchmarks:
+
+    def __init__(self, workDir, args):
+        self.workDir = workDir
+        self.args = args
+        self.results = dict()
+
+        from qgis.core import QgsApplication
+        self.app = QgsApplication.instance() or QgsApplication([])
+
+        name = os.path.basename(pluginPath)
+        self.lesson = importlib.import_module('{}.lesson'.format(name))
+        self.registryModule = importlib.import_module('{}.lessonregistry'.format(name))
+        self.utils = importlib.import_module('{}.lesson_utils'.format(name))
+        self.helpers = importlib.import_module('{}.helper_functions'.format(name))
+        self.search = importlib.import_module('{}.lessonsearch'.format(name))
+        self.descriptions = importlib.import_module('{}.descriptioncache'.format(name))
+
+    def record(self, name, seconds):
+        self.results[name] = seconds
+        print('{:40} {:12.3f} ms'.format(name, seconds * 1000))
+
+    def freshRegistry(self):
+        # registry is a singleton, benchmarks need an empty one
+        cls = self.registryModule.QLessonRegistry
+        if hasattr(cls, 'instance'):
+            del cls.instance
+
+        return cls()
+
+    def run(self):
+        for size in self.args.sizes:
+            self.librarySize(size)
+
+        self.installFromZip()
+        self.stageProject()
+        self.showDescription()
+        self.menuLookup()
+
+        return self.results
+
+    def librarySize(self, size):
+        args = self.args
+        root = os.path.join(self.workDir, 'library_{}'.format(size))
+        ids = generateLibrary(root, size, args.locales, args.steps, args.html_size, args.functions)
+        paths = [os.path.join(root, 'builtin'), root]
+        lessonFiles = [os.path.join(root, g, n, 'lesson.yaml') for g, n in ids]
+        prefix = 'library_{}'.format(size)
+
+        sample = lessonFiles[:50]
+        self.record('{}/fromYaml'.format(prefix),
+                    measure(lambda: [self.lesson.Lesson.fromYaml(f) for f in sample], args.repeat) / len(sample))
+
+        catalogFile = self.freshRegistry().lessonCatalog().catalogFile
+
+        def cold():
+            if os.path.exists(catalogFile):
+                os.remove(catalogFile)
+
+        self.record('{}/loadLessons_cold'.format(prefix),
+                    measure(lambda: self.freshRegistry().loadLessons(paths), args.repeat, cold))
+        self.record('{}/loadLessons_warm'.format(prefix),
+                    measure(lambda: self.freshRegistry().loadLessons(paths), args.repeat, self.freshRegistry))
+        self.record('{}/loadCatalog'.format(prefix),
+                    measure(lambda: self.freshRegistry().loadCatalog(paths), args.repeat, self.freshRegistry))
+
+        registry = self.freshRegistry()
+        registry.loadLessons(paths)
+        rng = random.Random(0)
+        lookups = ['{}:{}'.format(*rng.choice(ids)) for _ in range(10000)]
+        self.record('{}/lessonById'.format(prefix),
+                    measure(lambda: [registry.lessonById(i) for i in lookups], args.repeat) / len(lookups))
+
+        # stubbed task manager runs description indexing synchronously
+        self.record('{}/searchIndex_build'.format(prefix),
+                    measure(lambda: self.search.LessonSearchIndex(registry), args.repeat))
+        index = self.search.LessonSearchIndex(registry)
+        queries = ['lesson', 'less', 'buffer clip', 'lesson 1', 'group', 'raster attr', 'nomatch']
+        self.record('{}/search'.format(prefix),
+                    measure(lambda: [index.search(q) for q in queries], args.repeat) / len(queries))
+
+    def installFromZip(self):
+        from qgis.core import QgsSettings
+
+        source = os.path.join(self.workDir, 'zip_source')
+        generateLibrary(source, self.args.zip_lessons, self.args.locales, self.args.steps,
+                        self.args.html_size, self.args.functions, groupPrefix='zipgroup')
+        archive = os.path.join(self.workDir, 'lessons.zip')
+        with zipfile.ZipFile(archive, 'w', zipfile.ZIP_DEFLATED) as zf:
+            for directory, dirNames, fileNames in os.walk(source):
+                for fileName in fileNames:
+                    path = os.path.join(directory, fileName)
+                    zf.write(path, os.path.relpath(path, source).replace(os.sep, '/'))
+
+        userPath = os.path.join(self.workDir, 'user_lessons')
+        QgsSettings().setValue('qlesson/lessonsPaths', [userPath])
+
+        def setup():
+            shutil.rmtree(userPath, True)
+            self.freshRegistry()
+
+        self.record('installLessonsFromZip_{}'.format(self.args.zip_lessons),
+                    measure(lambda: self.freshRegistry().installLessonsFromZip(archive), self.args.repeat, setup))
+
+        def unmount():
+            registry = self.freshRegistry()
+            registry.unmountLessonBundle(archive)
+
+        self.record('mountLessonBundle_{}'.format(self.args.zip_lessons),
+                    measure(lambda: self.freshRegistry().mountLessonBundle(archive), self.args.repeat, unmount))
+        QgsSettings().remove('qlesson/lessonBundles')
+
+    def stageProject(self):
+        rng = random.Random(0)
+        projectFile = writeProjectData(os.path.join(self.workDir, 'project', 'data'), self.args.project_files, rng)
+        source = os.path.dirname(projectFile)
+        staging = os.path.join(self.workDir, 'staging')
+
+        def setup():
+            shutil.rmtree(staging, True)
+
+        for mode in ('copy', 'cow', 'link'):
+            self.record('stageDirectory_{}'.format(mode),
+                        measure(lambda: self.helpers.stageDirectory(source, staging, mode), self.args.repeat, setup))
+
+    def showDescription(self):
+        from qgis.PyQt.QtGui import QImage, QColor
+        from qgis.PyQt.QtWidgets import QTextBrowser
+
+        directory = os.path.join(self.workDir, 'description')
+        os.makedirs(os.path.join(directory, 'images'), exist_ok=True)
+        sources = ['image_{}.png'.format(i) if i % 2 else 'images/image_{}.png'.format(i) for i in range(10)]
+        for source in sources:
+            image = QImage(64, 64, QImage.Format_RGB32)
+            image.fill(QColor(200, 100, 0))
+            image.save(os.path.join(directory, *source.split('/')))
+
+        path = os.path.join(directory, 'lesson.html')
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write('<html><body>{}</body></html>'.format(''.join('<img src="{}">'.format(s) for s in sources)))
+
+        class Browser(QTextBrowser):
+            # counts images the browser reads itself instead of taking
+            # them from the cached document
+            loaded = list()
+
+            def loadResource(self, resourceType, url):
+                self.loaded.append(url.toString())
+                return super(Browser, self).loadResource(resourceType, url)
+
+        cache = self.descriptions.DescriptionCache()
+        browser = Browser()
+        browser.resize(400, 400)
+
+        def show():
+            cache.document(path).show(browser)
+            # images are requested when the document is laid out
+            browser.document().adjustSize()
+
+        self.record('showDescription_cached', measure(show, self.args.repeat))
+        if Browser.loaded:
+            raise RuntimeError('Cached description read {} image(s) from disk'.format(len(Browser.loaded)))
+
+    def menuLookup(self):
+        from qgis.utils import iface
+
+        menuBar = iface.mainWindow().menuBar()
+        paths = list()
+        for m in range(20):
+            menu = menuBar.addMenu('&Menu {}'.format(m))
+            for s in range(5):
+                subMenu = menu.addMenu('Sub {}'.format(s))
+                for a in range(20):
+                    subMenu.addAction('Action {}'.format(a))
+                    paths.append('Menu {}|Sub {}|Action {}'.format(m, s, a))
+
+        index = self.utils.menuIndex()
+        self.record('menuIndex_build',
+                    measure(lambda: index.lookup(paths[0]), self.args.repeat, index.invalidate))
+        self.record('menuByName',
+                    measure(lambda: [self.utils.menuByName(p) for p in paths], self.args.repeat) / len(paths))
+
+
+def compareResults(results, baselineFile, threshold):
+    with open(baselineFile, encoding='utf-8') as f:
+        baseline = json.load(f)['results']
+
+    regressions = list()
+    print('\n{:40} {:>12} {:>12} {:>8}'.format('benchmark', 'baseline ms', 'current ms', 'ratio'))
+    for name in sorted(set(results) & set(baseline)):
+        ratio = results[name] / baseline[name] if baseline[name] else float('inf')
+        flag = ''
+        if ratio > 1.0 + threshold:
+            regressions.append(name)
+            flag = '  REGRESSION'
+        print('{:40} {:12.3f} {:12.3f} {:8.2f}{}'.format(name, baseline[name] * 1000, results[name] * 1000, ratio, flag))
+
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='QLesson benchmark suite')
+    parser.add_argument('--sizes', type=lambda s: [int(v) for v in s.split(',')], default=[10, 1000],
+                        help='comma separated library sizes, e.g. 10,1000,50000')
+    parser.add_argument('--locales', type=int, default=2)
+    parser.add_argument('--steps', type=int, default=10)
+    parser.add_argument('--html-size', type=int, default=1000)
+    parser.add_argument('--functions', type=int, default=10)
+    parser.add_argument('--zip-lessons', type=int, default=100)
+    parser.add_argument('--project-files', type=int, default=20)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--output', help='write results to this JSON file')
+    parser.add_argument('--compare', help='JSON results of a previous run')
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help='allowed slowdown against the baseline, 0.25 is 25%%')
+    parser.add_argument('--work-dir', help='keep generated libraries in this directory')
+    args = parser.parse_args()
+
+    workDir = args.work_dir or tempfile.mkdtemp(prefix='qlesson-bench-')
+    # keeps lesson cache and statistics of the stubbed QGIS in the work directory
+    os.environ.setdefault('QLESSON_BENCH_SETTINGS', os.path.join(workDir, 'settings'))
+    try:
+        results = Benchmarks(workDir, args).run()
+    finally:
+        if not args.work_dir:
+            shutil.rmtree(workDir, True)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({'meta': {'date': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                                'python': platform.python_version(),
+                                'platform': platform.platform(),
+                                'arguments': vars(args)},
+                       'results': results}, f, indent=2)
+
+    if args.compare:
+        regressions = compareResults(results, args.compare, args.threshold)
+        if regressions:
+            print('\n{} benchmark(s) regressed: {}'.format(len(regressions), ', '.join(regressions)))
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,2 @@
+# -*- coding: utf-8 -*-
+from PyQt5.QtCore import *
@@ -0,0 +1,4 @@
+# -*- coding: utf-8 -*-
+"""qgis.PyQt maps to PyQt5, as it does in QGIS 3."""
+
+from PyQt5 import uic
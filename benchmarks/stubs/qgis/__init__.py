@@ -0,0 +1,4 @@
+# -*- coding: utf-8 -*-
+"""Lightweight stand-in for the qgis package, used by the benchmarks to
+import QLesson without a QGIS installation. Only PyQt5 is required.
+"""
@@ -0,0 +1,166 @@
+# -*- coding: utf-8 -*-
+"""Stub of the qgis.core classes used by QLesson.
+
+Settings are kept in memory, tasks run synchronously when added to the
+task manager and log messages are collected in MESSAGES. The settings
+directory is QLESSON_BENCH_SETTINGS or a new temporary directory, the
+locale is QLESSON_BENCH_LOCALE or "en".
+"""
+
+import os
+import tempfile
+
+from PyQt5.QtCore import QObject, pyqtSignal
+from PyQt5.QtWidgets import QApplication
+
+SETTINGS_DIR = os.environ.get('QLESSON_BENCH_SETTINGS') or tempfile.mkdtemp(prefix='qlesson-bench-')
+
+MESSAGES = list()
+
+
+class Qgis:
+    Info = 0
+    Warning = 1
+    Critical = 2
+    Success = 3
+
+
+class QgsApplication(QApplication):
+
+    _locale = os.environ.get('QLESSON_BENCH_LOCALE', 'en')
+    _taskManager = None
+
+    @staticmethod
+    def locale():
+        return QgsApplication._locale
+
+    @staticmethod
+    def qgisSettingsDirPath():
+        return SETTINGS_DIR
+
+    @staticmethod
+    def getThemeIcon(name):
+        from PyQt5.QtGui import QIcon
+        return QIcon()
+
+    @staticmethod
+    def taskManager():
+        if QgsApplication._taskManager is None:
+            QgsApplication._taskManager = QgsTaskManager()
+
+        return QgsApplication._taskManager
+
+
+class QgsMessageLog:
+
+    @staticmethod
+    def logMessage(message, tag='', level=Qgis.Info):
+        MESSAGES.append((tag, message))
+
+
+class QgsSettings:
+
+    _values = dict()
+
+    def value(self, key, defaultValue=None, type=None):
+        value = QgsSettings._values.get(key, defaultValue)
+        if type is None or value is None:
+            return value
+
+        if type is bool and isinstance(value, str):
+            return value.lower() == 'true'
+
+        return type(value)
+
+    def setValue(self, key, value):
+        QgsSettings._values[key] = value
+
+    def remove(self, key):
+        QgsSettings._values.pop(key, None)
+
+
+class QgsFeedback(QObject):
+
+    progressChanged = pyqtSignal(float)
+    canceled = pyqtSignal()
+
+    def __init__(self, parent=None):
+        super(QgsFeedback, self).__init__(parent)
+        self._canceled = False
+        self._progress = 0.0
+
+    def isCanceled(self):
+        return self._canceled
+
+    def cancel(self):
+        self._canceled = True
+        self.canceled.emit()
+
+    def setProgress(self, progress):
+        self._progress = progress
+        self.progressChanged.emit(progress)
+
+    def progress(self):
+        return self._progress
+
+
+class QgsTask(QObject):
+
+    CanCancel = 1
+
+    Queued = 0
+    OnHold = 1
+    Running = 2
+    Complete = 3
+    Terminated = 4
+
+    progressChanged = pyqtSignal(float)
+    taskCompleted = pyqtSignal()
+    taskTerminated = pyqtSignal()
+
+    def __init__(self, description='', flags=CanCancel):
+        super(QgsTask, self).__init__()
+        self._description = description
+        self._canceled = False
+        self._progress = 0.0
+        self._status = QgsTask.Queued
+
+    def description(self):
+        return self._description
+
+    def status(self):
+        return self._status
+
+    def isCanceled(self):
+        return self._canceled
+
+    def cancel(self):
+        self._canceled = True
+
+    def setProgress(self, progress):
+        self._progress = progress
+        self.progressChanged.emit(progress)
+
+    def progress(self):
+        return self._progress
+
+    def run(self):
+        return True
+
+    def finished(self, result):
+        pass
+
+
+class QgsTaskManager(QObject):
+
+    def addTask(self, task):
+        task._status = QgsTask.Running
+        result = task.run()
+        task._status = QgsTask.Complete if result else QgsTask.Terminated
+        task.finished(result)
+        if result:
+            task.taskCompleted.emit()
+        else:
+            task.taskTerminated.emit()
+
+        return 1
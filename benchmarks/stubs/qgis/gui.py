@@ -0,0 +1,12 @@
+# -*- coding: utf-8 -*-
+"""Stub of the qgis.gui classes used by QLesson."""
+
+
+class QgsGui:
+
+    @staticmethod
+    def instance():
+        return QgsGui()
+
+    def enableAutoGeometryRestore(self, widget, key=''):
+        pass
@@ -0,0 +1,33 @@
+# -*- coding: utf-8 -*-
+"""Stub of qgis.utils: an iface with a real main window (and menu bar)
+and a no-op OverrideCursor.
+"""
+
+from contextlib import contextmanager
+
+
+class _Interface:
+
+    def __init__(self):
+        self._mainWindow = None
+        # projects passed to addProject(), in order
+        self.projects = list()
+
+    def mainWindow(self):
+        if self._mainWindow is None:
+            from PyQt5.QtWidgets import QMainWindow
+            self._mainWindow = QMainWindow()
+
+        return self._mainWindow
+
+    def addProject(self, path):
+        self.projects.append(path)
+        return True
+
+
+iface = _Interface()
+
+
+@contextmanager
+def OverrideCursor(cursor):
+    yield
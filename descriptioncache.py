@@ -0,0 +1,208 @@
+# -*- coding: utf-8 -*-
+"""
+/***************************************************************************
+descriptioncache.py
+    ---------------------
+        Date                 : 2023-07-07
+        git sha              : $Format:%H$
+        copyright            : (C) 2023 by Pascal Ogola
+        email                : passies95@gmail.com
+ ***************************************************************************/
+
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+"""
+
+__author__ = 'Pascal Ogola'
+__date__ = 'July 2023'
+__copyright__ = '(C) 2023, Pascal Ogola'
+
+# This will get replaced with a git SHA1 when you do a git archive
+
+__revision__ = '$Format:%H$'
+
+import os
+import re
+import threading
+from collections import OrderedDict
+
+from qgis.core import QgsSettings
+from qgis.PyQt.QtCore import QUrl
+from qgis.PyQt.QtGui import QImage, QTextDocument
+
+from . import lessonbundle
+
+IMAGE_SOURCE = re.compile(r'<img\b[^>]*?\bsrc\s*=\s*["\']([^"\']+)["\']', re.IGNORECASE)
+
+# shared by the lesson and library pages and the step prefetcher
+_descriptionCache = None
+
+
+class DescriptionDocument:
+    """Description HTML file together with the images it references,
+    ready to be shown in a QTextBrowser without touching the disk.
+    """
+
+    def __init__(self, path, html, images, files):
+        self.path = path
+        self.html = html
+        # image sources, as written in the HTML, and loaded images
+        self.images = images
+        # modification times of the HTML and image files
+        self.files = files
+
+    def size(self):
+        return len(self.html) * 2 + sum(image.sizeInBytes() for image in self.images.values())
+
+    def isCurrent(self):
+        for path, mtime in self.files.items():
+            try:
+                if lessonbundle.modificationTime(path) != mtime:
+                    return False
+            except OSError:
+                return False
+
+        return True
+
+    def baseUrl(self):
+        return QUrl.fromLocalFile(os.path.join(os.path.dirname(self.path), ''))
+
+    def show(self, browser):
+        browser.clear()
+        baseUrl = self.baseUrl()
+        document = browser.document()
+        document.setBaseUrl(baseUrl)
+        document.setMetaInformation(QTextDocument.DocumentUrl, baseUrl.toString())
+        # document resolves image names against the base URL before it
+        # looks them up in its resources
+        for source, image in self.images.items():
+            document.addResource(QTextDocument.ImageResource, baseUrl.resolved(QUrl(source)), image)
+
+        browser.setHtml(self.html)
+
+
+def loadDescription(path):
+    """Reads description HTML file and loads local images it references.
+    Safe to call outside of the main thread.
+    """
+    files = {path: lessonbundle.modificationTime(path)}
+    with lessonbundle.openText(path) as f:
+        html = f.read()
+
+    directory = os.path.dirname(path)
+    images = dict()
+    for source in set(IMAGE_SOURCE.findall(html)):
+        url = QUrl(source)
+        if url.isLocalFile():
+            imageFile = url.toLocalFile()
+        elif url.isRelative():
+            imageFile = os.path.join(directory, url.path())
+        else:
+            # remote images are left to the browser
+            continue
+
+        if lessonbundle.isBundlePath(imageFile):
+            if not lessonbundle.isFile(imageFile):
+                continue
+            image = QImage.fromData(lessonbundle.readBytes(imageFile))
+        else:
+            image = QImage(imageFile)
+
+        if not image.isNull():
+            images[source] = image
+            files[imageFile] = lessonbundle.modificationTime(imageFile)
+
+    return DescriptionDocument(path, html, images, files)
+
+
+def descriptionCache():
+    global _descriptionCache
+    if _descriptionCache is None:
+        _descriptionCache = DescriptionCache()
+
+    return _descriptionCache
+
+
+class DescriptionCache:
+    """LRU cache of loaded description documents.
+
+    Documents are keyed by the HTML file path and are reloaded when the
+    HTML or any of its images changes on disk. Least recently shown
+    documents are dropped once the total size exceeds the limit set with
+    "qlesson/descriptionCacheMb" (32 MB by default).
+    """
+
+    def __init__(self, maxBytes=None):
+        if maxBytes is None:
+            maxBytes = max(0, QgsSettings().value('qlesson/descriptionCacheMb', 32, int)) * 1024 * 1024
+
+        self.maxBytes = maxBytes
+        self.hits = 0
+        self.misses = 0
+
+        self._documents = OrderedDict()
+        self._size = 0
+        # documents are also loaded by step prefetch tasks
+        self._lock = threading.Lock()
+
+    def document(self, path):
+        """Returns the description document for the HTML file, raises
+        OSError if it can not be read.
+        """
+        path = os.path.abspath(path)
+        with self._lock:
+            document = self._documents.get(path)
+            if document is not None and document.isCurrent():
+                self._documents.move_to_end(path)
+                self.hits += 1
+                return document
+
+            self.misses += 1
+
+        document = loadDescription(path)
+        with self._lock:
+            self._remove(path)
+            size = document.size()
+            if size <= self.maxBytes:
+                self._documents[path] = document
+                self._size += size
+                self._evict()
+
+        return document
+
+    def setMaxBytes(self, maxBytes):
+        with self._lock:
+            self.maxBytes = maxBytes
+            self._evict()
+
+    def clear(self):
+        with self._lock:
+            self._documents.clear()
+            self._size = 0
+
+    def statistics(self):
+        """Returns hits, misses, number of cached documents and their
+        size in bytes.
+        """
+        with self._lock:
+            return self.hits, self.misses, len(self._documents), self._size
+
+    def hitRate(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def _remove(self, path):
+        document = self._documents.pop(path, None)
+        if document is not None:
+            self._size -= document.size()
+
+    def _evict(self):
+        while self._size > self.maxBytes and self._documents:
+            _, document = self._documents.popitem(last=False)
+            self._size -= document.size()
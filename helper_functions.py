@@ -28,18 +28,128 @@ __copyright__ = '(C) 2023, Pascal Ogola'
 __revision__ = '$Format:%H$'
 
 import os
+import sys
+import stat
 import shutil
 import uuid
+import ctypes
+import ctypes.util
 
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+from qgis.PyQt.QtCore import QCoreApplication
+from qgis.core import Qgis, QgsMessageLog, QgsSettings
 from qgis.utils import iface
 
 # import the lesson_utils.py
 from . import lesson_utils as utils
 
+# ioctl request cloning file extents (Linux, btrfs/XFS/...)
+FICLONE = 0x40049409
+
+# data formats lessons read but do not edit, hard linked in 'link' mode
+READ_ONLY_EXTENSIONS = ('.tif', '.tiff', '.jp2', '.ecw', '.sid', '.img', '.las', '.laz')
+
+# clonefile(2) clones files on APFS (macOS)
+_clonefile = None
+if sys.platform == 'darwin':
+    try:
+        _clonefile = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True).clonefile
+        _clonefile.argtypes = (ctypes.c_char_p, ctypes.c_char_p, ctypes.c_uint32)
+        _clonefile.restype = ctypes.c_int
+    except (OSError, AttributeError):
+        _clonefile = None
+
 
 def loadProject(projectPath):
     root = os.path.dirname(projectPath)
     fileName = os.path.basename(projectPath)
     tmp = os.path.join(utils.tempDirectory(), uuid.uuid4().hex)
-    shutil.copytree(root, tmp)
+    stageDirectory(root, tmp)
     iface.addProject(os.path.join(tmp, fileName))
+
+
+def stageDirectory(source, destination, mode=None):
+    """Recreates the source directory tree in destination.
+
+    Staging modes (qlesson/stagingMode setting):
+      copy  - copy every file
+      cow   - clone files with copy-on-write where the file system
+              supports it, copy otherwise (default)
+      link  - as cow, but files in READ_ONLY_EXTENSIONS that can not be
+              cloned are hard linked and made read-only
+    Cloning works with FICLONE on Linux (btrfs, XFS, ...) and clonefile
+    on macOS (APFS). On other file systems (ext4, NTFS, ...) cow falls
+    back to a full copy. Hard links are only used on POSIX systems and
+    share the inode with the lesson, so the lesson's own file becomes
+    read-only as well; a lesson step that writes to such a file fails
+    instead of modifying the lesson. The mode actually used is logged.
+    """
+    if mode is None:
+        mode = QgsSettings().value('qlesson/stagingMode', 'cow', str)
+
+    canClone = mode in ('cow', 'link') and (fcntl is not None or _clonefile is not None)
+    canLink = mode == 'link' and os.name == 'posix'
+    cloned = linked = copied = 0
+    for directory, dirNames, fileNames in os.walk(source):
+        target = os.path.normpath(os.path.join(destination, os.path.relpath(directory, source)))
+        os.makedirs(target, exist_ok=True)
+
+        for fileName in fileNames:
+            src = os.path.join(directory, fileName)
+            dst = os.path.join(target, fileName)
+
+            if canClone:
+                if _cloneFile(src, dst):
+                    cloned += 1
+                    continue
+
+                # do not retry on a file system without reflink support
+                canClone = False
+
+            if canLink and fileName.lower().endswith(READ_ONLY_EXTENSIONS):
+                if _linkFile(src, dst):
+                    linked += 1
+                    continue
+
+                # e.g. source and destination on different devices
+                canLink = False
+
+            shutil.copy2(src, dst)
+            copied += 1
+
+    QgsMessageLog.logMessage(QCoreApplication.translate('stageDirectory', 'Staged {} ({} mode): {} files cloned, {} linked, {} copied.')
+                             .format(source, mode, cloned, linked, copied), 'QLesson', Qgis.Info)
+
+
+def _cloneFile(source, destination):
+    if _clonefile is not None:
+        return _clonefile(os.fsencode(source), os.fsencode(destination), 0) == 0
+
+    try:
+        with open(source, 'rb') as src, open(destination, 'wb') as dst:
+            fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+    except OSError:
+        if os.path.exists(destination):
+            os.remove(destination)
+        return False
+
+    shutil.copystat(source, destination)
+    return True
+
+
+def _linkFile(source, destination):
+    try:
+        os.link(source, destination)
+        # the inode is shared with the lesson, nothing may write through it
+        mode = stat.S_IMODE(os.stat(destination).st_mode)
+        os.chmod(destination, mode & ~(stat.S_IWUSR | stat.S_IWGRP | stat.S_IWOTH))
+    except OSError:
+        if os.path.exists(destination):
+            os.remove(destination)
+        return False
+
+    return True
@@ -28,17 +28,61 @@ __copyright__ = '(C) 2023, Pascal Ogola'
 __revision__ = '$Format:%H$'
 
 import os
+import sys
+import time
 import importlib
-import importlib.util
 import traceback
+from collections import OrderedDict
 
 import yaml
 
 from qgis.PyQt.QtCore import Q_ENUMS, QCoreApplication
-from qgis.core import QgsApplication, QgsMessageLog
+from qgis.core import QgsApplication, QgsSettings, QgsMessageLog
 
 from .helper_functions import loadProject
-from .lesson_utils import menuByName
+from .lessonstats import lessonStatistics
+from . import lessonbundle
+from .lessondefinition import YamlLoader, readDefinition
+from .lesson_utils import (menuByName, lessonFunctions, LessonResources,
+                           isBackgroundFunction, isSideEffectFree, acceptsFeedback)
+
+# shared by all functions without parameters
+NO_PARAMETERS = tuple()
+
+
+def compactValue(value):
+    """Returns copy of a value parsed from lesson.yaml with strings
+    interned and lists turned into tuples, so that equal values of many
+    lessons share memory.
+    """
+    if isinstance(value, str):
+        return sys.intern(value)
+    elif isinstance(value, (list, tuple)):
+        return tuple(compactValue(v) for v in value) if value else NO_PARAMETERS
+    elif isinstance(value, dict):
+        return {sys.intern(k) if isinstance(k, str) else k: compactValue(v) for k, v in value.items()}
+
+    return value
+
+
+class StepDefinition:
+    """Step of lesson.yaml, kept until the lesson steps are built."""
+
+    __slots__ = ('name', 'description', 'menu', 'prepare', 'execute', 'check')
+
+    def __init__(self, name=None, description=None, menu=None, prepare=None, execute=None, check=None):
+        self.name = name
+        self.description = description
+        self.menu = menu
+        self.prepare = prepare
+        self.execute = execute
+        self.check = check
+
+    @classmethod
+    def fromDict(cls, step):
+        step = compactValue(step)
+        return cls(step.get('name'), step.get('description'), step.get('menu'),
+                   step.get('prepare'), step.get('execute'), step.get('check'))
 
 
 class LessonStep:
@@ -56,36 +100,83 @@ class LessonStep:
     Q_ENUMS(StepType)
     Q_ENUMS(FunctionType)
 
+    # names used for timing statistics
+    functionNames = {FunctionType.Prepare: 'prepare',
+                     FunctionType.Execute: 'execute',
+                     FunctionType.Check: 'check'
+                    }
+
+    # parameters of steps without functions
+    _noParameters = (NO_PARAMETERS, NO_PARAMETERS, NO_PARAMETERS)
+
+    # there can be tens of thousands of steps, do not give each a __dict__
+    __slots__ = ('name', 'description', 'prepare', 'execute', 'check', 'parameters',
+                 'background', 'speculative', 'type', 'signal', 'handler', 'lessonId', 'index')
+
     def __init__(self, name, description, prepare=None, execute=None,
-                 check=None, parameters=None, stepType=StepType.Manual):
+                 check=None, parameters=None, stepType=StepType.Manual, background=None,
+                 speculative=False):
         self.name = name
         self.description = description
 
         self.prepare = prepare
         self.execute = execute
         self.check = check
-        self.parameters = parameters
+        # parameters indexed by function type
+        if parameters:
+            self.parameters = tuple(parameters.get(t, NO_PARAMETERS) for t in (LessonStep.FunctionType.Prepare,
+                                                                               LessonStep.FunctionType.Execute,
+                                                                               LessonStep.FunctionType.Check))
+        else:
+            self.parameters = LessonStep._noParameters
+        # bit mask of function types which run in a background task
+        self.background = 0
+        for functionType, inBackground in (background or dict()).items():
+            if inBackground:
+                self.background |= 1 << functionType
+        # prepare function may run before the step is shown
+        self.speculative = speculative
 
         self.type = stepType
 
         self.signal = None
         self.handler = None
 
-    def runFunction(self, functionType):
+        # set when step is added to a lesson
+        self.lessonId = None
+        self.index = None
+
+    def runFunction(self, functionType, feedback=None):
+        function = self.function(functionType)
         params = self.functionParameters(functionType)
 
+        start = time.perf_counter()
+        try:
+            if feedback is not None and acceptsFeedback(function):
+                return function(*params, feedback=feedback)
+
+            return function(*params)
+        finally:
+            lessonStatistics().record(self.lessonId, self.index, self.functionNames[functionType],
+                                      time.perf_counter() - start)
+
+    def function(self, functionType):
         if functionType == LessonStep.FunctionType.Prepare:
-            return self.prepare(*params)
+            return self.prepare
         elif functionType == LessonStep.FunctionType.Execute:
-            return self.execute(*params)
+            return self.execute
         elif functionType == LessonStep.FunctionType.Check:
-            return self.check(*params)
+            return self.check
+
+    def runsInBackground(self, functionType):
+        return bool(self.background & (1 << functionType))
+
+    def canPrepareAhead(self):
+        return (self.prepare is not None and self.speculative
+                and self.runsInBackground(LessonStep.FunctionType.Prepare))
 
     def functionParameters(self, functionType):
-        if functionType in self.parameters:
-            return self.parameters[functionType]
-        else:
-            return tuple()
+        return self.parameters[functionType]
 
     def addSignalHandler(self, signal, handler):
         self.signal = signal
@@ -93,28 +184,117 @@ class LessonStep:
 
 class Lesson:
 
-    def __init__(self, name, displayName, groupId, group, description, root=None):
-        self.name = name
-        self.groupId = groupId
-        self.id = '{}:{}'.format(groupId, name)
+    # lessons with materialized steps, least recently used first
+    _materialized = OrderedDict()
+
+    __slots__ = ('name', 'groupId', 'id', 'root', 'resources', 'displayName', 'group',
+                 '_description', '_descriptionFile', 'recommended', 'stepDefinitions',
+                 '_steps', 'cleanup')
+
+    def __init__(self, name, displayName, groupId, group, description, root=None, stepDefinitions=None):
+        # ids and group names are shared by many lessons and used as
+        # dictionary keys, keep a single copy of them
+        self.name = sys.intern(name)
+        self.groupId = sys.intern(groupId)
+        self.id = sys.intern('{}:{}'.format(groupId, name))
 
         self.root = root
+        self.resources = LessonResources(root)
 
         self.displayName = displayName
-        self.group = group
-        self.description = self._findFile(description)
-
-        self.steps = list()
-        self.recommended = list()
+        self.group = sys.intern(group) if group else group
+        # localized description file is looked up on first access
+        self._description = sys.intern(description) if description else description
+        self._descriptionFile = None
+
+        self.recommended = NO_PARAMETERS
+
+        # steps are built from their definitions on first access, lessons
+        # created without definitions are populated with addStep()
+        if stepDefinitions is not None:
+            stepDefinitions = tuple(s if isinstance(s, StepDefinition) else StepDefinition.fromDict(s)
+                                    for s in stepDefinitions)
+        self.stepDefinitions = stepDefinitions
+        self._steps = None
+        self.cleanup = None
+
+    @property
+    def description(self):
+        # resolved on first use, localized files may change between
+        # sessions while lesson.yaml does not
+        if self._descriptionFile is None:
+            self._descriptionFile = self._findFile(self._description)
+
+        return self._descriptionFile
+
+    @property
+    def steps(self):
+        if self._steps is None:
+            self.materialize()
+        elif self in Lesson._materialized:
+            Lesson._materialized.move_to_end(self)
+
+        return self._steps if self._steps is not None else list()
+
+    def isMaterialized(self):
+        return self._steps is not None
+
+    def materialize(self):
+        """Builds lesson steps and resolves their functions and menus.
+        Returns False if the lesson can not be loaded.
+        """
+        if self._steps is not None:
+            return True
+
+        self._steps = list()
 
         # add step to load QGIS project with lesson data, if any
         projectFile = os.path.join(self.root, 'data',  'project.qgs')
-        if os.path.isfile(projectFile):
+        if lessonbundle.isFile(projectFile):
+            # data of mounted bundles is extracted when it is first needed
             self.addStep(self.tr('Open project'),
                          self.tr('Open project with lesson data.'),
-                         execDefinition=lambda: loadProject(projectFile),
+                         execDefinition=lambda: loadProject(lessonbundle.localPath(projectFile)),
                          stepType=LessonStep.StepType.Automated)
 
+        if self.stepDefinitions is None:
+            return True
+
+        try:
+            for step in self.stepDefinitions:
+                self._addStepFromDefinition(step)
+        except Exception:
+            QgsMessageLog.logMessage(self.tr('Can not load lesson {}:\n{}').format(self.id, traceback.format_exc()), 'QLesson')
+            self._steps = None
+            return False
+
+        Lesson._materialized[self] = True
+        limit = max(1, QgsSettings().value('qlesson/materializedLessons', 10, int))
+        while len(Lesson._materialized) > limit:
+            lesson, _ = Lesson._materialized.popitem(last=False)
+            lesson._steps = None
+
+        return True
+
+    def release(self):
+        """Drops materialized steps, they will be rebuilt on next access."""
+        if self.stepDefinitions is None:
+            return
+
+        Lesson._materialized.pop(self, None)
+        self._steps = None
+
+    def _addStepFromDefinition(self, step):
+        if step.menu is not None:
+            # QGIS main menu interaction
+            self.addMenuStep(step.menu, step.name, step.description)
+        else:
+            # all other steps
+            if step.name is None or step.description is None:
+                raise KeyError('Step needs name and description')
+
+            self.addStep(step.name, step.description, step.prepare, step.execute, step.check)
+
     def addStep(self, name, description, prepDefinition=None, execDefinition=None, checkDefinition=None,
                 stepType=LessonStep.StepType.Manual):
         prepare = None
@@ -122,22 +302,28 @@ class Lesson:
         check = None
 
         parameters = dict()
+        background = dict()
+        speculative = False
         if prepDefinition is not None:
             prepare, p = self._findFunction(prepDefinition)
             parameters[LessonStep.FunctionType.Prepare] = p
+            background[LessonStep.FunctionType.Prepare] = self._runsInBackground(prepDefinition, prepare)
+            speculative = self._functionFlag(prepDefinition, 'speculative', isSideEffectFree(prepare))
 
         if execDefinition is not None:
             execute, p = self._findFunction(execDefinition)
             parameters[LessonStep.FunctionType.Execute] = p
+            background[LessonStep.FunctionType.Execute] = self._runsInBackground(execDefinition, execute)
 
         if checkDefinition is not None:
             check, p = self._findFunction(checkDefinition)
             parameters[LessonStep.FunctionType.Check] = p
+            background[LessonStep.FunctionType.Check] = self._runsInBackground(checkDefinition, check)
 
         description = self._findFile(description)
 
-        step = LessonStep(name, description, prepare, execute, check, parameters, stepType)
-        self.steps.append(step)
+        step = LessonStep(name, description, prepare, execute, check, parameters, stepType, background, speculative)
+        self._appendStep(step)
 
     def addMenuStep(self, menuString, name='', description=''):
         action, parentMenu = menuByName(menuString)
@@ -158,10 +344,21 @@ class Lesson:
 
         step = LessonStep(name, description, stepType=LessonStep.StepType.Menu)
         step.addSignalHandler(parentMenu.triggered, _actionTriggered)
-        self.steps.append(step)
+        self._appendStep(step)
+
+    def _appendStep(self, step):
+        if self._steps is None:
+            self.materialize()
+
+        step.lessonId = self.id
+        step.index = len(self._steps)
+        self._steps.append(step)
 
-    def addRecommendation(self, nameId, groupId):
-        self.recommended.append((nameId, groupId))
+    def addRecommendation(self, groupId, name):
+        self.recommended += ((sys.intern(groupId), sys.intern(name)),)
+
+    def recommendedIds(self):
+        return ['{}:{}'.format(groupId, name) for groupId, name in self.recommended]
 
     def setCleanupFunction(self, function):
         self.cleanup = function
@@ -173,115 +370,146 @@ class Lesson:
         if os.path.splitext(fileName)[1] != '.html':
             return fileName
 
-        for locale in [QgsApplication.locale(), 'en']:
-            # first look for a localized version and fallback
-            # to English in case of failure
-            if not os.path.exists(os.path.join(locale, fileName)):
-                path = os.path.join(self.root, locale, fileName)
-                if os.path.exists(path):
-                    return path
-
-        # lesson without i18n support, file located in the root
-        #return os.path.join(self.root, fileName)
-        return ''
+        # look for a localized version, falling back to more generic
+        # locales and finally to English
+        return self.resources.find(fileName, QgsApplication.locale())
 
     def _findFunction(self, definition):
         if isinstance(definition, dict):
             if 'params' in definition:
-                params = tuple(definition['params'])
+                params = tuple(definition['params']) or NO_PARAMETERS
             else:
-                params = tuple()
+                params = NO_PARAMETERS
 
             if definition['name'].startswith('functions.'):
                 functionName = definition['name'].split('.')[1]
                 function = getattr(importlib.import_module('lessons.functions'), functionName)
             else:
-                spec = importlib.util.spec_from_file_location('functions', os.path.join(self.root, 'functions.py'))
-                module = importlib.util.module_from_spec(spec)
-                spec.loader.exec_module(module)
-                function = getattr(module, definition['name'])
+                function = getattr(lessonFunctions(self.root), definition['name'])
 
             return function, params
         else:
-            return definition, tuple()
+            return definition, NO_PARAMETERS
+
+    def _runsInBackground(self, definition, function):
+        return self._functionFlag(definition, 'background', isBackgroundFunction(function))
+
+    def _functionFlag(self, definition, key, default):
+        # lesson.yaml keys override the function markers
+        if isinstance(definition, dict) and key in definition:
+            return bool(definition[key])
+
+        return default
 
     def tr(self, text):
         return QCoreApplication.translate('Lesson', text)
 
     @classmethod
     def fromYaml(cls, lessonFile):
-        locale = QgsApplication.locale()
+        definition = cls.definitionFromYaml(lessonFile, QgsApplication.locale())
+        return cls.fromDefinition(definition, lessonFile)
 
-        with open(lessonFile, encoding='utf-8') as f:
-            data = yaml.load(f)
-
-        name = data['lesson']['name']
-        groupId = data['lesson']['groupId']
-
-        if locale in data['lesson']:
-            definition = data['lesson'][locale]
-        else:
-            definition = data['lesson']['en']
+    @staticmethod
+    def definitionFromYaml(lessonFile, locale):
+        """Parses lesson.yaml into a plain, serializable lesson definition
+        for the given locale.
+        """
+        with lessonbundle.openText(lessonFile) as f:
+            return readDefinition(f, lessonFile, locale)
 
-        lesson = Lesson(name,
+    @classmethod
+    def fromDefinition(cls, definition, lessonFile):
+        lesson = Lesson(definition['name'],
                         definition['displayName'],
-                        groupId,
+                        definition['groupId'],
                         definition['group'],
                         definition['description'],
-                        os.path.abspath(os.path.dirname(lessonFile)))
-
-        # add lesson steps
-        for step in definition['steps']:
-            if 'menu' in step:
-                # QGIS main menu interaction
-                name = None
-                description = None
-                if 'name' in step:
-                    name = step['name']
-
-                if 'description' in step:
-                    description = step['description']
-
-                try:
-                    lesson.addMenuStep(step['menu'], name, description)
-                except Exception as e:
-                    logmessage = cls.tr('Can not load lesson from {}:\n{}'.format(lessonFile, traceback.format_exc()))
-                    QgsMessageLog.logMessage(logmessage, 'QLesson')
-                    return None
-            else:
-                # all other steps
-                prepare = None
-                execute = None
-                check = None
-
-                if 'prepare' in step:
-                    prepare = step['prepare']
-
-                if 'execute' in step:
-                    execute = step['execute']
-
-                if 'check' in step:
-                    check = step['check']
-
-                try:
-                    lesson.addStep(step['name'], step['description'],
-                                   prepare, execute, check)
-                except Exception as e:
-                    QgsMessageLog.logMessage(cls.tr('Can not load lesson from {}:\n{}'.format(lessonFile, traceback.format_exc())), 'QLesson')
-                    return None
+                        os.path.abspath(os.path.dirname(lessonFile)),
+                        definition['steps'])
 
         # add recommended lessons, if any
-        if 'recommended' in data['lesson']:
-            for r in data['lesson']['recommended']:
-                lesson.addRecommendation(r['groupId'], r['name'])
+        for r in definition['recommended']:
+            lesson.addRecommendation(r['groupId'], r['name'])
 
         return lesson
 
     @staticmethod
     def idFromYaml(lessonFile):
         with open(lessonFile, encoding='utf-8') as f:
-            data = yaml.load(f)
+            groupId, name = readLessonHeader(f)
+
+        if groupId is None or name is None:
+            return None
 
-        name = data['lesson']['name']
-        groupId = data['lesson']['groupId']
         return '{}:{}'.format(groupId, name)
+
+
+def readLessonHeader(stream):
+    """Reads lesson groupId and name from the YAML stream.
+
+    Uses YAML parser events and stops as soon as both keys of the top
+    level "lesson" mapping are found, so locales and steps are usually
+    never parsed. Documents using constructs the event reader does not
+    handle (aliases, complex keys, non-string values) are parsed in full
+    from the start of the stream, which must be seekable. Returns
+    (groupId, name), missing values are None.
+    """
+    header = dict()
+
+    # one entry per open collection: [isMapping, expectingKey, currentKey]
+    stack = list()
+    for event in yaml.parse(stream, Loader=YamlLoader):
+        if isinstance(event, yaml.AliasEvent):
+            return _readFullHeader(stream)
+        elif isinstance(event, (yaml.MappingStartEvent, yaml.SequenceStartEvent)):
+            if stack and stack[-1][0] and stack[-1][1]:
+                # a collection used as a mapping key
+                return _readFullHeader(stream)
+
+            stack.append([isinstance(event, yaml.MappingStartEvent), True, None])
+        elif isinstance(event, (yaml.MappingEndEvent, yaml.SequenceEndEvent)):
+            stack.pop()
+            if stack and stack[-1][0]:
+                stack[-1][1] = True
+        elif isinstance(event, yaml.ScalarEvent):
+            if not stack or not stack[-1][0]:
+                continue
+
+            top = stack[-1]
+            if top[1]:
+                top[1] = False
+                top[2] = event.value
+                continue
+
+            top[1] = True
+            if len(stack) == 2 and stack[0][2] == 'lesson' and top[2] in ('groupId', 'name'):
+                if _scalarTag(event) != 'tag:yaml.org,2002:str':
+                    # e.g. a number or a date, let the loader construct it
+                    return _readFullHeader(stream)
+
+                header[top[2]] = event.value
+                if len(header) == 2:
+                    break
+
+    return header.get('groupId'), header.get('name')
+
+
+# resolves the tag of plain scalars as the loader does
+_resolver = yaml.resolver.Resolver()
+
+
+def _scalarTag(event):
+    if event.tag is not None and event.tag != '!':
+        return event.tag
+
+    return _resolver.resolve(yaml.ScalarNode, event.value, event.implicit)
+
+
+def _readFullHeader(stream):
+    stream.seek(0)
+    definition = yaml.load(stream, Loader=YamlLoader)
+    lesson = definition.get('lesson') if isinstance(definition, dict) else None
+    if not isinstance(lesson, dict):
+        return None, None
+
+    return lesson.get('groupId'), lesson.get('name')
@@ -27,15 +27,16 @@ __revision__ = '$Format:%H$'
 
 import os
 
-from qgis.PyQt import uic
+from qgis.PyQt.QtWidgets import QDialog
 
-from . import lessonsRegistry
+from .lessonregistry import QLessonRegistry
+from .lesson_utils import loadUiForm
 
 pluginPath = current_dir = os.path.dirname(__file__)
-WIDGET, BASE = uic.loadUiType(os.path.join(pluginPath, 'lesson_finisheddialog.ui'))
+WIDGET = loadUiForm(os.path.join(pluginPath, 'lesson_finisheddialog.ui'))
 
 
-class LessonFinalizedDialog(BASE, WIDGET):
+class LessonFinalizedDialog(QDialog, WIDGET):
 
     def __init__(self, parent=None):
         super(LessonFinalizedDialog, self).__init__(parent)
@@ -45,27 +46,21 @@ class LessonFinalizedDialog(BASE, WIDGET):
 
         self.txtRecommendedLesson.anchorClicked.connect(self.selectRecommendedLesson)
 
-    def setRecommendedLesson(self, recommended):
+    def setFinishedLesson(self, finished):
         text = self.tr('<p><strong>Congratulations! You have successfully finished this lesson.</strong></p>'
                        '<p>Close this dialog to go back to the lessons library.</p>')
 
-        if recommended:
-            items = list()
-            for item in recommended:
-                lessonId = '{}:{}'.format(item[0], item[1])
-                lesson = lessonsRegistry.lessonById(lessonId)
-                if lesson:
-                    items.append('<li><a href="{}">{}</a></li>'.format(lessonId, lesson.displayName))
-
-            if items:
-                intro = self.tr('<p><strong>Congratulations! You have successfully finished this lesson.</strong></p>'
-                                '<p>The lesson\'s author(s) also recommend to complete following lessons:</p>')
-                final = self.tr('You can either close this dialog and go back to the '
-                                'lessons library or select one of the recommended lessons.')
-                text = '{}<ul>{}</ul>{}'.format(intro, ''.join(items), final)
+        nextLessons = QLessonRegistry().recommendationGraph().nextLessons(finished.id)
+        if nextLessons:
+            items = ['<li><a href="{}">{}</a></li>'.format(lesson.id, lesson.displayName) for lesson in nextLessons]
+            intro = self.tr('<p><strong>Congratulations! You have successfully finished this lesson.</strong></p>'
+                            '<p>The lesson\'s author(s) also recommend to complete following lessons:</p>')
+            final = self.tr('You can either close this dialog and go back to the '
+                            'lessons library or select one of the recommended lessons.')
+            text = '{}<ul>{}</ul>{}'.format(intro, ''.join(items), final)
 
         self.txtRecommendedLesson.setHtml(text)
 
     def selectRecommendedLesson(self, url):
-        self.lesson = lessonsRegistry.lessonById(url.toString())
+        self.lesson = QLessonRegistry().lessonById(url.toString())
         self.accept()
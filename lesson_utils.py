@@ -28,11 +28,28 @@ __copyright__ = '(C) 2023, Pascal Ogola'
 __revision__ = '$Format:%H$'
 
 import os
+import re
 import shutil
+import sys
+import inspect
 import tempfile
+import importlib.util
 
+from qgis.PyQt.QtCore import QObject, QEvent
 from qgis.utils import iface
 
+from . import lessonbundle
+from .lessondefinition import localeFallbacks
+
+# modules loaded from lessons functions.py files, keyed by lesson root
+_functionModules = dict()
+
+# shared index of the QGIS main window menus
+_menuIndex = None
+
+# names of lesson subdirectories holding localized files, e.g. en, pt_BR
+LOCALE_DIRECTORY = re.compile(r'^[a-z]{2,3}([_-][A-Za-z0-9]+)*$')
+
 
 def tempDirectory():
     tmpPath = os.path.join(tempfile.gettempdir(), 'qlesson')
@@ -47,24 +64,240 @@ def removeTemporaryFiles():
 
 
 def menuByName(menuString):
-    menu = None
-    action = None
+    return menuIndex().lookup(menuString)
+
+
+def menuIndex():
+    global _menuIndex
+    if _menuIndex is None:
+        _menuIndex = MenuIndex()
+
+    return _menuIndex
+
+
+def normalizeMenuPath(menuString):
+    return '|'.join(t.replace('&', '').strip() for t in menuString.split('|'))
+
+
+class MenuIndex(QObject):
+    """Index of the main window menus, maps normalized "Menu|Submenu|Action"
+    paths to (action, parent menu) tuples.
+
+    The index is built on first lookup and dropped whenever actions are
+    added to or removed from any indexed menu (e.g. plugins are loaded or
+    unloaded) or the language changes.
+    """
+
+    def __init__(self, parent=None):
+        super(MenuIndex, self).__init__(parent)
+        self._index = None
+
+    def lookup(self, menuString):
+        if self._index is None:
+            self._build()
+
+        return self._index.get(normalizeMenuPath(menuString), (None, None))
+
+    def unresolved(self, menuStrings):
+        """Returns those of the given menu paths which can not be found."""
+        return [m for m in menuStrings if self.lookup(m)[0] is None]
 
-    tokens = menuString.split('|')
-    actions = iface.mainWindow().menuBar().actions()
+    def invalidate(self):
+        self._index = None
 
-    for t in tokens:
-        for a in actions:
-            if a.text().replace('&', '') == t:
-                if a.menu():
-                    menu = a.menu()
-                    actions = menu.actions()
-                    break
-                else:
-                    action = a
+    def eventFilter(self, obj, event):
+        if event.type() in (QEvent.ActionAdded, QEvent.ActionRemoved, QEvent.LanguageChange):
+            self._index = None
 
-    return action, menu
+        return False
+
+    def _build(self):
+        self._index = dict()
+
+        menuBar = iface.mainWindow().menuBar()
+        menuBar.installEventFilter(self)
+        self._addActions(menuBar.actions(), '', None)
+
+    def _addActions(self, actions, prefix, parentMenu):
+        for action in actions:
+            text = action.text().replace('&', '').strip()
+            if not text:
+                continue
+
+            path = '{}|{}'.format(prefix, text) if prefix else text
+            menu = action.menu()
+            if menu is not None:
+                menu.installEventFilter(self)
+                self._addActions(menu.actions(), path, menu)
+            elif path not in self._index:
+                self._index[path] = (action, parentMenu)
+
+
+def loadUiForm(uiFile):
+    """Returns form class for the Designer file.
+
+    Uses the pregenerated ui_<name>.py module next to the .ui file and
+    compiles the .ui file at runtime only when it is newer than the
+    generated module (run "make compile" to regenerate).
+    """
+    directory, fileName = os.path.split(uiFile)
+    moduleName = 'ui_{}'.format(os.path.splitext(fileName)[0])
+    moduleFile = os.path.join(directory, '{}.py'.format(moduleName))
+
+    if os.path.isfile(moduleFile) and os.path.getmtime(moduleFile) >= os.path.getmtime(uiFile):
+        module = importlib.import_module('.{}'.format(moduleName), __package__)
+        for name in dir(module):
+            if name.startswith('Ui_'):
+                return getattr(module, name)
+
+    from qgis.PyQt import uic
+    formClass, _ = uic.loadUiType(uiFile)
+    return formClass
 
 
 def isLesson(dirName):
     return os.path.isdir(dirName) and os.path.isfile(os.path.join(dirName, 'lesson.yaml'))
+
+
+def isSafeArchivePath(name):
+    # archive members must stay inside the directory they are extracted to
+    parts = name.replace('\\', '/').split('/')
+    return not (name.startswith(('/', '\\')) or ':' in parts[0] or '..' in parts)
+
+
+def lessonFunctions(root):
+    """Returns module loaded from the functions.py in the lesson root.
+
+    The module is executed only once and reused for all step functions
+    of the lesson, until functions.py changes on disk.
+    """
+    filePath = os.path.join(root, 'functions.py')
+    bundle, member = lessonbundle.bundleForPath(filePath)
+    if bundle is None:
+        info = os.stat(filePath)
+        signature = (info.st_mtime_ns, info.st_size)
+    else:
+        signature = (bundle.mtime, member)
+
+    cached = _functionModules.get(root)
+    if cached is not None and cached[0] == signature:
+        return cached[1]
+
+    if bundle is None:
+        spec = importlib.util.spec_from_file_location('functions', filePath)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+    else:
+        # functions of mounted bundles are read straight from the archive
+        spec = importlib.util.spec_from_loader('functions', None, origin=filePath)
+        module = importlib.util.module_from_spec(spec)
+        module.__file__ = filePath
+        exec(compile(bundle.read(member), filePath, 'exec'), module.__dict__)
+
+    _functionModules[root] = (signature, module)
+    return module
+
+
+def runInBackground(function):
+    """Marks lesson function as thread-safe, so steps run it in a
+    background task instead of the main thread. Setting the function
+    "runInBackground" attribute to True has the same effect.
+    """
+    function.runInBackground = True
+    return function
+
+
+def sideEffectFree(function):
+    """Marks prepare function as free of side effects, so it may run
+    ahead of time while the previous step is still shown. Only thread-safe
+    functions are run ahead. Setting the function "sideEffectFree"
+    attribute to True has the same effect.
+    """
+    function.sideEffectFree = True
+    return function
+
+
+def isBackgroundFunction(function):
+    return getattr(function, 'runInBackground', False) is True
+
+
+def isSideEffectFree(function):
+    return getattr(function, 'sideEffectFree', False) is True
+
+
+def acceptsFeedback(function):
+    # background functions may report progress and check for
+    # cancellation through an optional "feedback" keyword argument
+    try:
+        parameters = inspect.signature(function).parameters
+    except (TypeError, ValueError):
+        return False
+
+    return 'feedback' in parameters
+
+
+def releaseLessonFunctions(root):
+    _functionModules.pop(root, None)
+
+
+class LessonResources:
+    """In-memory index of localized files of a single lesson.
+
+    Locale directories of the lesson root are scanned once, on first
+    lookup, into locale -> relative file path -> absolute path, so
+    resolving descriptions and assets needs no file system access.
+    """
+
+    __slots__ = ('root', '_index')
+
+    def __init__(self, root):
+        self.root = root
+        self._index = None
+
+    def find(self, fileName, locale):
+        """Returns absolute path of the localized file or an empty string."""
+        if self._index is None:
+            self._index = self._scan()
+
+        fileName = fileName.replace('\\', '/')
+        for candidate in localeFallbacks(locale):
+            path = self._index.get(candidate, dict()).get(fileName)
+            if path is not None:
+                return path
+
+        return ''
+
+    def _scan(self):
+        index = dict()
+        if self.root is None:
+            return index
+
+        bundle, member = lessonbundle.bundleForPath(self.root)
+        if bundle is not None:
+            return self._scanBundle(bundle, member)
+
+        if not os.path.isdir(self.root):
+            return index
+
+        for entry in os.scandir(self.root):
+            if not (entry.is_dir() and LOCALE_DIRECTORY.match(entry.name)):
+                continue
+
+            files = dict()
+            for directory, dirNames, fileNames in os.walk(entry.path):
+                for fileName in fileNames:
+                    path = os.path.join(directory, fileName)
+                    files[os.path.relpath(path, entry.path).replace(os.sep, '/')] = path
+
+            index[sys.intern(entry.name)] = files
+
+        return index
+
+    def _scanBundle(self, bundle, root):
+        index = dict()
+        for name in bundle.files(root):
+            parts = name[len(root) + 1:].split('/', 1)
+            if len(parts) == 2 and LOCALE_DIRECTORY.match(parts[0]):
+                index.setdefault(sys.intern(parts[0]), dict())[parts[1]] = bundle.filePath(name)
+
+        return index
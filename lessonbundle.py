@@ -0,0 +1,281 @@
+# -*- coding: utf-8 -*-
+"""
+/***************************************************************************
+lessonbundle.py
+    ---------------------
+        Date                 : 2023-07-07
+        git sha              : $Format:%H$
+        copyright            : (C) 2023 by Pascal Ogola
+        email                : passies95@gmail.com
+ ***************************************************************************/
+
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+"""
+
+__author__ = 'Pascal Ogola'
+__date__ = 'July 2023'
+__copyright__ = '(C) 2023, Pascal Ogola'
+
+# This will get replaced with a git SHA1 when you do a git archive
+
+__revision__ = '$Format:%H$'
+
+import io
+import os
+import mmap
+import shutil
+import hashlib
+import zipfile
+import threading
+
+from qgis.core import QgsApplication
+
+# mounted bundles by absolute path of the archive
+_bundles = dict()
+_bundlesLock = threading.Lock()
+
+
+def bundlesDirectory():
+    """Directory holding project data extracted from mounted bundles."""
+    return os.path.join(QgsApplication.qgisSettingsDirPath(), 'qlesson', 'bundles')
+
+
+def extractDirectory(archivePath):
+    """Directory holding project data extracted from the archive, with
+    one subdirectory per archive modification time.
+    """
+    key = hashlib.sha1(os.path.abspath(archivePath).encode('utf-8')).hexdigest()
+    return os.path.join(bundlesDirectory(), key)
+
+
+def mountBundle(archivePath):
+    """Opens the ZIP archive as a lesson bundle, or returns the already
+    mounted one. Raises OSError or zipfile.BadZipFile if the archive can
+    not be read.
+    """
+    archivePath = os.path.abspath(archivePath)
+    with _bundlesLock:
+        bundle = _bundles.get(archivePath)
+        if bundle is None:
+            bundle = _bundles[archivePath] = LessonBundle(archivePath)
+
+    return bundle
+
+
+def unmountBundle(archivePath, removeExtracted=False):
+    with _bundlesLock:
+        bundle = _bundles.pop(os.path.abspath(archivePath), None)
+
+    if bundle is not None:
+        bundle.close()
+
+    if removeExtracted:
+        shutil.rmtree(extractDirectory(archivePath), True)
+
+
+def bundleForPath(path):
+    """Returns (bundle, member) if path points into a mounted bundle,
+    (None, None) otherwise. Member is the path inside the archive, with
+    forward slashes, or an empty string for the archive itself.
+    """
+    path = os.path.abspath(path)
+    with _bundlesLock:
+        bundles = list(_bundles.values())
+
+    for bundle in bundles:
+        if path == bundle.path:
+            return bundle, ''
+        if path.startswith(bundle.prefix):
+            return bundle, path[len(bundle.prefix):].replace(os.sep, '/')
+
+    return None, None
+
+
+def isBundlePath(path):
+    return bundleForPath(path)[0] is not None
+
+
+def isFile(path):
+    bundle, member = bundleForPath(path)
+    if bundle is None:
+        return os.path.isfile(path)
+
+    return bundle.isFile(member)
+
+
+def exists(path):
+    bundle, member = bundleForPath(path)
+    if bundle is None:
+        return os.path.exists(path)
+
+    return bundle.isFile(member) or bundle.isDir(member)
+
+
+def readBytes(path):
+    bundle, member = bundleForPath(path)
+    if bundle is None:
+        with open(path, 'rb') as f:
+            return f.read()
+
+    return bundle.read(member)
+
+
+def openText(path, encoding='utf-8'):
+    bundle, member = bundleForPath(path)
+    if bundle is None:
+        return open(path, encoding=encoding)
+
+    return io.TextIOWrapper(io.BytesIO(bundle.read(member)), encoding=encoding)
+
+
+def modificationTime(path):
+    """Returns modification time in ns, members of a bundle change only
+    together with the archive.
+    """
+    bundle, member = bundleForPath(path)
+    if bundle is None:
+        return os.stat(path).st_mtime_ns
+
+    if not bundle.isFile(member):
+        raise FileNotFoundError(path)
+
+    return bundle.mtime
+
+
+def localPath(path):
+    """Returns path of the file or directory on disk. Directories of
+    mounted bundles are extracted on first use.
+    """
+    bundle, member = bundleForPath(path)
+    if bundle is None:
+        return path
+
+    if bundle.isFile(member):
+        directory, fileName = member.rsplit('/', 1) if '/' in member else ('', member)
+        return os.path.join(bundle.extract(directory), fileName)
+
+    return bundle.extract(member)
+
+
+class _MappedArchive(mmap.mmap):
+    # ZipFile asks its file object whether it is seekable
+    def seekable(self):
+        return True
+
+
+class LessonBundle:
+    """Read-only view of the lessons in a ZIP archive.
+
+    The archive is memory mapped and only its central directory is read
+    when it is mounted, members are decompressed on access. Paths inside
+    the bundle are written as if the archive were a directory, e.g.
+    /path/lessons.zip/group/lesson/lesson.yaml.
+    """
+
+    def __init__(self, archivePath):
+        self.path = os.path.abspath(archivePath)
+        self.prefix = os.path.join(self.path, '')
+        self.mtime = os.stat(self.path).st_mtime_ns
+
+        self._file = open(self.path, 'rb')
+        try:
+            self._map = _MappedArchive(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            # empty files and some file systems can not be mapped
+            self._map = None
+
+        try:
+            self.zip = zipfile.ZipFile(self._map if self._map is not None else self._file)
+        except Exception:
+            self.close()
+            raise
+
+        self._members = dict()
+        self._directories = {''}
+        for info in self.zip.infolist():
+            name = info.filename.rstrip('/')
+            if info.is_dir():
+                self._directories.add(name)
+            else:
+                self._members[name] = info
+
+            parts = name.split('/')
+            for i in range(1, len(parts)):
+                self._directories.add('/'.join(parts[:i]))
+
+        self._lock = threading.Lock()
+        self._extracted = dict()
+
+    def filePath(self, member):
+        return os.path.join(self.path, *member.split('/')) if member else self.path
+
+    def isFile(self, member):
+        return member in self._members
+
+    def isDir(self, member):
+        return member in self._directories
+
+    def files(self, directory):
+        """Returns members below the directory, at any depth."""
+        prefix = '{}/'.format(directory) if directory else ''
+        return [name for name in self._members if name.startswith(prefix)]
+
+    def read(self, member):
+        info = self._members.get(member)
+        if info is None:
+            raise FileNotFoundError(self.filePath(member))
+
+        # ZipFile shares a single file position between readers
+        with self._lock:
+            return self.zip.read(info)
+
+    def extract(self, directory):
+        """Extracts members below the directory once and returns path of
+        the extracted directory.
+        """
+        with self._lock:
+            target = self._extracted.get(directory)
+            if target is not None:
+                return target
+
+            target = os.path.join(extractDirectory(self.path), str(self.mtime), *directory.split('/'))
+            marker = '{}.complete'.format(target)
+            if not os.path.exists(marker):
+                # extract next to the target and rename, so that an
+                # interrupted extraction is never taken for a complete one
+                partial = '{}.partial'.format(target)
+                shutil.rmtree(partial, True)
+                prefix = '{}/'.format(directory) if directory else ''
+                for name, info in self._members.items():
+                    if not name.startswith(prefix):
+                        continue
+
+                    path = os.path.join(partial, *name[len(prefix):].split('/'))
+                    os.makedirs(os.path.dirname(path), exist_ok=True)
+                    with self.zip.open(info) as src, open(path, 'wb') as dst:
+                        shutil.copyfileobj(src, dst, 1024 * 1024)
+
+                os.makedirs(partial, exist_ok=True)
+                shutil.rmtree(target, True)
+                os.rename(partial, target)
+                with open(marker, 'w'):
+                    pass
+
+            self._extracted[directory] = target
+            return target
+
+    def close(self):
+        if getattr(self, 'zip', None) is not None:
+            self.zip.close()
+            self.zip = None
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        self._file.close()
@@ -0,0 +1,350 @@
+# -*- coding: utf-8 -*-
+"""
+/***************************************************************************
+lessoncatalog.py
+    ---------------------
+        Date                 : 2023-07-07
+        git sha              : $Format:%H$
+        copyright            : (C) 2023 by Pascal Ogola
+        email                : passies95@gmail.com
+ ***************************************************************************/
+
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+"""
+
+__author__ = 'Pascal Ogola'
+__date__ = 'July 2023'
+__copyright__ = '(C) 2023, Pascal Ogola'
+
+# This will get replaced with a git SHA1 when you do a git archive
+
+__revision__ = '$Format:%H$'
+
+import os
+import sys
+import json
+import sqlite3
+import threading
+import traceback
+import multiprocessing
+from contextlib import closing
+from itertools import repeat
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from qgis.core import QgsApplication, QgsMessageLog
+
+from .lessondefinition import parseLessonFile
+
+# bump when the catalog schema or the stored lesson definitions change
+CATALOG_VERSION = 4
+
+# below this number of changed lessons starting worker processes
+# costs more than parsing in place: a spawned worker takes about 55 ms
+# to start, a lesson about 1.1 ms to parse, so two workers need some
+# 200 lessons to break even
+MIN_PARALLEL_LESSONS = 200
+
+
+def catalogFilePath():
+    return os.path.join(QgsApplication.qgisSettingsDirPath(), 'qlesson', 'catalog.sqlite')
+
+
+def canUseProcesses():
+    # spawned workers start sys.executable, which inside QGIS is often
+    # the QGIS binary rather than a Python interpreter
+    return os.path.basename(sys.executable).lower().startswith('python')
+
+
+def parseLessonFiles(lessonFiles, locale, workers=1):
+    """Yields (lessonFile, definition, error) for each file, in order.
+
+    With more than one worker, files are parsed in a process pool. If the
+    pool can not be used parsing falls back to the current process.
+    """
+    done = 0
+    if workers > 1 and len(lessonFiles) >= MIN_PARALLEL_LESSONS and canUseProcesses():
+        pool = None
+        try:
+            # never fork, parsing runs in a task thread of the multi
+            # threaded QGIS process and forked children could inherit
+            # locks held by other threads
+            pool = ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context('spawn'))
+            chunkSize = max(1, len(lessonFiles) // (workers * 8))
+            for result in pool.map(parseLessonFile, lessonFiles, repeat(locale), chunksize=chunkSize):
+                done += 1
+                yield result
+        except (OSError, BrokenProcessPool):
+            QgsMessageLog.logMessage('Parallel lesson parsing failed, continuing sequentially:\n{}'.format(traceback.format_exc()), 'QLesson')
+        finally:
+            if pool is not None:
+                pool.shutdown(wait=False, cancel_futures=True)
+
+    for lessonFile in lessonFiles[done:]:
+        yield parseLessonFile(lessonFile, locale)
+
+
+class LessonCatalog:
+    """Persistent SQLite catalog of parsed lessons.
+
+    Every lesson.yaml seen during a scan of the lesson paths has one row
+    per locale holding lesson id, group, display name, locale, root
+    directory, file mtime and size, recommendations and the full lesson
+    definition. Rows are only reused while the file mtime, size and
+    requested locale match, so unchanged lessons never go
+    through PyYAML, and the library of the last session can be restored
+    with a single query, without touching the file system.
+    """
+
+    def __init__(self, catalogFile=None):
+        if catalogFile is None:
+            catalogFile = catalogFilePath()
+            # catalog replaces the JSON lesson cache
+            oldCache = os.path.join(os.path.dirname(catalogFile), 'lessoncache.json')
+            if os.path.isfile(oldCache):
+                os.remove(oldCache)
+
+        self.catalogFile = catalogFile
+        self.entries = None
+        self.hits = 0
+        self.misses = 0
+        # lesson files parsed since statistics were reset
+        self.parsed = set()
+
+        self._used = set()
+        self._modified = set()
+        self._removed = set()
+        self._position = 0
+        self._initialized = False
+        # catalog is also used by the background lesson loader
+        self._lock = threading.RLock()
+
+    def lessons(self, locale, lessonPaths):
+        """Returns (lessonFile, definition) pairs of catalogued lessons
+        under the given lesson paths, in the order they were discovered.
+        """
+        if not lessonPaths or not os.path.isfile(self.catalogFile):
+            return list()
+
+        userPaths = [os.path.abspath(p) for p in lessonPaths[1:]]
+        sql = ('SELECT file, definition FROM lessons WHERE locale = ? AND '
+               '(container = ? OR parent IN ({})) ORDER BY position'.format(', '.join('?' * len(userPaths))))
+        try:
+            with self._lock, closing(self._connect()) as connection:
+                rows = connection.execute(sql, [locale, os.path.abspath(lessonPaths[0])] + userPaths).fetchall()
+        except sqlite3.Error:
+            QgsMessageLog.logMessage('Can not read lesson catalog {}:\n{}'.format(self.catalogFile, traceback.format_exc()), 'QLesson')
+            return list()
+
+        return [(lessonFile, json.loads(definition)) for lessonFile, definition in rows]
+
+    def load(self):
+        with self._lock:
+            self.entries = dict()
+            self._used = set()
+            self._modified = set()
+            self._removed = set()
+            self._position = 0
+
+            if not os.path.isfile(self.catalogFile):
+                return
+
+            try:
+                with closing(self._connect()) as connection:
+                    rows = connection.execute('SELECT file, locale, mtime, size, position, definition FROM lessons').fetchall()
+            except sqlite3.Error:
+                QgsMessageLog.logMessage('Can not read lesson catalog {}, it will be rebuilt.'.format(self.catalogFile), 'QLesson')
+                return
+
+            for lessonFile, locale, mtime, size, position, definition in rows:
+                self.entries[(lessonFile, locale)] = {'mtime': mtime,
+                                                      'size': size,
+                                                      'position': position,
+                                                      'definition': json.loads(definition)
+                                                     }
+
+    def save(self, prune=False):
+        """Writes changed lessons to the catalog. With prune, lessons which
+        were not seen since the catalog was loaded are dropped, use it only
+        after all lesson paths were scanned.
+        """
+        with self._lock:
+            if self.entries is None:
+                return
+
+            if prune:
+                # rows of other locales are kept for files still in use
+                stale = {key for key in self.entries if key[0] not in self._used}
+                for key in stale:
+                    del self.entries[key]
+                self._removed.update(stale)
+
+            changed = [key for key in self._modified if key in self.entries]
+            if not (changed or self._removed):
+                return
+
+            try:
+                with closing(self._connect()) as connection, connection:
+                    connection.executemany('DELETE FROM lessons WHERE file = ? AND locale = ?', self._removed)
+                    connection.executemany('INSERT OR REPLACE INTO lessons VALUES '
+                                           '(?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                                           [self._row(key) for key in changed])
+            except (OSError, sqlite3.Error):
+                QgsMessageLog.logMessage('Can not write lesson catalog {}:\n{}'.format(self.catalogFile, traceback.format_exc()), 'QLesson')
+                return
+
+            self._modified = set()
+            self._removed = set()
+
+    def remove(self, lessonFiles):
+        """Drops the given lesson files, in all locales, from the catalog
+        on next save.
+        """
+        lessonFiles = {os.path.abspath(f) for f in lessonFiles}
+        with self._lock:
+            self._ensureLoaded()
+            for key in [key for key in self.entries if key[0] in lessonFiles]:
+                del self.entries[key]
+                self._removed.add(key)
+
+    def definition(self, lessonFile, locale):
+        """Returns lesson definition for the given lesson.yaml, parsing
+        the file only when it is not in the catalog or has changed.
+        """
+        lessonFile, definition, error = next(self.definitions([lessonFile], locale))
+        if error is not None:
+            raise ValueError(error)
+
+        return definition
+
+    def definitions(self, lessonFiles, locale, workers=1):
+        """Yields (lessonFile, definition, error) for each of the given
+        lesson.yaml files, in order. Only new or changed files are parsed,
+        using up to workers processes.
+        """
+        lessonFiles = list(dict.fromkeys(os.path.abspath(f) for f in lessonFiles))
+
+        cached = dict()
+        infos = dict()
+        missing = dict()
+        positions = dict()
+        with self._lock:
+            self._ensureLoaded()
+            for lessonFile in lessonFiles:
+                try:
+                    info = infos[lessonFile] = os.stat(lessonFile)
+                except OSError:
+                    # lesson was removed after it was discovered
+                    missing[lessonFile] = traceback.format_exc()
+                    continue
+
+                self._used.add(lessonFile)
+                positions[lessonFile] = self._position
+                self._position += 1
+
+                entry = self.entries.get((lessonFile, locale))
+                if entry is not None and entry['mtime'] == info.st_mtime_ns and entry['size'] == info.st_size:
+                    cached[lessonFile] = entry['definition']
+                    if entry['position'] != positions[lessonFile]:
+                        entry['position'] = positions[lessonFile]
+                        self._modified.add((lessonFile, locale))
+
+            self.hits += len(cached)
+            self.misses += len(infos) - len(cached)
+
+        parsed = parseLessonFiles([f for f in infos if f not in cached], locale, workers)
+        for lessonFile in lessonFiles:
+            if lessonFile in missing:
+                yield lessonFile, None, missing[lessonFile]
+                continue
+
+            if lessonFile in cached:
+                yield lessonFile, cached[lessonFile], None
+                continue
+
+            # misses are parsed in the same order they are requested
+            lessonFile, definition, error = next(parsed)
+            if definition is not None:
+                info = infos[lessonFile]
+                with self._lock:
+                    self.entries[(lessonFile, locale)] = {'mtime': info.st_mtime_ns,
+                                                          'size': info.st_size,
+                                                          'position': positions[lessonFile],
+                                                          'definition': definition
+                                                         }
+                    self._modified.add((lessonFile, locale))
+                    self.parsed.add(lessonFile)
+
+            yield lessonFile, definition, error
+
+    def resetStatistics(self):
+        """Starts a new scan of the lesson paths."""
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
+            self.parsed = set()
+            self._used = set()
+            self._position = 0
+
+    def statistics(self):
+        return self.hits, self.misses
+
+    def _ensureLoaded(self):
+        if self.entries is None:
+            self.load()
+
+    def _row(self, key):
+        lessonFile, locale = key
+        entry = self.entries[key]
+        definition = entry['definition']
+        root = os.path.dirname(lessonFile)
+        container = os.path.dirname(root)
+        return (lessonFile,
+                '{}:{}'.format(definition['groupId'], definition['name']),
+                definition['groupId'],
+                definition['name'],
+                definition['displayName'],
+                definition['group'],
+                locale,
+                root,
+                container,
+                os.path.dirname(container),
+                entry['mtime'],
+                entry['size'],
+                entry['position'],
+                json.dumps(definition['recommended'], default=str),
+                json.dumps(definition, default=str))
+
+    def _connect(self):
+        # connections are not shared, the catalog is used from several threads
+        if not self._initialized:
+            directory = os.path.dirname(self.catalogFile)
+            if not os.path.exists(directory):
+                os.makedirs(directory)
+
+        connection = sqlite3.connect(self.catalogFile)
+        if not self._initialized:
+            version = connection.execute('PRAGMA user_version').fetchone()[0]
+            with connection:
+                if version != CATALOG_VERSION:
+                    connection.execute('DROP TABLE IF EXISTS lessons')
+                connection.execute('CREATE TABLE IF NOT EXISTS lessons (file TEXT NOT NULL, '
+                                   'lessonId TEXT NOT NULL, groupId TEXT NOT NULL, name TEXT NOT NULL, '
+                                   'displayName TEXT, groupName TEXT, locale TEXT NOT NULL, '
+                                   'root TEXT NOT NULL, container TEXT NOT NULL, parent TEXT NOT NULL, '
+                                   'mtime INTEGER NOT NULL, size INTEGER NOT NULL, position INTEGER NOT NULL, '
+                                   'recommended TEXT, definition TEXT NOT NULL, PRIMARY KEY (file, locale))')
+                connection.execute('CREATE INDEX IF NOT EXISTS lessons_container ON lessons (locale, container)')
+                connection.execute('CREATE INDEX IF NOT EXISTS lessons_parent ON lessons (locale, parent)')
+                connection.execute('CREATE INDEX IF NOT EXISTS lessons_id ON lessons (lessonId)')
+                connection.execute('PRAGMA user_version = {}'.format(CATALOG_VERSION))
+            self._initialized = True
+
+        return connection
@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+"""
+/***************************************************************************
+lessondefinition.py
+    ---------------------
+        Date                 : 2023-07-07
+        git sha              : $Format:%H$
+        copyright            : (C) 2023 by Pascal Ogola
+        email                : passies95@gmail.com
+ ***************************************************************************/
+
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+"""
+
+__author__ = 'Pascal Ogola'
+__date__ = 'July 2023'
+__copyright__ = '(C) 2023, Pascal Ogola'
+
+# This will get replaced with a git SHA1 when you do a git archive
+
+__revision__ = '$Format:%H$'
+
+# lesson.yaml files are parsed here, also in worker processes of the
+# lesson catalog, so only yaml is imported and spawned workers start
+# without loading QGIS or the rest of the plugin
+
+import re
+import traceback
+
+import yaml
+
+# use libyaml bindings when available
+YamlLoader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+
+
+def localeFallbacks(locale):
+    """Returns locales to try in order, e.g. pt_BR -> pt -> en."""
+    locales = list()
+    if locale:
+        parts = re.split('[_-]', locale)
+        for i in range(len(parts), 0, -1):
+            locales.append('_'.join(parts[:i]))
+
+    if 'en' not in locales:
+        locales.append('en')
+
+    return locales
+
+
+def readDefinition(stream, lessonFile, locale):
+    """Parses lesson.yaml from the stream into a plain, serializable
+    lesson definition for the given locale.
+    """
+    data = yaml.load(stream, Loader=YamlLoader)
+
+    for candidate in localeFallbacks(locale):
+        if candidate in data['lesson']:
+            definition = data['lesson'][candidate]
+            break
+    else:
+        raise KeyError('Lesson {} has no definition for locale {}'.format(lessonFile, locale))
+
+    return {'name': data['lesson']['name'],
+            'groupId': data['lesson']['groupId'],
+            'displayName': definition['displayName'],
+            'group': definition['group'],
+            'description': definition['description'],
+            'steps': definition['steps'],
+            'recommended': data['lesson'].get('recommended', [])
+           }
+
+
+def parseLessonFile(lessonFile, locale):
+    # runs in worker processes, so return only plain picklable data
+    try:
+        with open(lessonFile, encoding='utf-8') as f:
+            return lessonFile, readDefinition(f, lessonFile, locale), None
+    except Exception:
+        return lessonFile, None, traceback.format_exc()
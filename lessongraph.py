@@ -0,0 +1,215 @@
+# -*- coding: utf-8 -*-
+"""
+/***************************************************************************
+lessongraph.py
+    ---------------------
+        Date                 : 2023-07-07
+        git sha              : $Format:%H$
+        copyright            : (C) 2023 by Pascal Ogola
+        email                : passies95@gmail.com
+ ***************************************************************************/
+
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+"""
+
+__author__ = 'Pascal Ogola'
+__date__ = 'July 2023'
+__copyright__ = '(C) 2023, Pascal Ogola'
+
+# This will get replaced with a git SHA1 when you do a git archive
+
+__revision__ = '$Format:%H$'
+
+from collections import deque
+
+
+class RecommendationGraph:
+    """Directed acyclic graph of lesson recommendations.
+
+    An edge goes from a lesson to every loaded lesson it recommends.
+    Recommendations of lessons which are not loaded are kept as dangling
+    references. Edges closing a cycle, including a lesson recommending
+    itself, are ignored, so the graph can always be ordered. Edges
+    follow registry changes, topological order is recomputed on first
+    use after a change.
+    """
+
+    def __init__(self, registry):
+        self.registry = registry
+
+        # lesson id -> ids of recommended lessons, and the reverse
+        self._next = dict()
+        self._previous = dict()
+        # lesson id -> ids of recommended lessons which are not loaded
+        self.dangling = dict()
+
+        # set of (lessonId, recommendedId) edges left out to break cycles
+        self._cyclic = None
+        # lesson id -> position in topological order
+        self._order = None
+
+        self._addEdges(registry.lessons.values())
+
+        registry.signals.lessonsAdded.connect(self.addLessons)
+        registry.signals.lessonsRemoved.connect(self.removeLessons)
+
+    def addLessons(self, lessons):
+        for lesson in lessons:
+            # lessons which recommend the new one have a dangling
+            # reference to it so far
+            for lessonId in self.registry.recommendedBy.get(lesson.id, ()):
+                if lessonId in self._next:
+                    self._discard(self.dangling, lessonId, lesson.id)
+                    self._link(lessonId, lesson.id)
+
+        self._addEdges(lessons)
+        self._invalidate()
+
+    def removeLessons(self, lessons):
+        for lesson in lessons:
+            for recommendedId in self._next.pop(lesson.id, ()):
+                self._discard(self._previous, recommendedId, lesson.id)
+            self.dangling.pop(lesson.id, None)
+
+            for lessonId in self._previous.pop(lesson.id, ()):
+                self._discard(self._next, lessonId, lesson.id, keepEmpty=True)
+                self.dangling.setdefault(lessonId, list()).append(lesson.id)
+
+        self._invalidate()
+
+    def nextLessons(self, lessonId):
+        """Returns lessons recommended after the given one."""
+        cyclic = self._cyclicEdges()
+        return self._lessons(i for i in self._next.get(lessonId, ()) if (lessonId, i) not in cyclic)
+
+    def prerequisites(self, lessonId):
+        """Returns lessons which recommend the given one."""
+        cyclic = self._cyclicEdges()
+        return self._lessons(i for i in self._previous.get(lessonId, ()) if (i, lessonId) not in cyclic)
+
+    def learningPath(self, lessonId):
+        """Returns all lessons leading to the given one, directly or
+        through other lessons, followed by the lesson itself, in an order
+        in which they can be completed.
+        """
+        if lessonId not in self._next:
+            return list()
+
+        cyclic = self._cyclicEdges()
+        ancestors = {lessonId}
+        queue = deque([lessonId])
+        while queue:
+            currentId = queue.popleft()
+            for previousId in self._previous.get(currentId, ()):
+                if previousId not in ancestors and (previousId, currentId) not in cyclic:
+                    ancestors.add(previousId)
+                    queue.append(previousId)
+
+        order = self.order()
+        return self._lessons(sorted(ancestors, key=order.get))
+
+    def order(self):
+        """Returns dict with position of every lesson id in topological
+        order of the graph.
+        """
+        if self._order is None:
+            self._sort()
+
+        return self._order
+
+    def cycles(self):
+        """Returns list of (lessonId, recommendedId) recommendations which
+        close a cycle and are ignored.
+        """
+        return sorted(self._cyclicEdges())
+
+    def problems(self):
+        """Returns list of human readable descriptions of dangling and
+        cyclic recommendations.
+        """
+        messages = ['{} → {} (not loaded)'.format(lessonId, ', '.join(missing))
+                    for lessonId, missing in sorted(self.dangling.items())]
+        messages.extend('{} → {} (cycle)'.format(lessonId, recommendedId)
+                        for lessonId, recommendedId in self.cycles())
+        return messages
+
+    def _addEdges(self, lessons):
+        for lesson in lessons:
+            self._next.setdefault(lesson.id, list())
+            for recommendedId in lesson.recommendedIds():
+                if recommendedId in self.registry.lessons:
+                    self._link(lesson.id, recommendedId)
+                else:
+                    self.dangling.setdefault(lesson.id, list()).append(recommendedId)
+
+    def _link(self, lessonId, recommendedId):
+        if recommendedId not in self._next[lessonId]:
+            self._next[lessonId].append(recommendedId)
+            self._previous.setdefault(recommendedId, list()).append(lessonId)
+
+    def _discard(self, index, key, value, keepEmpty=False):
+        values = index.get(key)
+        if values is not None and value in values:
+            values.remove(value)
+            if not values and not keepEmpty:
+                del index[key]
+
+    def _invalidate(self):
+        self._order = None
+        self._cyclic = None
+
+    def _cyclicEdges(self):
+        if self._cyclic is None:
+            self._sort()
+
+        return self._cyclic
+
+    def _sort(self):
+        # iterative depth first search, library can be too deep for
+        # recursion, edges to a lesson still on the stack close a cycle
+        visiting = set()
+        finished = list()
+        done = set()
+        cyclic = set()
+        for start in self._next:
+            if start in done:
+                continue
+
+            visiting.add(start)
+            stack = [(start, iter(self._next[start]))]
+            while stack:
+                lessonId, edges = stack[-1]
+                for recommendedId in edges:
+                    if recommendedId in visiting:
+                        cyclic.add((lessonId, recommendedId))
+                    elif recommendedId not in done:
+                        visiting.add(recommendedId)
+                        stack.append((recommendedId, iter(self._next[recommendedId])))
+                        break
+                else:
+                    stack.pop()
+                    visiting.discard(lessonId)
+                    done.add(lessonId)
+                    finished.append(lessonId)
+
+        # reversed post order is a topological order once the cyclic
+        # edges are left out
+        finished.reverse()
+        self._order = {lessonId: i for i, lessonId in enumerate(finished)}
+        self._cyclic = cyclic
+
+    def _lessons(self, lessonIds):
+        lessons = list()
+        for lessonId in lessonIds:
+            lesson = self.registry.lessonById(lessonId)
+            if lesson is not None:
+                lessons.append(lesson)
+
+        return lessons
@@ -0,0 +1,334 @@
+# -*- coding: utf-8 -*-
+"""
+/***************************************************************************
+lessonlibrarymodel.py
+    ---------------------
+        Date                 : 2023-07-07
+        git sha              : $Format:%H$
+        copyright            : (C) 2023 by Pascal Ogola
+        email                : passies95@gmail.com
+ ***************************************************************************/
+
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+"""
+
+__author__ = 'Pascal Ogola'
+__date__ = 'July 2023'
+__copyright__ = '(C) 2023, Pascal Ogola'
+
+# This will get replaced with a git SHA1 when you do a git archive
+
+__revision__ = '$Format:%H$'
+
+from qgis.PyQt.QtCore import Qt, QAbstractItemModel, QModelIndex
+
+
+class _GroupNode:
+
+    def __init__(self, groupId, row):
+        self.groupId = groupId
+        # row of the group in the model
+        self.row = row
+        # ids of all lessons in the group, only the first "fetched"
+        # of them are exposed as rows
+        self.lessons = list()
+        # lesson id -> position in lessons
+        self.rows = dict()
+        self.fetched = 0
+        self.expanded = False
+
+    def append(self, lessonId):
+        self.rows[lessonId] = len(self.lessons)
+        self.lessons.append(lessonId)
+
+    def extend(self, lessonIds):
+        for lessonId in lessonIds:
+            self.append(lessonId)
+
+    def reindex(self):
+        self.rows = {lessonId: row for row, lessonId in enumerate(self.lessons)}
+
+
+def _ranges(rows):
+    """Yields (first, last) of runs of consecutive rows, last run first,
+    so that rows can be removed without shifting the remaining runs.
+    """
+    rows = sorted(rows, reverse=True)
+    i = 0
+    while i < len(rows):
+        last = first = rows[i]
+        i += 1
+        while i < len(rows) and rows[i] == first - 1:
+            first = rows[i]
+            i += 1
+        yield first, last
+
+
+class LessonLibraryModel(QAbstractItemModel):
+    """Two level model (groups and lessons) over the lesson registry.
+
+    Lesson rows are created only when a group is expanded, in batches
+    of FETCH_BATCH, and the model follows registry changes with row
+    inserts and removals instead of resets.
+
+    With search results set, only the matching lessons are shown, in
+    the order of the results.
+    """
+
+    GroupItem = 0
+    LessonItem = 1
+
+    ItemTypeRole = Qt.UserRole + 1
+
+    FETCH_BATCH = 256
+
+    def __init__(self, registry, iconCollapsed, iconExpanded, iconLesson, parent=None):
+        super(LessonLibraryModel, self).__init__(parent)
+
+        self.registry = registry
+        self.iconCollapsed = iconCollapsed
+        self.iconExpanded = iconExpanded
+        self.iconLesson = iconLesson
+
+        self._groups = list()
+        self._groupNodes = dict()
+        self._fetching = False
+        self._filtered = False
+
+        self._populate()
+
+        registry.signals.lessonsAdded.connect(self.addLessons)
+        registry.signals.lessonsRemoved.connect(self.removeLessons)
+
+    def index(self, row, column, parent=QModelIndex()):
+        if not self.hasIndex(row, column, parent):
+            return QModelIndex()
+
+        if not parent.isValid():
+            return self.createIndex(row, column)
+
+        return self.createIndex(row, column, self._groups[parent.row()])
+
+    def parent(self, index):
+        if not index.isValid():
+            return QModelIndex()
+
+        node = index.internalPointer()
+        if node is None:
+            return QModelIndex()
+
+        return self.createIndex(node.row, 0)
+
+    def rowCount(self, parent=QModelIndex()):
+        if not parent.isValid():
+            return len(self._groups)
+
+        if parent.internalPointer() is None:
+            return self._groups[parent.row()].fetched
+
+        return 0
+
+    def columnCount(self, parent=QModelIndex()):
+        return 1
+
+    def hasChildren(self, parent=QModelIndex()):
+        if not parent.isValid():
+            return len(self._groups) > 0
+
+        if parent.internalPointer() is None:
+            return len(self._groups[parent.row()].lessons) > 0
+
+        return False
+
+    def canFetchMore(self, parent):
+        node = self._groupNode(parent)
+        return node is not None and not self._fetching and node.fetched < len(node.lessons)
+
+    def fetchMore(self, parent):
+        node = self._groupNode(parent)
+        # views may call fetchMore() again while rows are being inserted
+        if node is None or self._fetching:
+            return
+
+        count = min(self.FETCH_BATCH, len(node.lessons) - node.fetched)
+        if count <= 0:
+            return
+
+        self._fetching = True
+        self.beginInsertRows(parent, node.fetched, node.fetched + count - 1)
+        node.fetched += count
+        self.endInsertRows()
+        self._fetching = False
+
+    def flags(self, index):
+        if not index.isValid():
+            return Qt.NoItemFlags
+
+        return Qt.ItemIsEnabled | Qt.ItemIsSelectable
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+
+        node = index.internalPointer()
+        if node is None:
+            node = self._groups[index.row()]
+            if role == Qt.DisplayRole:
+                return self.registry.groups.get(node.groupId)
+            elif role == Qt.DecorationRole:
+                return self.iconExpanded if node.expanded else self.iconCollapsed
+            elif role == Qt.UserRole:
+                return node.groupId
+            elif role == self.ItemTypeRole:
+                return self.GroupItem
+        else:
+            lessonId = node.lessons[index.row()]
+            if role == Qt.DisplayRole:
+                lesson = self.registry.lessonById(lessonId)
+                return lesson.displayName if lesson else None
+            elif role == Qt.DecorationRole:
+                return self.iconLesson
+            elif role == Qt.ToolTipRole:
+                return self._recommendationsText(lessonId)
+            elif role == Qt.UserRole:
+                return lessonId
+            elif role == self.ItemTypeRole:
+                return self.LessonItem
+
+        return None
+
+    def setGroupExpanded(self, index, expanded):
+        node = self._groupNode(index)
+        if node is not None and node.expanded != expanded:
+            node.expanded = expanded
+            self.dataChanged.emit(index, index, [Qt.DecorationRole])
+
+    def setSearchResults(self, lessonIds):
+        """Shows only the given lessons, groups are ordered by their best
+        ranked lesson. None shows the whole library again.
+        """
+        self.beginResetModel()
+        self._groups = list()
+        self._groupNodes = dict()
+        self._filtered = lessonIds is not None
+        if lessonIds is None:
+            self._populate()
+        else:
+            for lessonId in lessonIds:
+                lesson = self.registry.lessonById(lessonId)
+                if lesson is None:
+                    continue
+
+                node = self._groupNodes.get(lesson.groupId) or self._appendGroup(lesson.groupId)
+                node.append(lessonId)
+        self.endResetModel()
+
+    def isFiltered(self):
+        return self._filtered
+
+    def addLessons(self, lessons):
+        # search results are refreshed by whoever set them
+        if self._filtered:
+            return
+
+        for lesson in lessons:
+            node = self._groupNodes.get(lesson.groupId)
+            if node is None:
+                row = len(self._groups)
+                self.beginInsertRows(QModelIndex(), row, row)
+                node = self._appendGroup(lesson.groupId)
+                node.append(lesson.id)
+                self.endInsertRows()
+                continue
+
+            row = len(node.lessons)
+            if node.fetched == row and node.fetched > 0:
+                # all rows of this group are already shown, so the new
+                # lesson is shown right away as well
+                self.beginInsertRows(self._groupIndex(node), row, row)
+                node.append(lesson.id)
+                node.fetched += 1
+                self.endInsertRows()
+            else:
+                node.append(lesson.id)
+
+    def removeLessons(self, lessons):
+        # rows to remove by group, every group is rebuilt only once
+        removed = dict()
+        for lesson in lessons:
+            node = self._groupNodes.get(lesson.groupId)
+            if node is not None and lesson.id in node.rows:
+                removed.setdefault(node, set()).add(node.rows[lesson.id])
+
+        emptied = list()
+        for node, rows in removed.items():
+            if len(rows) == len(node.lessons):
+                emptied.append(node.row)
+                continue
+
+            parent = self._groupIndex(node)
+            for first, last in _ranges(rows):
+                if first < node.fetched:
+                    # only the fetched part of the run is shown
+                    shownLast = min(last, node.fetched - 1)
+                    self.beginRemoveRows(parent, first, shownLast)
+                    del node.lessons[first:last + 1]
+                    node.fetched -= shownLast - first + 1
+                    self.endRemoveRows()
+                else:
+                    del node.lessons[first:last + 1]
+            node.reindex()
+
+        for first, last in _ranges(emptied):
+            self.beginRemoveRows(QModelIndex(), first, last)
+            for node in self._groups[first:last + 1]:
+                del self._groupNodes[node.groupId]
+            del self._groups[first:last + 1]
+            for row in range(first, len(self._groups)):
+                self._groups[row].row = row
+            self.endRemoveRows()
+
+    def _recommendationsText(self, lessonId):
+        graph = self.registry.recommendationGraph()
+        lines = list()
+
+        prerequisites = graph.prerequisites(lessonId)
+        if prerequisites:
+            lines.append(self.tr('Prerequisites: {}').format(', '.join(lesson.displayName for lesson in prerequisites)))
+
+        # only worth showing if it goes further than the prerequisites
+        path = graph.learningPath(lessonId)
+        if len(path) > len(prerequisites) + 1:
+            lines.append(self.tr('Learning path: {}').format(' → '.join(lesson.displayName for lesson in path)))
+
+        nextLessons = graph.nextLessons(lessonId)
+        if nextLessons:
+            lines.append(self.tr('Next lessons: {}').format(', '.join(lesson.displayName for lesson in nextLessons)))
+
+        return '\n'.join(lines) or None
+
+    def _populate(self):
+        for groupId in self.registry.groups:
+            self._appendGroup(groupId).extend(self.registry.groupLessons[groupId])
+
+    def _appendGroup(self, groupId):
+        node = _GroupNode(groupId, len(self._groups))
+        self._groups.append(node)
+        self._groupNodes[groupId] = node
+        return node
+
+    def _groupNode(self, index):
+        if index.isValid() and index.internalPointer() is None:
+            return self._groups[index.row()]
+
+        return None
+
+    def _groupIndex(self, node):
+        return self.createIndex(node.row, 0)
@@ -0,0 +1,185 @@
+# -*- coding: utf-8 -*-
+"""
+/***************************************************************************
+lessonloader.py
+    ---------------------
+        Date                 : 2023-07-07
+        git sha              : $Format:%H$
+        copyright            : (C) 2023 by Pascal Ogola
+        email                : passies95@gmail.com
+ ***************************************************************************/
+
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+"""
+
+__author__ = 'Pascal Ogola'
+__date__ = 'July 2023'
+__copyright__ = '(C) 2023, Pascal Ogola'
+
+# This will get replaced with a git SHA1 when you do a git archive
+
+__revision__ = '$Format:%H$'
+
+import os
+
+from qgis.core import QgsApplication, QgsTask, QgsMessageLog
+from qgis.PyQt.QtCore import QCoreApplication, pyqtSignal
+
+from . import lessonbundle
+from .lessonwatcher import lessonDirectories
+
+
+class LessonLoaderTask(QgsTask):
+    """Discovers and parses lessons in the background.
+
+    Parsed definitions are delivered in batches through the
+    definitionsLoaded signal as (lessonFile, definition) pairs. Lesson
+    objects are created by the receiver on the main thread, because
+    resolving menu steps touches the QGIS main window.
+
+    Lessons already registered when the task is created (usually restored
+    from the lesson catalog) are not delivered again. Those which changed
+    or disappeared on disk are refreshed once the scan has finished.
+    Lessons of mounted bundles are delivered after those on disk.
+    """
+
+    definitionsLoaded = pyqtSignal(object)
+
+    def __init__(self, registry, lessonPaths, batchSize=50):
+        super(LessonLoaderTask, self).__init__(self.tr('Loading lessons'), QgsTask.CanCancel)
+
+        self.registry = registry
+        self.lessonPaths = lessonPaths
+        self.batchSize = batchSize
+        self.locale = QgsApplication.locale()
+        self.workers = registry.parserWorkers()
+        # lessons of mounted bundles do not change on disk
+        self.knownRoots = {root for root in registry.roots if not lessonbundle.isBundlePath(root)}
+        self.bundles = registry.lessonBundles()
+        self.registeredRoots = set(registry.roots)
+
+        self.errors = list()
+        self.changedRoots = set()
+        # lesson directories to watch once the library is loaded
+        self.lessonDirectories = dict()
+
+    def run(self):
+        self.lessonDirectories = lessonDirectories(self.registry.lessonContainers(self.lessonPaths))
+
+        catalog = self.registry.lessonCatalog()
+        catalog.resetStatistics()
+
+        lessonFiles = list(self.registry.lessonFiles(self.lessonPaths))
+        total = len(lessonFiles)
+        seenRoots = set()
+
+        definitions = catalog.definitions(lessonFiles, self.locale, self.workers)
+        batch = list()
+        for i, (lessonFile, definition, error) in enumerate(definitions):
+            if self.isCanceled():
+                definitions.close()
+                return False
+
+            root = os.path.dirname(lessonFile)
+            seenRoots.add(root)
+            if root in self.knownRoots:
+                if lessonFile in catalog.parsed:
+                    self.changedRoots.add(root)
+            elif error is None:
+                batch.append((lessonFile, definition))
+            else:
+                self.errors.append((lessonFile, error))
+
+            if len(batch) >= self.batchSize:
+                self.definitionsLoaded.emit(batch)
+                batch = list()
+
+            self.setProgress(100.0 * (i + 1) / total)
+
+        if batch:
+            self.definitionsLoaded.emit(batch)
+
+        self.changedRoots.update(self.knownRoots - seenRoots)
+
+        for bundlePath in self.bundles:
+            if self.isCanceled():
+                return False
+
+            if not os.path.isfile(bundlePath):
+                self.errors.append((bundlePath, self.tr('Lesson bundle does not exist')))
+                continue
+
+            definitions = self.registry.readLessonBundle(bundlePath) or list()
+            batch = [(lessonFile, definition) for lessonFile, definition in definitions
+                     if os.path.dirname(lessonFile) not in self.registeredRoots]
+            if batch:
+                self.definitionsLoaded.emit(batch)
+
+        return True
+
+    def finished(self, result):
+        for lessonFile, error in self.errors:
+            QgsMessageLog.logMessage(self.tr('Can not load lesson from {}:\n{}').format(lessonFile, error), 'QLesson')
+
+        catalog = self.registry.lessonCatalog()
+        if result:
+            # a canceled scan has not seen every lesson, so it must not
+            # prune the catalog
+            catalog.save(prune=True)
+            if self.changedRoots:
+                self.registry.refreshLessons(self.changedRoots)
+        else:
+            catalog.save()
+
+        QgsMessageLog.logMessage(self.tr('Lesson catalog: {} hits, {} misses').format(*catalog.statistics()), 'QLesson')
+
+    def tr(self, text):
+        return QCoreApplication.translate('LessonLoaderTask', text)
+
+
+class LessonInstallTask(QgsTask):
+    """Extracts lessons from a ZIP archive in the background and
+    registers them once extraction has finished.
+
+    With "qlesson/mountBundles" set, the archive is mounted instead and
+    only its lessons are read in the background.
+    """
+
+    def __init__(self, registry, filePath):
+        super(LessonInstallTask, self).__init__(self.tr('Installing lessons'), QgsTask.CanCancel)
+
+        self.registry = registry
+        self.filePath = filePath
+        self.mount = registry.mountsBundles()
+        self.roots = None
+        self.definitions = None
+
+    def run(self):
+        if self.mount:
+            self.definitions = self.registry.readLessonBundle(self.filePath)
+            return (self.definitions is not None
+                    and not self.registry.bundleConflicts(self.filePath, self.definitions))
+
+        self.roots = self.registry.extractLessonsFromZip(self.filePath, self)
+        return self.roots is not None
+
+    def finished(self, result):
+        if not result:
+            return
+
+        if self.mount:
+            if self.registry.addLessonBundle(self.filePath, self.definitions) is None:
+                # task has already finished, report failure in the log
+                QgsMessageLog.logMessage(self.tr('Lessons from {} were not installed.').format(self.filePath), 'QLesson')
+        else:
+            self.registry.refreshLessons(self.roots)
+
+    def tr(self, text):
+        return QCoreApplication.translate('LessonInstallTask', text)
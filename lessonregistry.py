@@ -27,24 +27,62 @@ __copyright__ = '(C) 2023, Pascal Ogola'
 
 __revision__ = '$Format:%H$'
 
+import io
 import os
 import shutil
 import zipfile
+import traceback
+
+import yaml
 
 from qgis.core import QgsApplication, QgsSettings, QgsMessageLog
-from qgis.PyQt.QtCore import QCoreApplication
+from qgis.PyQt.QtCore import QCoreApplication, QObject, pyqtSignal
 
-from .lesson import Lesson
+from .lesson import Lesson, readLessonHeader
+from .lessoncatalog import LessonCatalog
+from .lessongraph import RecommendationGraph
 from . import lesson_utils as utils
+from . import lessonbundle
 
 pluginPath = os.path.dirname(__file__)
 
 
+class LessonRegistrySignals(QObject):
+
+    lessonsAdded = pyqtSignal(object)
+    lessonsRemoved = pyqtSignal(object)
+
+
 class QLessonRegistry:
 
     def __init__(self):
+        # registry is a singleton, do not reset state on every instantiation
+        if hasattr(self, 'lessons'):
+            return
+
+        # display names of groups by group id
         self.groups = dict()
+        # all lessons by lesson id, the secondary indexes below hold ids
+        # only and are kept in sync by _addLesson() and _removeLesson()
         self.lessons = dict()
+        # ids of lessons by group id, in order of loading
+        self.groupLessons = dict()
+        # lesson ids by lesson root directory
+        self.roots = dict()
+        # ids of lessons by directory holding their root directories
+        self.containers = dict()
+        # ids of lessons recommending a lesson, by id of the recommended
+        # lesson, which does not have to be loaded
+        self.recommendedBy = dict()
+        # ids of lessons by path of the mounted bundle holding them
+        self.bundles = dict()
+        # path of the mounted bundle by id of a lesson it holds
+        self.lessonBundle = dict()
+        self.graph = None
+        self.catalog = None
+        # lists of added and removed lessons are emitted after every
+        # registry change
+        self.signals = LessonRegistrySignals()
 
     def __new__(cls):
         if not hasattr(cls, 'instance'):
@@ -52,97 +90,538 @@ class QLessonRegistry:
 
         return cls.instance
 
-    def loadLessons(self, lessonpathlist):
-        # load built-in lessons
-        self._loadFromDirectory(lessonpathlist[0])
+    def loadCatalog(self, lessonpathlist):
+        """Registers lessons found in the given lesson paths during the last
+        scan, as stored in the lesson catalog. Does not touch lesson files,
+        run loadLessons() or LessonLoaderTask to pick up changes on disk.
+        Returns list of added lessons.
+        """
+        definitions = self.lessonCatalog().lessons(QgsApplication.locale(), lessonpathlist)
+        return self.addLessonDefinitions([(lessonFile, definition) for lessonFile, definition in definitions
+                                          if os.path.dirname(lessonFile) not in self.roots])
 
-        # load lessons from other user directories
+    def loadLessons(self, lessonpathlist):
+        catalog = self.lessonCatalog()
+        catalog.resetStatistics()
+
+        definitions = catalog.definitions(self.lessonFiles(lessonpathlist),
+                                         QgsApplication.locale(),
+                                         self.parserWorkers())
+        loaded = list()
+        for lessonFile, definition, error in definitions:
+            if error is not None:
+                QgsMessageLog.logMessage(self.tr('Can not load lesson from {}:\n{}').format(lessonFile, error), 'QLesson')
+                continue
+
+            loaded.append((lessonFile, definition))
+
+        self.addLessonDefinitions(loaded)
+
+        catalog.save(prune=True)
+        QgsMessageLog.logMessage(self.tr('Lesson catalog: {} hits, {} misses').format(*catalog.statistics()), 'QLesson')
+
+    def lessonFiles(self, lessonpathlist):
+        """Yields lesson.yaml files found in the given lesson paths. Only
+        touches the file system, so it is safe to run in a worker thread.
+        """
+        for directory in self.lessonContainers(lessonpathlist):
+            yield from self._lessonFilesInDirectory(directory)
+
+    def lessonContainers(self, lessonpathlist):
+        """Yields directories which hold lesson directories."""
+        # built-in lessons
+        if lessonpathlist and os.path.exists(lessonpathlist[0]):
+            yield lessonpathlist[0]
+
+        # lessons from other user directories
         for directory in lessonpathlist[1:]:
             if os.path.exists(directory):
                 for entry in os.scandir(directory):
                     if entry.is_file():
                         continue
 
-                    self._loadFromDirectory(entry.path)
+                    yield entry.path
+
+    def addLessonDefinitions(self, definitions):
+        """Creates lessons from (lessonFile, definition) pairs and adds
+        them to the registry. Returns list of added lessons.
+        """
+        added = list()
+        for lessonFile, definition in definitions:
+            lesson = Lesson.fromDefinition(definition, lessonFile)
+            if lesson and self._addLesson(lesson):
+                added.append(lesson)
+
+        if added:
+            self.signals.lessonsAdded.emit(added)
+
+        return added
 
     def addLessonsDirectory(self, directory):
-        self._loadFromDirectory(directory)
+        self._emitAdded(self._loadFromDirectory(directory))
+        self.lessonCatalog().save()
 
     def removeLessonsDirectory(self, directory):
-        for entry in os.scandir(directory):
-            if utils.isLesson(os.path.join(directory, entry.name)):
-                lessonId = Lesson.idFromYaml(os.path.join(directory, entry.name, 'lesson.yaml'))
-                if lessonId:
-                    self._removeLesson(lessonId)
+        removed = list()
+        for lessonId in list(self.containers.get(os.path.abspath(directory), ())):
+            lesson = self._removeLesson(lessonId)
+            if lesson:
+                removed.append(lesson)
+
+        if removed:
+            self.signals.lessonsRemoved.emit(removed)
+
+    def refreshLessons(self, roots):
+        """Reloads lessons from the given lesson directories. Lessons which
+        no longer exist on disk are removed, new and changed ones are
+        (re)loaded. Returns lists of added and removed lessons.
+        """
+        added = list()
+        removed = list()
+        for root in roots:
+            # mounted bundles are read-only and never change
+            if lessonbundle.isBundlePath(root):
+                continue
+
+            lessonId = self.roots.get(os.path.abspath(root))
+            if lessonId is not None:
+                lesson = self._removeLesson(lessonId)
+                if lesson:
+                    removed.append(lesson)
+
+            if utils.isLesson(root):
+                lesson = self._lessonFromFile(os.path.join(root, 'lesson.yaml'))
+                if lesson and self._addLesson(lesson):
+                    added.append(lesson)
+            else:
+                self.lessonCatalog().remove([os.path.join(root, 'lesson.yaml')])
+
+        self.lessonCatalog().save()
+
+        if removed:
+            self.signals.lessonsRemoved.emit(removed)
+        self._emitAdded(added)
+
+        return added, removed
+
+    def reportUnresolvedMenus(self):
+        """Logs all menu steps, of all lessons, whose menu can not be found
+        in the QGIS main window with a single message.
+        """
+        menus = dict()
+        for lesson in self.lessons.values():
+            for step in lesson.stepDefinitions or ():
+                if step.menu is not None:
+                    menus.setdefault(step.menu, list()).append(lesson.id)
+
+        unresolved = utils.menuIndex().unresolved(menus)
+        if unresolved:
+            lines = ['{} ({})'.format(m, ', '.join(menus[m])) for m in unresolved]
+            QgsMessageLog.logMessage(self.tr('Can not find following menus used by lessons:\n{}').format('\n'.join(lines)), 'QLesson')
+
+        return unresolved
+
+    def reportRecommendationProblems(self):
+        """Logs recommendations of lessons which are not loaded and
+        recommendations closing a cycle with a single message.
+        """
+        problems = self.recommendationGraph().problems()
+        if problems:
+            QgsMessageLog.logMessage(self.tr('Following lesson recommendations are ignored:\n{}').format('\n'.join(problems)), 'QLesson')
+
+        return problems
+
+    def parserWorkers(self):
+        """Number of processes used to parse changed lessons, 0 means one
+        per CPU and 1 disables parallel parsing.
+        """
+        workers = QgsSettings().value('qlesson/parserWorkers', 0, int)
+        if workers <= 0:
+            workers = os.cpu_count() or 1
+
+        return workers
+
+    def lessonCatalog(self):
+        if self.catalog is None:
+            self.catalog = LessonCatalog()
+
+        return self.catalog
+
+    def recommendationGraph(self):
+        if self.graph is None:
+            self.graph = RecommendationGraph(self)
+
+        return self.graph
 
     def lessonById(self, lessonId):
-        group, name = lessonId.split(':')
+        return self.lessons.get(lessonId)
 
-        if group in self.lessons and lessonId in self.lessons[group]:
-            return self.lessons[group][lessonId]
+    def lessonByRoot(self, root):
+        lessonId = self.roots.get(os.path.abspath(root))
+        return self.lessons.get(lessonId) if lessonId is not None else None
 
-        return None
+    def lessonsInGroup(self, groupId):
+        return [self.lessons[lessonId] for lessonId in self.groupLessons.get(groupId, ())]
 
-    def installLessonsFromZip(self, filePath):
-        # TODO: allow multiple groups inside archive
-        pathsList = QgsSettings().value('qlesson/lessonsPaths',
-                                        [os.path.join(QgsApplication.qgisSettingsDirPath(), 'lessons')])
+    def recommendingLessons(self, lessonId):
+        """Returns lessons which recommend the given lesson."""
+        return [self.lessons[i] for i in self.recommendedBy.get(lessonId, ()) if i in self.lessons]
 
-        if not os.path.exists(pathsList[0]):
-            os.makedirs(pathsList[0])
+    def installLessonsFromZip(self, filePath, feedback=None):
+        if self.mountsBundles():
+            return self.mountLessonBundle(filePath) is not None
 
-        with zipfile.ZipFile(filePath, 'r') as zf:
-            zf.extractall(pathsList[0])
+        roots = self.extractLessonsFromZip(filePath, feedback)
+        if roots is None:
+            return False
 
-        dirName = os.path.splitext(filePath)[0]
-        self._loadFromDirectory(os.path.join(pathsList[0], dirName))
+        self.refreshLessons(roots)
         return True
 
+    def extractLessonsFromZip(self, filePath, feedback=None):
+        """Extracts lessons from the ZIP archive into the user lessons
+        directory and returns list of extracted lesson directories, or
+        None if nothing was installed.
+
+        Archives can contain any number of groups and lessons. If the
+        archive has a manifest.yaml file at its root, only lessons listed
+        under its "lessons" key (paths of lesson directories inside the
+        archive) are installed, otherwise every directory containing a
+        lesson.yaml is. Members are streamed to disk one by one and
+        progress is reported to the optional feedback object (QgsFeedback
+        or QgsTask), which can also cancel the installation.
+        """
+        installPath = self.userLessonsPath()
+        if not os.path.exists(installPath):
+            os.makedirs(installPath)
+
+        with zipfile.ZipFile(filePath, 'r') as zf:
+            members = zf.infolist()
+            for info in members:
+                if not utils.isSafeArchivePath(info.filename):
+                    QgsMessageLog.logMessage(self.tr('Can not install lessons from {}, archive contains unsafe path "{}".').format(filePath, info.filename), 'QLesson')
+                    return None
+
+            lessonDirs = self._lessonDirsInZip(zf)
+            if not lessonDirs:
+                QgsMessageLog.logMessage(self.tr('No lessons found in {}.').format(filePath), 'QLesson')
+                return None
+
+            conflicts = [lessonId for lessonId in self._lessonIdsInZip(zf, lessonDirs) if self.lessonById(lessonId)]
+            if conflicts:
+                QgsMessageLog.logMessage(self.tr('Can not install lessons from {}, following lessons are already installed: {}').format(filePath, ', '.join(conflicts)), 'QLesson')
+                return None
+
+            # only members inside the lesson directories are extracted
+            prefixes = tuple('{}/'.format(d) for d in lessonDirs)
+            members = [info for info in members if info.filename.startswith(prefixes)]
+
+            total = sum(info.file_size for info in members) or 1
+            done = 0
+            written = list()
+            for info in members:
+                if feedback is not None and feedback.isCanceled():
+                    for path in reversed(written):
+                        if os.path.isdir(path):
+                            shutil.rmtree(path, True)
+                        elif os.path.exists(path):
+                            os.remove(path)
+                    return None
+
+                target = os.path.join(installPath, *info.filename.rstrip('/').split('/'))
+                if info.is_dir():
+                    if not os.path.exists(target):
+                        os.makedirs(target)
+                        written.append(target)
+                    continue
+
+                directory = os.path.dirname(target)
+                if not os.path.exists(directory):
+                    os.makedirs(directory)
+                    written.append(directory)
+
+                with zf.open(info) as src, open(target, 'wb') as dst:
+                    written.append(target)
+                    shutil.copyfileobj(src, dst, 1024 * 1024)
+
+                done += info.file_size
+                if feedback is not None:
+                    feedback.setProgress(100.0 * done / total)
+
+        return [os.path.join(installPath, *d.split('/')) for d in lessonDirs]
+
+    def mountsBundles(self):
+        """Whether lesson archives are mounted instead of extracted,
+        set with "qlesson/mountBundles".
+        """
+        return QgsSettings().value('qlesson/mountBundles', False, bool)
+
+    def lessonBundles(self):
+        """Returns paths of archives mounted as lesson bundles."""
+        return QgsSettings().value('qlesson/lessonBundles', list(), list)
+
+    def mountLessonBundle(self, filePath):
+        """Registers lessons from the ZIP archive without extracting it.
+        Returns list of added lessons, or None if the archive can not be
+        mounted.
+        """
+        definitions = self.readLessonBundle(filePath)
+        if definitions is None:
+            return None
+
+        return self.addLessonBundle(filePath, definitions)
+
+    def readLessonBundle(self, filePath):
+        """Mounts the ZIP archive and returns list of (lessonFile,
+        definition) of lessons it holds, or None if it can not be read.
+        Does not touch the registry, so it is safe to run in a worker
+        thread.
+        """
+        try:
+            bundle = lessonbundle.mountBundle(filePath)
+        except (OSError, zipfile.BadZipFile) as e:
+            QgsMessageLog.logMessage(self.tr('Can not mount lessons from {}: {}').format(filePath, e), 'QLesson')
+            return None
+
+        for name in bundle.files(''):
+            if not utils.isSafeArchivePath(name):
+                QgsMessageLog.logMessage(self.tr('Can not mount lessons from {}, archive contains unsafe path "{}".').format(filePath, name), 'QLesson')
+                self._releaseBundle(filePath)
+                return None
+
+        lessonDirs = self._lessonDirsInZip(bundle.zip)
+        if not lessonDirs:
+            QgsMessageLog.logMessage(self.tr('No lessons found in {}.').format(filePath), 'QLesson')
+            self._releaseBundle(filePath)
+            return None
+
+        locale = QgsApplication.locale()
+        definitions = list()
+        for lessonDir in lessonDirs:
+            lessonFile = bundle.filePath('{}/lesson.yaml'.format(lessonDir))
+            try:
+                definitions.append((lessonFile, Lesson.definitionFromYaml(lessonFile, locale)))
+            except Exception:
+                QgsMessageLog.logMessage(self.tr('Can not load lesson from {}:\n{}').format(lessonFile, traceback.format_exc()), 'QLesson')
+
+        return definitions
+
+    def addLessonBundle(self, filePath, definitions):
+        """Registers lessons read with readLessonBundle() and remembers
+        the bundle, so it is mounted again in the next session. Returns
+        list of added lessons, or None if some of them are already
+        installed.
+        """
+        if self.bundleConflicts(filePath, definitions):
+            return None
+
+        added = self.addLessonDefinitions(definitions)
+
+        bundles = self.lessonBundles()
+        filePath = os.path.abspath(filePath)
+        if filePath not in bundles:
+            QgsSettings().setValue('qlesson/lessonBundles', bundles + [filePath])
+
+        return added
+
+    def bundleConflicts(self, filePath, definitions):
+        """Returns ids of lessons of the bundle which are already
+        installed. The bundle is unmounted if there are any.
+        """
+        conflicts = ['{}:{}'.format(d['groupId'], d['name']) for lessonFile, d in definitions
+                     if self.lessonById('{}:{}'.format(d['groupId'], d['name']))]
+        if conflicts:
+            QgsMessageLog.logMessage(self.tr('Can not install lessons from {}, following lessons are already installed: {}').format(filePath, ', '.join(conflicts)), 'QLesson')
+            self._releaseBundle(filePath)
+
+        return conflicts
+
+    def unmountLessonBundle(self, filePath):
+        """Removes all lessons of the bundle and the data extracted from
+        it and forgets it, the archive itself is left in place.
+        """
+        filePath = os.path.abspath(filePath)
+        removed = list()
+        for lessonId in list(self.bundles.get(filePath, ())):
+            lesson = self._removeLesson(lessonId)
+            if lesson:
+                removed.append(lesson)
+
+        lessonbundle.unmountBundle(filePath, removeExtracted=True)
+        QgsSettings().setValue('qlesson/lessonBundles', [p for p in self.lessonBundles() if p != filePath])
+
+        if removed:
+            self.signals.lessonsRemoved.emit(removed)
+
+        return removed
+
+    def _releaseBundle(self, filePath):
+        # keep bundles open while their lessons are registered
+        if not self.bundles.get(os.path.abspath(filePath)):
+            lessonbundle.unmountBundle(filePath)
+
+    def userLessonsPath(self):
+        pathsList = QgsSettings().value('qlesson/lessonsPaths',
+                                        [os.path.join(QgsApplication.qgisSettingsDirPath(), 'lessons')])
+        return pathsList[0]
+
     def uninstallLesson(self, lessonId):
         lesson = self.lessonById(lessonId)
         if lesson:
-            lessonsPath = QgsSettings().value('qlesson/lessonsPath',
-                                              os.path.join(QgsApplication.qgisSettingsDirPath(), 'lessons'), str)
+            # lessons of a mounted bundle go away together
+            bundle, member = lessonbundle.bundleForPath(lesson.root)
+            if bundle is not None:
+                self.unmountLessonBundle(bundle.path)
+                return True
+
             # only user lessons can be uninstalled
-            if not lesson.root.startswith(lessonsPath):
-                QgsMessageLog.logMessage(self.tr('Lesson "{}" is not a user lesson and can not be uninstalled.'.format(lesson.name)))
+            if not self.isUserLesson(lesson):
+                QgsMessageLog.logMessage(self.tr('Lesson "{}" is not a user lesson and can not be uninstalled.').format(lesson.name), 'QLesson')
                 return False
 
             rootDirectory = lesson.root
             self._removeLesson(lessonId)
+            self.signals.lessonsRemoved.emit([lesson])
             shutil.rmtree(rootDirectory)
+
+            catalog = self.lessonCatalog()
+            catalog.remove([os.path.join(rootDirectory, 'lesson.yaml')])
+            catalog.save()
             return True
 
+    def isUserLesson(self, lesson):
+        if lesson.root is None:
+            return False
+
+        lessonsPath = os.path.abspath(self.userLessonsPath())
+        try:
+            return os.path.commonpath([lessonsPath, lesson.root]) == lessonsPath
+        except ValueError:
+            # paths on different drives
+            return False
+
+    def _lessonDirsInZip(self, zf):
+        names = zf.namelist()
+        if 'manifest.yaml' in names:
+            with zf.open('manifest.yaml') as f:
+                manifest = yaml.safe_load(io.TextIOWrapper(f, encoding='utf-8')) or dict()
+
+            lessonDirs = [d.strip('/') for d in manifest.get('lessons', list())]
+            return [d for d in lessonDirs if '{}/lesson.yaml'.format(d) in names]
+
+        return [os.path.dirname(name) for name in names
+                if os.path.basename(name) == 'lesson.yaml' and os.path.dirname(name)]
+
+    def _lessonIdsInZip(self, zf, lessonDirs):
+        for lessonDir in lessonDirs:
+            with zf.open('{}/lesson.yaml'.format(lessonDir)) as f:
+                groupId, name = readLessonHeader(io.TextIOWrapper(f, encoding='utf-8'))
+
+            if groupId is not None and name is not None:
+                yield '{}:{}'.format(groupId, name)
+
     def _loadFromDirectory(self, directory):
+        added = list()
+        for lessonFile in self._lessonFilesInDirectory(directory):
+            if os.path.abspath(os.path.dirname(lessonFile)) in self.roots:
+                continue
+
+            # skip lessons registered from another directory without
+            # parsing them
+            try:
+                lessonId = Lesson.idFromYaml(lessonFile)
+            except Exception:
+                lessonId = None
+
+            if lessonId is not None and self.lessonById(lessonId):
+                QgsMessageLog.logMessage(self.tr('Lesson "{}" is already loaded, skipping {}').format(lessonId, lessonFile), 'QLesson')
+                continue
+
+            lesson = self._lessonFromFile(lessonFile)
+            if lesson and self._addLesson(lesson):
+                added.append(lesson)
+
+        return added
+
+    def _emitAdded(self, lessons):
+        if lessons:
+            self.signals.lessonsAdded.emit(lessons)
+
+    def _lessonFilesInDirectory(self, directory):
         for lessonDir in os.scandir(directory):
             root = os.path.join(directory, lessonDir.name)
             if utils.isLesson(root):
-                lesson = Lesson.fromYaml(os.path.join(root, 'lesson.yaml'))
-                if lesson:
-                    self._addLesson(lesson)
+                yield os.path.join(root, 'lesson.yaml')
+
+    def _lessonFromFile(self, lessonFile):
+        try:
+            definition = self.lessonCatalog().definition(lessonFile, QgsApplication.locale())
+        except Exception:
+            QgsMessageLog.logMessage(self.tr('Can not load lesson from {}:\n{}').format(lessonFile, traceback.format_exc()), 'QLesson')
+            return None
+
+        return Lesson.fromDefinition(definition, lessonFile)
 
     def _addLesson(self, lesson):
-        groupId = lesson.groupId
-        if groupId not in self.groups:
-            self.groups[groupId] = lesson.group
-            self.lessons[groupId] = {}
+        if lesson.id in self.lessons:
+            QgsMessageLog.logMessage(self.tr('Duplicate lesson name "{}" for group "{}"').format(lesson.name, lesson.groupId), 'QLesson')
+            return False
 
-        if lesson.name in self.lessons[groupId]:
-            QgsMessageLog.logMessage(self.tr('Duplicate lesson name "{}" for group "{}"'.format(lesson.name, groupId)))
-            return
+        self.lessons[lesson.id] = lesson
+        if lesson.groupId not in self.groups:
+            self.groups[lesson.groupId] = lesson.group
+            self.groupLessons[lesson.groupId] = dict()
+        # dict used as ordered set
+        self.groupLessons[lesson.groupId][lesson.id] = None
 
-        self.lessons[groupId][lesson.id] = lesson
+        if lesson.root is not None:
+            self.roots[lesson.root] = lesson.id
+            self.containers.setdefault(os.path.dirname(lesson.root), set()).add(lesson.id)
 
-    def _removeLesson(self, lessonId):
-        groupId, name = lessonId.split(':')
-        if groupId not in self.groups:
-            return
+        for recommendedId in lesson.recommendedIds():
+            self.recommendedBy.setdefault(recommendedId, set()).add(lesson.id)
+
+        bundle, member = lessonbundle.bundleForPath(lesson.root) if lesson.root is not None else (None, None)
+        if bundle is not None:
+            self.bundles.setdefault(bundle.path, set()).add(lesson.id)
+            self.lessonBundle[lesson.id] = bundle.path
 
-        if name in self.lessons[groupId]:
-            del self.lessons[groupId][name]
-            if len(self.lessons[groupId]) == 0:
-                del self.lessons[groupId]
-                del self.groups[groupId]
+        return True
+
+    def _removeLesson(self, lessonId):
+        lesson = self.lessons.pop(lessonId, None)
+        if lesson is None:
+            return None
+
+        groupLessons = self.groupLessons[lesson.groupId]
+        del groupLessons[lessonId]
+        if not groupLessons:
+            del self.groupLessons[lesson.groupId]
+            del self.groups[lesson.groupId]
+
+        if lesson.root is not None:
+            if self.roots.get(lesson.root) == lessonId:
+                del self.roots[lesson.root]
+            container = os.path.dirname(lesson.root)
+            self._discard(self.containers, container, lessonId)
+
+        for recommendedId in lesson.recommendedIds():
+            self._discard(self.recommendedBy, recommendedId, lessonId)
+
+        bundlePath = self.lessonBundle.pop(lessonId, None)
+        if bundlePath is not None:
+            self._discard(self.bundles, bundlePath, lessonId)
+
+        lesson.release()
+        utils.releaseLessonFunctions(lesson.root)
+        return lesson
+
+    def _discard(self, index, key, lessonId):
+        ids = index.get(key)
+        if ids is not None:
+            ids.discard(lessonId)
+            if not ids:
+                del index[key]
 
     def tr(self, text):
         return QCoreApplication.translate('LessonRegistry', text)
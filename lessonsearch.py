@@ -0,0 +1,330 @@
+# -*- coding: utf-8 -*-
+"""
+/***************************************************************************
+lessonsearch.py
+    ---------------------
+        Date                 : 2023-07-07
+        git sha              : $Format:%H$
+        copyright            : (C) 2023 by Pascal Ogola
+        email                : passies95@gmail.com
+ ***************************************************************************/
+
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+"""
+
+__author__ = 'Pascal Ogola'
+__date__ = 'July 2023'
+__copyright__ = '(C) 2023, Pascal Ogola'
+
+# This will get replaced with a git SHA1 when you do a git archive
+
+__revision__ = '$Format:%H$'
+
+import re
+import bisect
+import unicodedata
+from html.parser import HTMLParser
+
+from qgis.core import QgsApplication, QgsSettings, QgsTask
+from qgis.PyQt.QtCore import QObject, QCoreApplication, pyqtSignal
+
+from . import lessonbundle
+
+# weight of a match in the lesson display name, group name and description
+DISPLAY_NAME_WEIGHT = 4.0
+GROUP_WEIGHT = 2.0
+DESCRIPTION_WEIGHT = 1.0
+
+# locales written without spaces between words, text in these locales is
+# split into character bigrams instead of words
+BIGRAM_LOCALES = ('ja', 'zh', 'ko', 'th')
+
+WORD = re.compile(r'\w+')
+
+
+class _TextExtractor(HTMLParser):
+
+    def __init__(self):
+        super(_TextExtractor, self).__init__(convert_charrefs=True)
+        self.parts = list()
+        self._skip = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in ('script', 'style'):
+            self._skip += 1
+
+    def handle_endtag(self, tag):
+        if tag in ('script', 'style') and self._skip:
+            self._skip -= 1
+
+    def handle_data(self, data):
+        if not self._skip:
+            self.parts.append(data)
+
+
+def htmlText(html):
+    """Returns text content of a HTML document."""
+    parser = _TextExtractor()
+    parser.feed(html)
+    parser.close()
+    return ' '.join(parser.parts)
+
+
+def descriptionText(description):
+    """Returns plain text of a lesson description, which is either a path
+    to a HTML file or the description itself.
+    """
+    if not description:
+        return ''
+
+    if lessonbundle.isFile(description):
+        with lessonbundle.openText(description) as f:
+            description = f.read()
+
+    return htmlText(description)
+
+
+class Tokenizer:
+    """Splits text into lowercase search terms with diacritics removed.
+
+    With bigrams enabled, runs of characters from scripts written without
+    spaces are split into overlapping character pairs, so that words can
+    be found without a dictionary.
+    """
+
+    def __init__(self, bigrams=False):
+        self.bigrams = bigrams
+
+    @staticmethod
+    def forLocale(locale):
+        mode = QgsSettings().value('qlesson/searchTokenizer', 'auto', str)
+        if mode == 'auto':
+            return Tokenizer(locale.split('_')[0] in BIGRAM_LOCALES)
+
+        return Tokenizer(mode == 'bigram')
+
+    def tokens(self, text):
+        text = unicodedata.normalize('NFKD', text.casefold())
+        text = ''.join(c for c in text if not unicodedata.combining(c))
+
+        tokens = list()
+        for word in WORD.findall(text):
+            if self.bigrams and not word.isascii():
+                if len(word) == 1:
+                    tokens.append(word)
+                else:
+                    tokens.extend(word[i:i + 2] for i in range(len(word) - 1))
+            else:
+                tokens.append(word)
+
+        return tokens
+
+
+class DescriptionTextTask(QgsTask):
+    """Extracts and tokenizes text of lesson descriptions off the main
+    thread.
+    """
+
+    def __init__(self, lessons, tokenizer):
+        super(DescriptionTextTask, self).__init__(self.tr('Indexing lesson descriptions'), QgsTask.CanCancel)
+
+        # lessons whose descriptions are indexed, the description files
+        # are resolved here as well
+        self.lessons = lessons
+        self.tokenizer = tokenizer
+        self.results = list()
+
+    def run(self):
+        total = len(self.lessons)
+        for i, lesson in enumerate(self.lessons):
+            if self.isCanceled():
+                return False
+
+            try:
+                tokens = self.tokenizer.tokens(descriptionText(lesson.description))
+            except (OSError, UnicodeDecodeError):
+                tokens = list()
+
+            self.results.append((lesson, tokens))
+            self.setProgress(100.0 * (i + 1) / total)
+
+        return True
+
+    def tr(self, text):
+        return QCoreApplication.translate('DescriptionTextTask', text)
+
+
+class LessonSearchIndex(QObject):
+    """Inverted index over display name, group name and description text
+    of the lessons in the registry.
+
+    The index follows registry changes. Names are indexed right away,
+    description text is extracted in a background task and merged in
+    when it is ready, indexChanged is emitted after every update.
+    """
+
+    indexChanged = pyqtSignal()
+
+    def __init__(self, registry, parent=None, locale=None):
+        super(LessonSearchIndex, self).__init__(parent)
+
+        self.registry = registry
+        self.tokenizer = Tokenizer.forLocale(locale or QgsApplication.locale())
+
+        # term -> {lessonId: weight}
+        self._postings = dict()
+        # lessonId -> {term: weight}, needed to remove lessons again
+        self._terms = dict()
+        self._lessons = dict()
+        # sorted list of all terms, for prefix matches
+        self._sortedTerms = None
+
+        self._pending = list()
+        self._task = None
+
+        self.addLessons(list(registry.lessons.values()))
+
+        registry.signals.lessonsAdded.connect(self.addLessons)
+        registry.signals.lessonsRemoved.connect(self.removeLessons)
+
+    def addLessons(self, lessons):
+        for lesson in lessons:
+            if lesson.id in self._lessons:
+                self._removeLesson(lesson.id)
+
+            terms = dict()
+            for weight, text in ((DISPLAY_NAME_WEIGHT, lesson.displayName),
+                                 (GROUP_WEIGHT, lesson.group)):
+                self._addTerms(terms, self.tokenizer.tokens(text or ''), weight)
+
+            self._lessons[lesson.id] = lesson
+            self._setTerms(lesson.id, terms)
+            self._pending.append(lesson)
+
+        if lessons:
+            self._sortedTerms = None
+            self._indexDescriptions()
+            self.indexChanged.emit()
+
+    def removeLessons(self, lessons):
+        for lesson in lessons:
+            if self._lessons.get(lesson.id) is lesson:
+                self._removeLesson(lesson.id)
+
+        if lessons:
+            self._sortedTerms = None
+            self.indexChanged.emit()
+
+    def search(self, text, limit=None):
+        """Returns ids of lessons matching all words of text, best first.
+
+        Every word also matches terms it is a prefix of, so that results
+        are available while the user types. Exact matches rank higher.
+        """
+        queryTokens = self.tokenizer.tokens(text)
+        if not queryTokens:
+            return list()
+
+        scores = None
+        for token in dict.fromkeys(queryTokens):
+            tokenScores = dict()
+            for term in self._matchingTerms(token):
+                # prefix matches are worth less, the shorter the prefix
+                factor = 1.0 if term == token else len(token) / len(term) * 0.5
+                for lessonId, weight in self._postings[term].items():
+                    score = weight * factor
+                    if score > tokenScores.get(lessonId, 0.0):
+                        tokenScores[lessonId] = score
+
+            if scores is None:
+                scores = tokenScores
+            else:
+                scores = {lessonId: score + tokenScores[lessonId]
+                          for lessonId, score in scores.items() if lessonId in tokenScores}
+
+            if not scores:
+                return list()
+
+        ranked = sorted(scores, key=lambda lessonId: (-scores[lessonId], self._lessons[lessonId].displayName))
+        return ranked[:limit] if limit is not None else ranked
+
+    def isIndexing(self):
+        return self._task is not None
+
+    def cancel(self):
+        self._pending = list()
+        if self._task is not None:
+            self._task.cancel()
+
+    def _matchingTerms(self, token):
+        if self._sortedTerms is None:
+            self._sortedTerms = sorted(self._postings)
+
+        i = bisect.bisect_left(self._sortedTerms, token)
+        while i < len(self._sortedTerms) and self._sortedTerms[i].startswith(token):
+            yield self._sortedTerms[i]
+            i += 1
+
+    def _addTerms(self, terms, tokens, weight):
+        for token in tokens:
+            terms[token] = terms.get(token, 0.0) + weight
+
+    def _setTerms(self, lessonId, terms):
+        self._terms[lessonId] = terms
+        for term, weight in terms.items():
+            self._postings.setdefault(term, dict())[lessonId] = weight
+
+    def _unsetTerms(self, lessonId):
+        terms = self._terms.pop(lessonId, dict())
+        for term in terms:
+            postings = self._postings[term]
+            del postings[lessonId]
+            if not postings:
+                del self._postings[term]
+
+        return terms
+
+    def _removeLesson(self, lessonId):
+        self._unsetTerms(lessonId)
+        del self._lessons[lessonId]
+
+    def _indexDescriptions(self):
+        if self._task is not None or not self._pending:
+            return
+
+        self._task = DescriptionTextTask(self._pending, self.tokenizer)
+        self._pending = list()
+        self._task.taskCompleted.connect(self._descriptionsIndexed)
+        self._task.taskTerminated.connect(self._descriptionsIndexed)
+        QgsApplication.taskManager().addTask(self._task)
+
+    def _descriptionsIndexed(self):
+        # task is deleted once this handler returns
+        results = self._task.results
+        self._task = None
+
+        changed = False
+        for lesson, tokens in results:
+            # lesson may have been removed or reloaded meanwhile
+            if self._lessons.get(lesson.id) is not lesson or not tokens:
+                continue
+
+            # every term counts once, long descriptions should not
+            # outrank a match in the name
+            terms = self._unsetTerms(lesson.id)
+            self._addTerms(terms, set(tokens), DESCRIPTION_WEIGHT)
+            self._setTerms(lesson.id, terms)
+            changed = True
+
+        if changed:
+            self._sortedTerms = None
+            self.indexChanged.emit()
+
+        self._indexDescriptions()
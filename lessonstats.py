@@ -0,0 +1,182 @@
+# -*- coding: utf-8 -*-
+"""
+/***************************************************************************
+lessonstats.py
+    ---------------------
+        Date                 : 2023-07-07
+        git sha              : $Format:%H$
+        copyright            : (C) 2023 by Pascal Ogola
+        email                : passies95@gmail.com
+ ***************************************************************************/
+
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+"""
+
+__author__ = 'Pascal Ogola'
+__date__ = 'July 2023'
+__copyright__ = '(C) 2023, Pascal Ogola'
+
+# This will get replaced with a git SHA1 when you do a git archive
+
+__revision__ = '$Format:%H$'
+
+import os
+import json
+import time
+import sqlite3
+import threading
+from contextlib import closing
+
+from qgis.core import QgsApplication, QgsSettings, QgsMessageLog
+
+# number of timings collected before they are written to the store
+BATCH_SIZE = 100
+
+# shared store, steps record timings from background tasks as well
+_lessonStatistics = None
+
+
+def statisticsFilePath():
+    return os.path.join(QgsApplication.qgisSettingsDirPath(), 'qlesson', 'stats.sqlite')
+
+
+def lessonStatistics():
+    global _lessonStatistics
+    if _lessonStatistics is None:
+        _lessonStatistics = LessonStatistics()
+
+    return _lessonStatistics
+
+
+def percentile(values, fraction):
+    """Returns percentile of sorted values, with linear interpolation."""
+    if not values:
+        return None
+
+    position = (len(values) - 1) * fraction
+    lower = int(position)
+    upper = min(lower + 1, len(values) - 1)
+    return values[lower] + (values[upper] - values[lower]) * (position - lower)
+
+
+class LessonStatistics:
+    """Wall time of step functions and step transitions, per lesson id
+    and step index, collected across sessions.
+
+    Timings are buffered in memory and written to a SQLite database in
+    batches. Collecting can be turned off with the
+    "qlesson/collectStatistics" setting.
+    """
+
+    def __init__(self, databaseFile=None, enabled=None):
+        self.databaseFile = databaseFile if databaseFile is not None else statisticsFilePath()
+        if enabled is None:
+            enabled = QgsSettings().value('qlesson/collectStatistics', True, bool)
+
+        self.enabled = enabled
+
+        self._pending = list()
+        self._lock = threading.Lock()
+        self._initialized = False
+
+    def record(self, lessonId, stepIndex, kind, seconds):
+        if not self.enabled or lessonId is None:
+            return
+
+        with self._lock:
+            self._pending.append((lessonId, stepIndex, kind, seconds, time.time()))
+            if len(self._pending) < BATCH_SIZE:
+                return
+
+            pending = self._pending
+            self._pending = list()
+
+        self._write(pending)
+
+    def flush(self):
+        with self._lock:
+            pending = self._pending
+            self._pending = list()
+
+        if pending:
+            self._write(pending)
+
+    def summary(self):
+        """Returns list of dicts with lesson, step, kind, count, p50 and
+        p95 (in seconds) for every recorded lesson step and kind.
+        """
+        self.flush()
+        if not os.path.isfile(self.databaseFile):
+            return list()
+
+        result = list()
+        with self._lock, closing(self._connect()) as connection:
+            rows = connection.execute('SELECT lesson, step, kind, seconds FROM timings '
+                                      'ORDER BY lesson, step, kind, seconds')
+            key = None
+            values = list()
+            for lesson, step, kind, seconds in rows:
+                if (lesson, step, kind) != key:
+                    if values:
+                        result.append(self._summarize(key, values))
+                    key = (lesson, step, kind)
+                    values = list()
+
+                values.append(seconds)
+
+            if values:
+                result.append(self._summarize(key, values))
+
+        return result
+
+    def exportJson(self, fileName):
+        with open(fileName, 'w', encoding='utf-8') as f:
+            json.dump({'generated': time.time(), 'steps': self.summary()}, f, indent=2)
+
+    def clear(self):
+        with self._lock:
+            self._pending = list()
+            if os.path.isfile(self.databaseFile):
+                with closing(self._connect()) as connection, connection:
+                    connection.execute('DELETE FROM timings')
+
+    def _summarize(self, key, values):
+        return {'lesson': key[0],
+                'step': key[1],
+                'kind': key[2],
+                'count': len(values),
+                'p50': percentile(values, 0.5),
+                'p95': percentile(values, 0.95)
+               }
+
+    def _write(self, pending):
+        try:
+            with self._lock, closing(self._connect()) as connection, connection:
+                connection.executemany('INSERT INTO timings (lesson, step, kind, seconds, recorded) '
+                                       'VALUES (?, ?, ?, ?, ?)', pending)
+        except (OSError, sqlite3.Error) as e:
+            QgsMessageLog.logMessage('Can not write lesson statistics to {}: {}'.format(self.databaseFile, e), 'QLesson')
+
+    def _connect(self):
+        # connections are not shared, timings come from several threads
+        if not self._initialized:
+            directory = os.path.dirname(self.databaseFile)
+            if not os.path.exists(directory):
+                os.makedirs(directory)
+
+        connection = sqlite3.connect(self.databaseFile)
+        if not self._initialized:
+            with connection:
+                connection.execute('CREATE TABLE IF NOT EXISTS timings (lesson TEXT, step INTEGER, '
+                                   'kind TEXT, seconds REAL, recorded REAL)')
+                connection.execute('CREATE INDEX IF NOT EXISTS timings_step ON timings (lesson, step, kind)')
+            self._initialized = True
+
+        return connection
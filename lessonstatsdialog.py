@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+"""
+/***************************************************************************
+lessonstatsdialog.py
+    ---------------------
+        Date                 : 2023-07-07
+        git sha              : $Format:%H$
+        copyright            : (C) 2023 by Pascal Ogola
+        email                : passies95@gmail.com
+ ***************************************************************************/
+
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+"""
+
+__author__ = 'Pascal Ogola'
+__date__ = 'July 2023'
+__copyright__ = '(C) 2023, Pascal Ogola'
+
+# This will get replaced with a git SHA1 when you do a git archive
+
+__revision__ = '$Format:%H$'
+
+import os
+
+from qgis.PyQt.QtCore import Qt
+from qgis.PyQt.QtWidgets import (QDialog, QVBoxLayout, QTableWidget, QTableWidgetItem,
+                                 QDialogButtonBox, QAbstractItemView, QFileDialog, QMessageBox)
+from qgis.core import QgsSettings
+
+from .lessonstats import lessonStatistics
+
+
+class _NumberItem(QTableWidgetItem):
+
+    def __init__(self, value, text):
+        super(_NumberItem, self).__init__(text)
+        self.setData(Qt.UserRole, value)
+        self.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
+
+    def __lt__(self, other):
+        return self.data(Qt.UserRole) < other.data(Qt.UserRole)
+
+
+class LessonStatisticsDialog(QDialog):
+    """Shows p50 and p95 wall time of lesson steps, slowest first."""
+
+    def __init__(self, parent=None):
+        super(LessonStatisticsDialog, self).__init__(parent)
+        self.setWindowTitle(self.tr('Lesson step statistics'))
+        self.resize(640, 400)
+
+        self.statistics = lessonStatistics()
+
+        self.tblStatistics = QTableWidget(self)
+        self.tblStatistics.setColumnCount(6)
+        self.tblStatistics.setHorizontalHeaderLabels([self.tr('Lesson'), self.tr('Step'), self.tr('Kind'),
+                                                      self.tr('Count'), self.tr('p50 (ms)'), self.tr('p95 (ms)')])
+        self.tblStatistics.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.tblStatistics.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.tblStatistics.verticalHeader().setVisible(False)
+        self.tblStatistics.horizontalHeader().setStretchLastSection(True)
+
+        self.buttonBox = QDialogButtonBox(QDialogButtonBox.Close, self)
+        self.btnExport = self.buttonBox.addButton(self.tr('Export JSON…'), QDialogButtonBox.ActionRole)
+        self.btnClear = self.buttonBox.addButton(self.tr('Clear'), QDialogButtonBox.ResetRole)
+        self.buttonBox.rejected.connect(self.reject)
+        self.btnExport.clicked.connect(self.exportStatistics)
+        self.btnClear.clicked.connect(self.clearStatistics)
+
+        layout = QVBoxLayout(self)
+        layout.addWidget(self.tblStatistics)
+        layout.addWidget(self.buttonBox)
+
+        self.populateTable()
+
+    def populateTable(self):
+        summary = self.statistics.summary()
+
+        self.tblStatistics.setSortingEnabled(False)
+        self.tblStatistics.setRowCount(len(summary))
+        for row, item in enumerate(summary):
+            self.tblStatistics.setItem(row, 0, QTableWidgetItem(item['lesson']))
+            self.tblStatistics.setItem(row, 1, _NumberItem(item['step'], str(item['step'] + 1)))
+            self.tblStatistics.setItem(row, 2, QTableWidgetItem(item['kind']))
+            self.tblStatistics.setItem(row, 3, _NumberItem(item['count'], str(item['count'])))
+            self.tblStatistics.setItem(row, 4, _NumberItem(item['p50'], '{:.1f}'.format(item['p50'] * 1000)))
+            self.tblStatistics.setItem(row, 5, _NumberItem(item['p95'], '{:.1f}'.format(item['p95'] * 1000)))
+
+        self.tblStatistics.setSortingEnabled(True)
+        self.tblStatistics.sortItems(5, Qt.DescendingOrder)
+        self.tblStatistics.resizeColumnsToContents()
+
+    def exportStatistics(self):
+        settings = QgsSettings()
+        lastDirectory = settings.value('qlesson/lastStatisticsDirectory', os.path.expanduser('~'), str)
+        fileName, _ = QFileDialog.getSaveFileName(self,
+                                                  self.tr('Export statistics'),
+                                                  os.path.join(lastDirectory, 'qlesson_statistics.json'),
+                                                  self.tr('JSON files (*.json *.JSON)')
+                                                 )
+        if not fileName:
+            return
+
+        settings.setValue('qlesson/lastStatisticsDirectory', os.path.dirname(fileName))
+        try:
+            self.statistics.exportJson(fileName)
+        except OSError as e:
+            QMessageBox.warning(self, self.tr('QLesson'), self.tr('Can not export statistics: {}').format(e))
+
+    def clearStatistics(self):
+        reply = QMessageBox.question(self, self.tr('QLesson'),
+                                     self.tr('Remove all collected lesson step statistics?'))
+        if reply == QMessageBox.Yes:
+            self.statistics.clear()
+            self.populateTable()
@@ -0,0 +1,200 @@
+# -*- coding: utf-8 -*-
+"""
+/***************************************************************************
+lessonwatcher.py
+    ---------------------
+        Date                 : 2023-07-07
+        git sha              : $Format:%H$
+        copyright            : (C) 2023 by Pascal Ogola
+        email                : passies95@gmail.com
+ ***************************************************************************/
+
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+"""
+
+__author__ = 'Pascal Ogola'
+__date__ = 'July 2023'
+__copyright__ = '(C) 2023, Pascal Ogola'
+
+# This will get replaced with a git SHA1 when you do a git archive
+
+__revision__ = '$Format:%H$'
+
+import os
+
+from qgis.core import Qgis, QgsMessageLog
+from qgis.PyQt.QtCore import QObject, QCoreApplication, QTimer, QFileSystemWatcher
+
+
+def lessonDirectories(containers):
+    """Returns dict with names of the subdirectories of every container.
+    Only touches the file system, so it is safe to run in a worker
+    thread.
+    """
+    directories = dict()
+    for container in containers:
+        container = os.path.abspath(container)
+        directories[container] = _subdirectories(container)
+
+    return directories
+
+
+def _subdirectories(directory):
+    try:
+        return {entry.name for entry in os.scandir(directory) if entry.is_dir()}
+    except OSError:
+        return set()
+
+
+class LessonWatcher(QObject):
+    """Watches lesson paths and refreshes only the affected lessons.
+
+    Watched are the user lesson paths (for added or removed group
+    directories), directories holding lessons and their subdirectories,
+    so one watch is used per lesson. A lesson directory fires when
+    lesson.yaml or a locale directory is added, removed or replaced, the
+    lesson is then reloaded and its localized files are indexed again.
+    Bursts of change notifications are collected for DEBOUNCE_MSEC
+    before the registry is refreshed.
+    """
+
+    DEBOUNCE_MSEC = 500
+
+    def __init__(self, registry, parent=None):
+        super(LessonWatcher, self).__init__(parent)
+
+        self.registry = registry
+
+        self.watcher = QFileSystemWatcher(self)
+        self.watcher.directoryChanged.connect(self._directoryChanged)
+
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(self.DEBOUNCE_MSEC)
+        self.timer.timeout.connect(self.processChanges)
+
+        self._parents = set()
+        # subdirectory names of every directory holding lessons
+        self._containers = dict()
+        self._watched = set()
+
+        self._changedDirectories = set()
+
+    def watch(self, lessonPaths, directories):
+        """Starts watching the lesson paths. Directories are the lesson
+        directories of every container, as returned by lessonDirectories().
+        """
+        self.clear()
+
+        self._parents = {os.path.abspath(p) for p in lessonPaths[1:] if os.path.isdir(p)}
+        self._containers = dict(directories)
+
+        paths = list(self._parents)
+        for container, names in self._containers.items():
+            paths.append(container)
+            paths.extend(os.path.join(container, name) for name in names)
+        self._addPaths(paths)
+
+    def clear(self):
+        self.timer.stop()
+        if self._watched:
+            self.watcher.removePaths(list(self._watched))
+
+        self._parents = set()
+        self._containers = dict()
+        self._watched = set()
+        self._changedDirectories = set()
+
+    def processChanges(self):
+        directories = self._changedDirectories
+        self._changedDirectories = set()
+
+        roots = set()
+        for path in directories:
+            if path in self._parents:
+                roots.update(self._parentChanged(path))
+            elif path in self._containers:
+                roots.update(self._containerChanged(path))
+            else:
+                # lesson directory, or a subdirectory which was not a
+                # lesson when last seen
+                roots.add(path)
+
+        if not roots:
+            return
+
+        self.registry.refreshLessons(roots)
+
+        for root in roots:
+            self._watchLessonDirectory(root)
+
+    def _directoryChanged(self, path):
+        self._changedDirectories.add(path)
+        self.timer.start()
+
+    def _parentChanged(self, parent):
+        current = {os.path.join(parent, name) for name in _subdirectories(parent)}
+        known = {c for c in self._containers if os.path.dirname(c) == parent}
+
+        roots = set()
+        for container in current - known:
+            roots.update(os.path.join(container, name) for name in self._addContainer(container))
+
+        for container in known - current:
+            names = self._containers.pop(container)
+            roots.update(os.path.join(container, name) for name in names)
+            self._removePaths([container] + [os.path.join(container, name) for name in names])
+
+        return roots
+
+    def _containerChanged(self, container):
+        current = _subdirectories(container)
+        known = self._containers[container]
+        self._containers[container] = current
+
+        # added and removed lesson directories
+        return {os.path.join(container, name) for name in current ^ known}
+
+    def _addContainer(self, container):
+        names = _subdirectories(container)
+        self._containers[container] = names
+        self._addPaths([container] + [os.path.join(container, name) for name in names])
+
+        return names
+
+    def _watchLessonDirectory(self, root):
+        # directories which were removed and created again are dropped
+        # by the watcher, so they are always added again
+        self._removePaths([root])
+        if os.path.isdir(root):
+            self._addPaths([root])
+
+    def _addPaths(self, paths):
+        paths = [p for p in paths if p not in self._watched]
+        if not paths:
+            return
+
+        # paths fail once the watch limit of the system is reached
+        failed = self.watcher.addPaths(paths)
+        self._watched.update(paths)
+        if failed:
+            self._watched.difference_update(failed)
+            QgsMessageLog.logMessage(self.tr('Can not watch {} lesson directories, changes to them are not picked up '
+                                             'until lessons are loaded again:\n{}').format(len(failed), '\n'.join(failed[:20])),
+                                     'QLesson', Qgis.Warning)
+
+    def _removePaths(self, paths):
+        paths = [p for p in paths if p in self._watched]
+        if paths:
+            self.watcher.removePaths(paths)
+            self._watched.difference_update(paths)
+
+    def tr(self, text):
+        return QCoreApplication.translate('LessonWatcher', text)
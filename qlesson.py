@@ -26,9 +26,6 @@ from qgis.PyQt.QtGui import QIcon
 from qgis.PyQt.QtWidgets import QAction
 # Initialize Qt resources from file resources.py
 from .resources import *
-
-# Import the code for the DockWidget
-from .qlesson_dockwidget import QlessonDockWidget
 import os.path
 
 
@@ -176,6 +173,13 @@ class Qlesson:
             callback=self.run,
             parent=self.iface.mainWindow())
 
+        self.add_action(
+            icon_path,
+            text=self.tr(u'Lesson Statistics…'),
+            callback=self.showStatistics,
+            add_to_toolbar=False,
+            parent=self.iface.mainWindow())
+
     #--------------------------------------------------------------------------
 
     def onClosePlugin(self):
@@ -208,6 +212,11 @@ class Qlesson:
         # remove the toolbar
         del self.toolbar
 
+    def showStatistics(self):
+        from .lessonstatsdialog import LessonStatisticsDialog
+        dlg = LessonStatisticsDialog(self.iface.mainWindow())
+        dlg.exec_()
+
     #--------------------------------------------------------------------------
 
     def run(self):
@@ -222,6 +231,10 @@ class Qlesson:
             #    first run of plugin
             #    removed on close (see self.onClosePlugin method)
             if self.dockwidget == None:
+                # dock widget, its UI, the lesson registry and PyYAML are
+                # only loaded once the plugin is opened for the first time
+                from .qlesson_dockwidget import QlessonDockWidget
+
                 # Create the dockwidget (after translation) and keep reference
                 self.dockwidget = QlessonDockWidget()
 
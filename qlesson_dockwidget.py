@@ -23,22 +23,31 @@
 """
 
 import os
+import time
 #import configparser
 
-from qgis.PyQt import uic
 from qgis.PyQt.QtGui import QPixmap, QDesktopServices, QIcon, QTextDocument, QPalette, QColor
-from qgis.PyQt.QtCore import pyqtSignal, Qt, QUrl
-from qgis.PyQt.QtWidgets import QDialog, QDockWidget, QMessageBox, QTreeWidgetItem, QFileDialog, QListWidgetItem, QAbstractItemView
+from qgis.PyQt.QtCore import pyqtSignal, Qt, QUrl, QTimer
+from qgis.PyQt.QtWidgets import QDialog, QDockWidget, QMessageBox, QFileDialog, QListWidgetItem, QAbstractItemView
 
 from qgis.gui import QgsGui
-from qgis.core import QgsSettings, QgsApplication
+from qgis.core import QgsSettings, QgsApplication, QgsMessageLog
 from qgis.utils import iface, OverrideCursor
 
 # import the lessonregistry.py, aboutpage.py, lesson.py modules from the root and gui folder
 from .lessonregistry import QLessonRegistry
+from .lessonloader import LessonLoaderTask, LessonInstallTask
+from .lessonlibrarymodel import LessonLibraryModel
+from .lessonsearch import LessonSearchIndex
+from .lessonwatcher import LessonWatcher
+from .steprunner import StepRunner
+from .stepprefetch import StepPrefetchTask
+from .descriptioncache import descriptionCache
+from .lessonstats import lessonStatistics
 from .gui.aboutpage import get_metadata as aboutpagemetadata
 from .lesson import LessonStep
-from .lesson_finisheddialog import LessonFinalizedDialog
+from .lesson_utils import loadUiForm
+from . import lessonbundle
 
 # Instatiate the LessonRegistry
 lessonsRegistry = QLessonRegistry()
@@ -52,16 +61,13 @@ default_lessons_directory = os.path.normpath(os.path.join(current_dir, 'lessons'
 BASE_COLOR = QgsApplication.palette().brush(QPalette.Active, QPalette.Base)
 ACTIVE_COLOR = QColor(134, 176, 81, 255)
 
-FORM_CLASS, _ = uic.loadUiType(os.path.join(
-    current_dir, 'qlesson_dockwidget_base.ui'))
+FORM_CLASS = loadUiForm(os.path.join(current_dir, 'qlesson_dockwidget_base.ui'))
 
 
 class QlessonDockWidget(QDockWidget, FORM_CLASS):
 
     closingPlugin = pyqtSignal()
     lessonFinished = pyqtSignal()
-    GROUP_ITEM = QTreeWidgetItem.UserType
-    LESSON_ITEM = QTreeWidgetItem.UserType + 1
 
     def __init__(self, parent=None):
         """Constructor."""
@@ -93,22 +99,90 @@ class QlessonDockWidget(QDockWidget, FORM_CLASS):
         self.btnRemoveLessons.clicked.connect(self.removeLessons)
         self.btnStartLesson.clicked.connect(self.onStartLessonBtnClicked)
 
-        self.treeLessons.itemExpanded.connect(self.updateIcon)
-        self.treeLessons.itemCollapsed.connect(self.updateIcon)
-        self.treeLessons.currentItemChanged.connect(self.updateInformation)
-
         self.iconExpanded = QgsApplication.getThemeIcon('/mIconFolderOpen.svg')
         self.iconCollapsed = QgsApplication.getThemeIcon('/mIconFolder.svg')
         self.iconLesson = QIcon(os.path.join(pluginPath, 'icons', 'lesson.svg'))
 
-        myLessonPaths = self.addLessonPathToList()
-        #Load the lesson by running the loadlessons method from the lesson registry
-        lessonsRegistry.loadLessons(myLessonPaths)
-
-        self.populateTree()
+        # library tree follows registry changes, so it never has to be
+        # rebuilt after lessons are installed or removed
+        self.libraryModel = LessonLibraryModel(lessonsRegistry,
+                                               self.iconCollapsed,
+                                               self.iconExpanded,
+                                               self.iconLesson,
+                                               self)
+        self.treeLessons.setModel(self.libraryModel)
+
+        self.treeLessons.expanded.connect(self.updateIcon)
+        self.treeLessons.collapsed.connect(self.updateIcon)
+        self.treeLessons.selectionModel().currentChanged.connect(self.updateInformation)
+
+        # search index follows registry changes as well, results are
+        # refreshed shortly after the user stops typing or lessons change
+        self.searchIndex = LessonSearchIndex(lessonsRegistry, self)
+        self.searchTimer = QTimer(self)
+        self.searchTimer.setSingleShot(True)
+        self.searchTimer.setInterval(150)
+        self.searchTimer.timeout.connect(self.applySearch)
+        self.leSearchLessons.textChanged.connect(self.searchTimer.start)
+        self.searchIndex.indexChanged.connect(self.onSearchIndexChanged)
+
+        self.loaderTask = None
+        self.btnCancelLoading.clicked.connect(self.cancelLoading)
+
+        # pick up lessons added, changed or removed on disk
+        self.lessonWatcher = LessonWatcher(lessonsRegistry, self)
+
+        # Load lessons from all lesson paths in the background, tree
+        # is populated as lessons arrive
+        self.loadLibrary()
         # Focus the qtwContentsTabs widget to the index 0
         self.qtwContentsTabs.setCurrentIndex(0)
-        
+
+    def loadLibrary(self):
+        if self.loaderTask is not None:
+            return
+
+        myLessonPaths = self.addLessonPathToList()
+        # show lessons known from the previous session right away, the
+        # loader only delivers new ones and refreshes changed ones
+        lessonsRegistry.loadCatalog(myLessonPaths)
+
+        self.loaderTask = LessonLoaderTask(lessonsRegistry, myLessonPaths)
+        self.loaderTask.definitionsLoaded.connect(self.onLessonsLoaded)
+        self.loaderTask.progressChanged.connect(self.onLoadingProgress)
+        self.loaderTask.taskCompleted.connect(self.onLoadingFinished)
+        self.loaderTask.taskTerminated.connect(self.onLoadingFinished)
+
+        self.progressLessons.setFormat(self.tr('Loading lessons… %p%'))
+        self.progressLessons.setValue(0)
+        self.progressLessons.setVisible(True)
+        self.btnCancelLoading.setVisible(True)
+
+        QgsApplication.taskManager().addTask(self.loaderTask)
+
+    def cancelLoading(self):
+        if self.loaderTask is not None:
+            self.loaderTask.cancel()
+
+    def onLessonsLoaded(self, definitions):
+        lessonsRegistry.addLessonDefinitions(definitions)
+
+    def onLoadingProgress(self, progress):
+        self.progressLessons.setValue(int(progress))
+
+    def onLoadingFinished(self):
+        task = self.loaderTask
+        self.loaderTask = None
+        self.progressLessons.setVisible(False)
+        self.btnCancelLoading.setVisible(False)
+
+        # installed lessons are picked up through the watched lesson
+        # paths, so only a full load starts watching again
+        if isinstance(task, LessonLoaderTask):
+            self.lessonWatcher.watch(task.lessonPaths, task.lessonDirectories)
+        lessonsRegistry.reportUnresolvedMenus()
+        lessonsRegistry.reportRecommendationProblems()
+
     def addLessons(self):
         settings = QgsSettings()
         lastDirectory = settings.value('qlesson/lastLessonDirectory', os.path.expanduser('~'), str)
@@ -118,26 +192,74 @@ class QlessonDockWidget(QDockWidget, FORM_CLASS):
                                                   self.tr('ZIP archives (*.zip *.ZIP)')
                                                  )
         if fileName:
-            with OverrideCursor(Qt.WaitCursor):
-                settings.setValue('qlesson/lastLessonDirectory', os.path.dirname(fileName))
-                lessonsRegistry.installLessonsFromZip(fileName)
-                self.populateTree()
+            settings.setValue('qlesson/lastLessonDirectory', os.path.dirname(fileName))
+            self.installLessons(fileName)
+
+    def installLessons(self, fileName):
+        if self.loaderTask is not None:
+            QMessageBox.information(self, self.tr('QLesson'),
+                                    self.tr('Please wait until lessons are loaded.'))
+            return
+
+        self.loaderTask = LessonInstallTask(lessonsRegistry, fileName)
+        self.loaderTask.progressChanged.connect(self.onLoadingProgress)
+        self.loaderTask.taskCompleted.connect(self.onLoadingFinished)
+        self.loaderTask.taskTerminated.connect(self.onInstallFailed)
+
+        self.progressLessons.setFormat(self.tr('Installing lessons… %p%'))
+        self.progressLessons.setValue(0)
+        self.progressLessons.setVisible(True)
+        self.btnCancelLoading.setVisible(True)
+
+        QgsApplication.taskManager().addTask(self.loaderTask)
+
+    def onInstallFailed(self):
+        canceled = self.loaderTask.isCanceled()
+        self.onLoadingFinished()
+        if not canceled:
+            QMessageBox.warning(self, self.tr('QLesson'),
+                                self.tr('Lessons could not be installed. See QGIS log for details.'))
 
     def removeLessons(self):
+        lessonId = self.currentLessonId()
+        if lessonId is None:
+            return
+
         with OverrideCursor(Qt.WaitCursor):
-            lessonId = self.treeLessons.currentItem().data(0, Qt.UserRole)
             lessonsRegistry.uninstallLesson(lessonId)
-            self.populateTree()
+
+    def currentLessonId(self):
+        index = self.treeLessons.currentIndex()
+        if not index.isValid() or index.data(LessonLibraryModel.ItemTypeRole) != LessonLibraryModel.LessonItem:
+            return None
+
+        return index.data(Qt.UserRole)
 
     def onStartLessonBtnClicked(self):
         # Retrieve the current lesson
-        currentlesson = lessonsRegistry.lessonById(self.treeLessons.currentItem().data(0, Qt.UserRole))
+        currentlesson = lessonsRegistry.lessonById(self.currentLessonId())
+        if currentlesson is None:
+            self.btnStartLesson.setEnabled(False)
+            return
+
+        self.startLesson(currentlesson)
+
+    def startLesson(self, lesson):
+        # steps are only built when lesson is started
+        with OverrideCursor(Qt.WaitCursor):
+            loaded = lesson.materialize()
+
+        if not loaded:
+            QMessageBox.warning(self, self.tr('QLesson'),
+                                self.tr('Can not load lesson "{}". See QGIS log for details.').format(lesson.displayName))
+            return
+
         # Enable the LessonTab and Switch to it
         self.lessonTab.setEnabled(True)
         self.qtwContentsTabs.setCurrentIndex(1)
         # Disable the libraryTab so that the user may not select another lesson 
         # until current lesson is finalized
-        self.startCurrentLesson(currentlesson)
+        self.startCurrentLesson(lesson)
         self.libraryTab.setEnabled(False)
 
     # Set up the lesson page widgets
@@ -145,9 +267,29 @@ class QlessonDockWidget(QDockWidget, FORM_CLASS):
         self.btnNextStep.clicked.connect(self.onNextStepBtnClicked)
         self.btnExecuteStep.clicked.connect(self.onExecuteStepBtnClicked)
         self.btnRestartLesson.clicked.connect(self.onRestartLessonBtnClicked)
+
+        # step functions which may take long run as background tasks
+        self.stepRunner = StepRunner(self)
+        self.stepRunner.busyChanged.connect(self.onStepBusyChanged)
+        self.stepRunner.progressChanged.connect(self.onStepProgress)
+        self.stepRunner.functionFailed.connect(self.onStepFunctionFailed)
+        self.btnCancelStep.clicked.connect(self.stepRunner.cancel)
+
+        # created here, so settings are not read from a prefetch task
+        self.descriptionCache = descriptionCache()
+        self.statistics = lessonStatistics()
+        self.transitionStart = None
+
+        self.finalizedDialog = None
+
+        # next step is loaded while the user works on the current one
+        self.prefetching = None
+        self.prefetched = None
         #self.btnQuitLesson.clicked.connect(self.onQuitLessonBtnClicked)
 
     def startCurrentLesson(self, lesson):
+        self.stepRunner.cancel()
+
         self.lesson = lesson
         self.currentStep = 0
         self.running = True
@@ -173,16 +315,24 @@ class QlessonDockWidget(QDockWidget, FORM_CLASS):
     # #----------------------------------------------------------------------------------------------
     # LessonTab buttons
     def onNextStepBtnClicked(self):
+        if self.stepRunner.isBusy():
+            return
+
         step = self.lesson.steps[self.currentStep]
         # execute check function if any
         if step.check is not None:
-            passed = step.runFunction(LessonStep.FunctionType.Check)
-            if not passed:
-                msg = self.tr('Looks like you have not completed a step. Please '
-                              'recheck all instructions and try again.')
-                QMessageBox.warning(self, self.tr('QLesson'), msg)
-                return
+            self._runStepFunction(LessonStep.FunctionType.Check, self._stepChecked)
+        else:
+            self._stepChecked(True)
+
+    def _stepChecked(self, passed):
+        if not passed:
+            msg = self.tr('Looks like you have not completed a step. Please '
+                          'recheck all instructions and try again.')
+            QMessageBox.warning(self, self.tr('QLesson'), msg)
+            return
 
+        step = self.lesson.steps[self.currentStep]
         # disconnect signals if any
         if step.signal is not None:
             step.signal.disconnect(self.signalEmmited)
@@ -193,15 +343,43 @@ class QlessonDockWidget(QDockWidget, FORM_CLASS):
         self._stepUp()
 
     def onExecuteStepBtnClicked(self):
-        step = self.lesson.steps[self.currentStep]
-        self.setEnabled(False)
-        with OverrideCursor(Qt.WaitCursor):
-            step.runFunction(LessonStep.FunctionType.Execute)
+        if self.stepRunner.isBusy():
+            return
+
+        self._runStepFunction(LessonStep.FunctionType.Execute, lambda result: self.onNextStepBtnClicked())
+
+    def _runStepFunction(self, functionType, callback):
+        lesson = self.lesson
+        index = self.currentStep
+
+        def _done(result):
+            # ignore results arriving after the lesson was restarted
+            if self.lesson is lesson and self.currentStep == index:
+                callback(result)
 
-        self.setEnabled(True)
-        self.onNextStepBtnClicked()
+        self.stepRunner.run(lesson.steps[index], functionType, _done)
+
+    def onStepBusyChanged(self, busy):
+        self.progressStep.setValue(0)
+        self.progressStep.setVisible(busy)
+        self.btnCancelStep.setVisible(busy)
+
+        self.btnNextStep.setEnabled(not busy)
+        self.btnRestartLesson.setEnabled(not busy)
+        if busy:
+            self.btnExecuteStep.setEnabled(False)
+        elif self.currentStep < len(self.lesson.steps):
+            self.btnExecuteStep.setEnabled(self.lesson.steps[self.currentStep].execute is not None)
+
+    def onStepProgress(self, progress):
+        self.progressStep.setValue(int(progress))
+
+    def onStepFunctionFailed(self, error):
+        QMessageBox.warning(self, self.tr('QLesson'),
+                            self.tr('Lesson step failed. See QGIS log for details.'))
 
     def onRestartLessonBtnClicked(self):
+        self.stepRunner.cancel()
         self.lstSteps.item(self.currentStep).setIcon(self.iconEmpty)
         self.lstSteps.item(self.currentStep).setBackground(BASE_COLOR)
         self._restoreNextButton()
@@ -226,10 +404,13 @@ class QlessonDockWidget(QDockWidget, FORM_CLASS):
     #             self.lessonFinished.emit()
 
     def _stepUp(self):
+        self.transitionStart = time.perf_counter()
+
         # this was the last step, lesson finished
         if self.currentStep == len(self.lesson.steps):
-            dlg = LessonFinalizedDialog(iface.mainWindow())
-            dlg.setRecommendedLesson(self.lesson.recommended)
+            self.statistics.flush()
+            dlg = self.lessonFinalizedDialog()
+            dlg.setFinishedLesson(self.lesson)
             result = dlg.exec_()
             if result:
                 self.startLesson(dlg.lesson)
@@ -253,27 +434,80 @@ class QlessonDockWidget(QDockWidget, FORM_CLASS):
             if step.signal is not None:
                 step.signal.connect(self.signalEmmited)
 
+            prefetched = self._takePrefetched(self.currentStep)
+            # start loading the following step right away
+            self._prefetchStep(self.currentStep + 1)
+
             # load step description
-            if os.path.exists(step.description):
-                url = QUrl.fromUserInput(step.description)
-                self.txtDescription.document().setMetaInformation(QTextDocument.DocumentUrl,
-                                                                  os.path.dirname(url.toString()))
-                self.txtDescription.setSource(url)
+            start = time.perf_counter()
+            self._showDescription(self.txtDescription, step.description)
+            self.statistics.record(self.lesson.id, self.currentStep, 'description', time.perf_counter() - start)
+
+            self.btnExecuteStep.setEnabled(False)
+            if prefetched is not None and prefetched['prepared']:
+                self._stepPrepared(prefetched['result'])
+            elif step.prepare is not None:
+                self._runStepFunction(LessonStep.FunctionType.Prepare, self._stepPrepared)
             else:
-                self.txtDescription.setHtml(step.description)
-
-            if step.prepare is not None:
-                with OverrideCursor(Qt.WaitCursor):
-                    step.runFunction(LessonStep.FunctionType.Prepare)
-
-            if step.execute is not None:
-                if step.type == LessonStep.StepType.Automated:
-                    self.onExecuteStepBtnClicked()
-                else:
-                    # FIXME: button state depending of existence of signals
-                    self.btnExecuteStep.setEnabled(True)
+                self._stepPrepared(None)
+
+    def _prefetchStep(self, index):
+        if self.prefetching is not None:
+            self.prefetching[2].cancel()
+            self.prefetching = None
+
+        if index >= len(self.lesson.steps):
+            return
+
+        task = StepPrefetchTask(self.lesson.steps[index])
+        task.taskCompleted.connect(lambda: self._prefetchFinished(task))
+        self.prefetching = (self.lesson, index, task)
+        QgsApplication.taskManager().addTask(task)
+
+    def _prefetchFinished(self, task):
+        if self.prefetching is None or self.prefetching[2] is not task:
+            return
+
+        # keep only the results, task is deleted by the task manager
+        lesson, index, _ = self.prefetching
+        self.prefetching = None
+        self.prefetched = {'lesson': lesson,
+                           'index': index,
+                           'prepared': task.prepared,
+                           'result': task.prepareResult
+                          }
+
+    def _takePrefetched(self, index):
+        prefetched = self.prefetched
+        self.prefetched = None
+        if prefetched is None or prefetched['lesson'] is not self.lesson or prefetched['index'] != index:
+            return None
+
+        return prefetched
+
+    def _stepPrepared(self, result):
+        # time from leaving the previous step until this one is ready
+        self.statistics.record(self.lesson.id, self.currentStep, 'transition',
+                               time.perf_counter() - self.transitionStart)
+
+        step = self.lesson.steps[self.currentStep]
+        if step.execute is not None:
+            if step.type == LessonStep.StepType.Automated:
+                self.onExecuteStepBtnClicked()
             else:
-                self.btnExecuteStep.setEnabled(False)
+                # FIXME: button state depending of existence of signals
+                self.btnExecuteStep.setEnabled(True)
+        else:
+            self.btnExecuteStep.setEnabled(False)
+
+    def lessonFinalizedDialog(self):
+        # dialog is created when the first lesson is finished and reused
+        if self.finalizedDialog is None:
+            from .lesson_finisheddialog import LessonFinalizedDialog
+            self.finalizedDialog = LessonFinalizedDialog(iface.mainWindow())
+
+        self.finalizedDialog.lesson = None
+        return self.finalizedDialog
 
     def signalEmmited(self, *args):
         step = self.lesson.steps[self.currentStep]
@@ -308,44 +542,51 @@ class QlessonDockWidget(QDockWidget, FORM_CLASS):
                                                                                          homepage=homepage,
                                                                                          bugtracker=bugs)))
 
-    def populateTree(self):
-        self.treeLessons.clear()
-
-        for groupId, groupName in lessonsRegistry.groups.items():
-            groupItem = QTreeWidgetItem(self.treeLessons, self.GROUP_ITEM)
-            groupItem.setText(0, groupName)
-            groupItem.setData(0, Qt.DecorationRole, self.iconCollapsed)
-            groupItem.setData(0, Qt.UserRole, groupId)
-            for lessonId, lesson in lessonsRegistry.lessons[groupId].items():
-                lessonItem = QTreeWidgetItem(groupItem, self.LESSON_ITEM)
-                lessonItem.setText(0, lesson.displayName)
-                lessonItem.setData(0, Qt.DecorationRole, self.iconLesson)
-                lessonItem.setData(0, Qt.UserRole, lessonId)
-
-            self.treeLessons.addTopLevelItem(groupItem)
-            
-    def updateIcon(self, item):
-        if item.isExpanded():
-            item.setData(0, Qt.DecorationRole, self.iconExpanded)
-        else:
-            item.setData(0, Qt.DecorationRole, self.iconCollapsed)
+    def updateIcon(self, index):
+        self.libraryModel.setGroupExpanded(index, self.treeLessons.isExpanded(index))
+
+    def onSearchIndexChanged(self):
+        if self.leSearchLessons.text().strip():
+            self.searchTimer.start()
+
+    def applySearch(self):
+        text = self.leSearchLessons.text().strip()
+        if not text:
+            if self.libraryModel.isFiltered():
+                self.libraryModel.setSearchResults(None)
+            return
+
+        self.libraryModel.setSearchResults(self.searchIndex.search(text))
+        for row in range(self.libraryModel.rowCount()):
+            self.treeLessons.expand(self.libraryModel.index(row, 0))
 
     def updateInformation(self, current, previous):
-        if current is None or current.type() == self.GROUP_ITEM:
+        if not current.isValid() or current.data(LessonLibraryModel.ItemTypeRole) == LessonLibraryModel.GroupItem:
             self.lessontxtInfo.clear()
             self.btnStartLesson.setEnabled(False)
         else:
-            lesson = lessonsRegistry.lessonById(current.data(0, Qt.UserRole))
+            lesson = lessonsRegistry.lessonById(current.data(Qt.UserRole))
             if lesson:
-                if os.path.exists(lesson.description):
-                    url = QUrl.fromUserInput(lesson.description)
-                    self.lessontxtInfo.document().setMetaInformation(QTextDocument.DocumentUrl,
-                                                               os.path.dirname(url.toString()))
-                    self.lessontxtInfo.setSource(url)
-                else:
-                    self.lessontxtInfo.setHtml(lesson.description)
-
+                self._showDescription(self.lessontxtInfo, lesson.description)
                 self.btnStartLesson.setEnabled(True)
+            else:
+                # the lesson was removed while the item was current
+                self.lessontxtInfo.clear()
+                self.btnStartLesson.setEnabled(False)
+
+    def _showDescription(self, browser, description):
+        if not lessonbundle.isFile(description):
+            browser.setHtml(description)
+            return
+
+        try:
+            self.descriptionCache.document(description).show(browser)
+        except (OSError, UnicodeDecodeError):
+            # let the browser deal with the file
+            url = QUrl.fromUserInput(description)
+            browser.document().setMetaInformation(QTextDocument.DocumentUrl,
+                                                  os.path.dirname(url.toString()))
+            browser.setSource(url)
     
     def set_settings_page(self):
         self.btnAddLessonPath.setIcon(QgsApplication.getThemeIcon('symbologyAdd.svg'))
@@ -399,6 +640,11 @@ class QlessonDockWidget(QDockWidget, FORM_CLASS):
     
 
     def closeEvent(self, event):
+        hits, misses, count, size = self.descriptionCache.statistics()
+        QgsMessageLog.logMessage(self.tr('Description cache: {} hits, {} misses, {} documents, {:.1f} MB').format(hits, misses, count, size / 1048576.0), 'QLesson')
+        self.statistics.flush()
+        self.searchIndex.cancel()
+
         self.closingPlugin.emit()
         event.accept()
 
@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+"""
+/***************************************************************************
+stepprefetch.py
+    ---------------------
+        Date                 : 2023-07-07
+        git sha              : $Format:%H$
+        copyright            : (C) 2023 by Pascal Ogola
+        email                : passies95@gmail.com
+ ***************************************************************************/
+
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+"""
+
+__author__ = 'Pascal Ogola'
+__date__ = 'July 2023'
+__copyright__ = '(C) 2023, Pascal Ogola'
+
+# This will get replaced with a git SHA1 when you do a git archive
+
+__revision__ = '$Format:%H$'
+
+import traceback
+
+from qgis.core import QgsTask, QgsFeedback, QgsMessageLog
+from qgis.PyQt.QtCore import QCoreApplication
+
+from .lesson import LessonStep
+from .descriptioncache import descriptionCache
+from . import lessonbundle
+
+
+class StepPrefetchTask(QgsTask):
+    """Loads description of the upcoming step into the description cache
+    and runs its prepare function ahead of time, if the function is
+    thread-safe and free of side effects.
+    """
+
+    def __init__(self, step):
+        super(StepPrefetchTask, self).__init__(self.tr('Preparing lesson step "{}"').format(step.name), QgsTask.CanCancel)
+
+        self.step = step
+        self.feedback = QgsFeedback()
+
+        self.prepared = False
+        self.prepareResult = None
+
+    def run(self):
+        if lessonbundle.isFile(self.step.description):
+            try:
+                descriptionCache().document(self.step.description)
+            except (OSError, UnicodeDecodeError):
+                # step will load description itself when it is shown
+                pass
+
+        if self.isCanceled():
+            return False
+
+        if self.step.canPrepareAhead():
+            try:
+                self.prepareResult = self.step.runFunction(LessonStep.FunctionType.Prepare, self.feedback)
+                self.prepared = not self.feedback.isCanceled()
+            except Exception:
+                QgsMessageLog.logMessage(self.tr('Running prepare of "{}" ahead of time failed:\n{}').format(self.step.name, traceback.format_exc()), 'QLesson')
+
+        return not self.isCanceled()
+
+    def cancel(self):
+        self.feedback.cancel()
+        super(StepPrefetchTask, self).cancel()
+
+    def tr(self, text):
+        return QCoreApplication.translate('StepPrefetchTask', text)
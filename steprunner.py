@@ -0,0 +1,140 @@
+# -*- coding: utf-8 -*-
+"""
+/***************************************************************************
+steprunner.py
+    ---------------------
+        Date                 : 2023-07-07
+        git sha              : $Format:%H$
+        copyright            : (C) 2023 by Pascal Ogola
+        email                : passies95@gmail.com
+ ***************************************************************************/
+
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+"""
+
+__author__ = 'Pascal Ogola'
+__date__ = 'July 2023'
+__copyright__ = '(C) 2023, Pascal Ogola'
+
+# This will get replaced with a git SHA1 when you do a git archive
+
+__revision__ = '$Format:%H$'
+
+import traceback
+
+from qgis.core import QgsApplication, QgsTask, QgsFeedback, QgsMessageLog
+from qgis.PyQt.QtCore import Qt, QObject, QCoreApplication, pyqtSignal
+from qgis.utils import OverrideCursor
+
+
+class StepFunctionTask(QgsTask):
+    """Runs a prepare, execute or check function of the lesson step.
+
+    Function gets a QgsFeedback as "feedback" keyword argument if it
+    accepts one, canceling the task cancels the feedback.
+    """
+
+    def __init__(self, step, functionType, description):
+        super(StepFunctionTask, self).__init__(description, QgsTask.CanCancel)
+
+        self.step = step
+        self.functionType = functionType
+
+        self.feedback = QgsFeedback()
+        self.feedback.progressChanged.connect(self.setProgress, Qt.DirectConnection)
+
+        self.result = None
+        self.error = None
+
+    def run(self):
+        try:
+            self.result = self.step.runFunction(self.functionType, self.feedback)
+        except Exception:
+            self.error = traceback.format_exc()
+            return False
+
+        return not self.feedback.isCanceled()
+
+    def cancel(self):
+        self.feedback.cancel()
+        super(StepFunctionTask, self).cancel()
+
+
+class StepRunner(QObject):
+    """Runs lesson step functions and delivers their results.
+
+    Functions marked as thread-safe run as StepFunctionTask in the QGIS
+    task manager, all others run on the main thread. Only one function
+    runs at a time, the callback is called on the main thread with the
+    function result unless the function failed or was canceled.
+    """
+
+    busyChanged = pyqtSignal(bool)
+    progressChanged = pyqtSignal(float)
+    functionFailed = pyqtSignal(str)
+
+    def __init__(self, parent=None):
+        super(StepRunner, self).__init__(parent)
+
+        self.task = None
+
+    def isBusy(self):
+        return self.task is not None
+
+    def run(self, step, functionType, callback):
+        """Runs step function of the given type. Returns False if another
+        function is still running.
+        """
+        if self.task is not None:
+            return False
+
+        if not step.runsInBackground(functionType):
+            try:
+                with OverrideCursor(Qt.WaitCursor):
+                    result = step.runFunction(functionType)
+            except Exception:
+                self._failed(step, traceback.format_exc())
+                return True
+
+            callback(result)
+            return True
+
+        task = StepFunctionTask(step, functionType, self.tr('Running lesson step "{}"').format(step.name))
+        task.progressChanged.connect(self.progressChanged)
+        task.taskCompleted.connect(lambda: self._taskFinished(task, callback))
+        task.taskTerminated.connect(lambda: self._taskFinished(task, callback))
+
+        self.task = task
+        self.busyChanged.emit(True)
+        QgsApplication.taskManager().addTask(task)
+        return True
+
+    def cancel(self):
+        if self.task is not None:
+            self.task.cancel()
+
+    def _taskFinished(self, task, callback):
+        if task is not self.task:
+            return
+
+        self.task = None
+        self.busyChanged.emit(False)
+
+        if task.error is not None:
+            self._failed(task.step, task.error)
+        elif task.status() == QgsTask.Complete:
+            callback(task.result)
+
+    def _failed(self, step, error):
+        QgsMessageLog.logMessage(self.tr('Lesson step "{}" failed:\n{}').format(step.name, error), 'QLesson')
+        self.functionFailed.emit(error)
+
+    def tr(self, text):
+        return QCoreApplication.translate('StepRunner', text)
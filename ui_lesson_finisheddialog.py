@@ -0,0 +1,38 @@
+# -*- coding: utf-8 -*-
+
+# Form implementation generated from reading ui file 'lesson_finisheddialog.ui'
+#
+# Created by: PyQt5 UI code generator 5.15.11
+#
+# WARNING: Any manual changes made to this file will be lost when pyuic5 is
+# run again.  Do not edit this file unless you know what you are doing.
+
+
+from qgis.PyQt import QtCore, QtGui, QtWidgets
+
+
+class Ui_Dialog(object):
+    def setupUi(self, Dialog):
+        Dialog.setObjectName("Dialog")
+        Dialog.resize(400, 300)
+        self.verticalLayout = QtWidgets.QVBoxLayout(Dialog)
+        self.verticalLayout.setObjectName("verticalLayout")
+        self.txtRecommendedLesson = QtWidgets.QTextBrowser(Dialog)
+        self.txtRecommendedLesson.setTextInteractionFlags(QtCore.Qt.LinksAccessibleByKeyboard|QtCore.Qt.LinksAccessibleByMouse)
+        self.txtRecommendedLesson.setOpenLinks(False)
+        self.txtRecommendedLesson.setObjectName("txtRecommendedLesson")
+        self.verticalLayout.addWidget(self.txtRecommendedLesson)
+        self.lessonFinalizedBtn = QtWidgets.QDialogButtonBox(Dialog)
+        self.lessonFinalizedBtn.setOrientation(QtCore.Qt.Horizontal)
+        self.lessonFinalizedBtn.setStandardButtons(QtWidgets.QDialogButtonBox.Close)
+        self.lessonFinalizedBtn.setObjectName("lessonFinalizedBtn")
+        self.verticalLayout.addWidget(self.lessonFinalizedBtn)
+
+        self.retranslateUi(Dialog)
+        self.lessonFinalizedBtn.accepted.connect(Dialog.accept) # type: ignore
+        self.lessonFinalizedBtn.rejected.connect(Dialog.reject) # type: ignore
+        QtCore.QMetaObject.connectSlotsByName(Dialog)
+
+    def retranslateUi(self, Dialog):
+        _translate = QtCore.QCoreApplication.translate
+        Dialog.setWindowTitle(_translate("Dialog", "Lesson finished"))
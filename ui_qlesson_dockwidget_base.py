@@ -0,0 +1,243 @@
+# -*- coding: utf-8 -*-
+
+# Form implementation generated from reading ui file 'qlesson_dockwidget_base.ui'
+#
+# Created by: PyQt5 UI code generator 5.15.11
+#
+# WARNING: Any manual changes made to this file will be lost when pyuic5 is
+# run again.  Do not edit this file unless you know what you are doing.
+
+
+from qgis.PyQt import QtCore, QtGui, QtWidgets
+
+
+class Ui_Qlesson(object):
+    def setupUi(self, Qlesson):
+        Qlesson.setObjectName("Qlesson")
+        Qlesson.resize(545, 567)
+        Qlesson.setMinimumSize(QtCore.QSize(382, 450))
+        self.contentsMenu = QtWidgets.QWidget()
+        self.contentsMenu.setObjectName("contentsMenu")
+        self.gridLayout = QtWidgets.QGridLayout(self.contentsMenu)
+        self.gridLayout.setObjectName("gridLayout")
+        self.qtwContentsTabs = QtWidgets.QTabWidget(self.contentsMenu)
+        self.qtwContentsTabs.setFocusPolicy(QtCore.Qt.TabFocus)
+        self.qtwContentsTabs.setObjectName("qtwContentsTabs")
+        self.libraryTab = QtWidgets.QWidget()
+        self.libraryTab.setObjectName("libraryTab")
+        self.gridLayout_3 = QtWidgets.QGridLayout(self.libraryTab)
+        self.gridLayout_3.setObjectName("gridLayout_3")
+        self.leSearchLessons = QtWidgets.QLineEdit(self.libraryTab)
+        self.leSearchLessons.setClearButtonEnabled(True)
+        self.leSearchLessons.setObjectName("leSearchLessons")
+        self.gridLayout_3.addWidget(self.leSearchLessons, 0, 0, 1, 1)
+        self.librarySplitter = QtWidgets.QSplitter(self.libraryTab)
+        self.librarySplitter.setOrientation(QtCore.Qt.Vertical)
+        self.librarySplitter.setObjectName("librarySplitter")
+        self.treeLessons = QtWidgets.QTreeView(self.librarySplitter)
+        self.treeLessons.setEditTriggers(QtWidgets.QAbstractItemView.NoEditTriggers)
+        self.treeLessons.setProperty("showDropIndicator", False)
+        self.treeLessons.setUniformRowHeights(True)
+        self.treeLessons.setObjectName("treeLessons")
+        self.treeLessons.header().setVisible(False)
+        self.layoutWidget_2 = QtWidgets.QWidget(self.librarySplitter)
+        self.layoutWidget_2.setObjectName("layoutWidget_2")
+        self.lessonsGrid = QtWidgets.QGridLayout(self.layoutWidget_2)
+        self.lessonsGrid.setContentsMargins(0, 0, 0, 0)
+        self.lessonsGrid.setObjectName("lessonsGrid")
+        self.btnStartLesson = QtWidgets.QPushButton(self.layoutWidget_2)
+        self.btnStartLesson.setObjectName("btnStartLesson")
+        self.lessonsGrid.addWidget(self.btnStartLesson, 1, 3, 1, 1)
+        self.btnAddLessons = QtWidgets.QPushButton(self.layoutWidget_2)
+        self.btnAddLessons.setObjectName("btnAddLessons")
+        self.lessonsGrid.addWidget(self.btnAddLessons, 1, 0, 1, 1)
+        spacerItem = QtWidgets.QSpacerItem(13, 19, QtWidgets.QSizePolicy.Expanding, QtWidgets.QSizePolicy.Minimum)
+        self.lessonsGrid.addItem(spacerItem, 1, 2, 1, 1)
+        self.lessontxtInfo = QtWidgets.QTextBrowser(self.layoutWidget_2)
+        sizePolicy = QtWidgets.QSizePolicy(QtWidgets.QSizePolicy.Expanding, QtWidgets.QSizePolicy.Expanding)
+        sizePolicy.setHorizontalStretch(0)
+        sizePolicy.setVerticalStretch(0)
+        sizePolicy.setHeightForWidth(self.lessontxtInfo.sizePolicy().hasHeightForWidth())
+        self.lessontxtInfo.setSizePolicy(sizePolicy)
+        self.lessontxtInfo.setObjectName("lessontxtInfo")
+        self.lessonsGrid.addWidget(self.lessontxtInfo, 0, 0, 1, 4)
+        self.btnRemoveLessons = QtWidgets.QPushButton(self.layoutWidget_2)
+        self.btnRemoveLessons.setObjectName("btnRemoveLessons")
+        self.lessonsGrid.addWidget(self.btnRemoveLessons, 1, 1, 1, 1)
+        self.gridLayout_3.addWidget(self.librarySplitter, 1, 0, 1, 1)
+        self.loadingHL = QtWidgets.QHBoxLayout()
+        self.loadingHL.setObjectName("loadingHL")
+        self.progressLessons = QtWidgets.QProgressBar(self.libraryTab)
+        self.progressLessons.setVisible(False)
+        self.progressLessons.setProperty("value", 0)
+        self.progressLessons.setObjectName("progressLessons")
+        self.loadingHL.addWidget(self.progressLessons)
+        self.btnCancelLoading = QtWidgets.QPushButton(self.libraryTab)
+        self.btnCancelLoading.setVisible(False)
+        self.btnCancelLoading.setObjectName("btnCancelLoading")
+        self.loadingHL.addWidget(self.btnCancelLoading)
+        self.gridLayout_3.addLayout(self.loadingHL, 2, 0, 1, 1)
+        self.qtwContentsTabs.addTab(self.libraryTab, "")
+        self.lessonTab = QtWidgets.QWidget()
+        self.lessonTab.setEnabled(False)
+        self.lessonTab.setFocusPolicy(QtCore.Qt.NoFocus)
+        self.lessonTab.setObjectName("lessonTab")
+        self.gridLayout_4 = QtWidgets.QGridLayout(self.lessonTab)
+        self.gridLayout_4.setObjectName("gridLayout_4")
+        self.lblLessonName = QtWidgets.QLabel(self.lessonTab)
+        self.lblLessonName.setText("")
+        self.lblLessonName.setObjectName("lblLessonName")
+        self.gridLayout_4.addWidget(self.lblLessonName, 0, 0, 1, 1)
+        self.lblLessonStepsInstructions = QtWidgets.QLabel(self.lessonTab)
+        self.lblLessonStepsInstructions.setText("")
+        self.lblLessonStepsInstructions.setObjectName("lblLessonStepsInstructions")
+        self.gridLayout_4.addWidget(self.lblLessonStepsInstructions, 1, 0, 1, 1)
+        self.lessonSplitter = QtWidgets.QSplitter(self.lessonTab)
+        self.lessonSplitter.setOrientation(QtCore.Qt.Vertical)
+        self.lessonSplitter.setObjectName("lessonSplitter")
+        self.lstSteps = QtWidgets.QListWidget(self.lessonSplitter)
+        self.lstSteps.setEditTriggers(QtWidgets.QAbstractItemView.NoEditTriggers)
+        self.lstSteps.setProperty("showDropIndicator", False)
+        self.lstSteps.setSelectionMode(QtWidgets.QAbstractItemView.NoSelection)
+        self.lstSteps.setObjectName("lstSteps")
+        self.txtDescription = QtWidgets.QTextBrowser(self.lessonSplitter)
+        sizePolicy = QtWidgets.QSizePolicy(QtWidgets.QSizePolicy.Expanding, QtWidgets.QSizePolicy.Expanding)
+        sizePolicy.setHorizontalStretch(0)
+        sizePolicy.setVerticalStretch(2)
+        sizePolicy.setHeightForWidth(self.txtDescription.sizePolicy().hasHeightForWidth())
+        self.txtDescription.setSizePolicy(sizePolicy)
+        self.txtDescription.setObjectName("txtDescription")
+        self.gridLayout_4.addWidget(self.lessonSplitter, 2, 0, 1, 1)
+        self.lessonsHL = QtWidgets.QHBoxLayout()
+        self.lessonsHL.setObjectName("lessonsHL")
+        self.btnNextStep = QtWidgets.QPushButton(self.lessonTab)
+        self.btnNextStep.setObjectName("btnNextStep")
+        self.lessonsHL.addWidget(self.btnNextStep)
+        self.btnExecuteStep = QtWidgets.QPushButton(self.lessonTab)
+        self.btnExecuteStep.setObjectName("btnExecuteStep")
+        self.lessonsHL.addWidget(self.btnExecuteStep)
+        spacerItem1 = QtWidgets.QSpacerItem(40, 20, QtWidgets.QSizePolicy.Expanding, QtWidgets.QSizePolicy.Minimum)
+        self.lessonsHL.addItem(spacerItem1)
+        self.btnRestartLesson = QtWidgets.QPushButton(self.lessonTab)
+        self.btnRestartLesson.setObjectName("btnRestartLesson")
+        self.lessonsHL.addWidget(self.btnRestartLesson)
+        self.btnQuitLesson = QtWidgets.QPushButton(self.lessonTab)
+        self.btnQuitLesson.setObjectName("btnQuitLesson")
+        self.lessonsHL.addWidget(self.btnQuitLesson)
+        self.gridLayout_4.addLayout(self.lessonsHL, 3, 0, 1, 1)
+        self.stepProgressHL = QtWidgets.QHBoxLayout()
+        self.stepProgressHL.setObjectName("stepProgressHL")
+        self.progressStep = QtWidgets.QProgressBar(self.lessonTab)
+        self.progressStep.setVisible(False)
+        self.progressStep.setProperty("value", 0)
+        self.progressStep.setObjectName("progressStep")
+        self.stepProgressHL.addWidget(self.progressStep)
+        self.btnCancelStep = QtWidgets.QPushButton(self.lessonTab)
+        self.btnCancelStep.setVisible(False)
+        self.btnCancelStep.setObjectName("btnCancelStep")
+        self.stepProgressHL.addWidget(self.btnCancelStep)
+        self.gridLayout_4.addLayout(self.stepProgressHL, 4, 0, 1, 1)
+        self.qtwContentsTabs.addTab(self.lessonTab, "")
+        self.creatorTab = QtWidgets.QWidget()
+        self.creatorTab.setObjectName("creatorTab")
+        self.qtwContentsTabs.addTab(self.creatorTab, "")
+        self.cloudTab = QtWidgets.QWidget()
+        self.cloudTab.setObjectName("cloudTab")
+        self.qtwContentsTabs.addTab(self.cloudTab, "")
+        self.aboutTab = QtWidgets.QWidget()
+        self.aboutTab.setObjectName("aboutTab")
+        self.gridLayout_2 = QtWidgets.QGridLayout(self.aboutTab)
+        self.gridLayout_2.setObjectName("gridLayout_2")
+        self.pluginLogo = QtWidgets.QLabel(self.aboutTab)
+        self.pluginLogo.setAlignment(QtCore.Qt.AlignCenter)
+        self.pluginLogo.setObjectName("pluginLogo")
+        self.gridLayout_2.addWidget(self.pluginLogo, 0, 0, 1, 1)
+        self.pluginNamelbl = QtWidgets.QLabel(self.aboutTab)
+        self.pluginNamelbl.setAlignment(QtCore.Qt.AlignCenter)
+        self.pluginNamelbl.setObjectName("pluginNamelbl")
+        self.gridLayout_2.addWidget(self.pluginNamelbl, 1, 0, 1, 1)
+        self.aboutHL = QtWidgets.QHBoxLayout()
+        self.aboutHL.setObjectName("aboutHL")
+        self.pluginVersion = QtWidgets.QLabel(self.aboutTab)
+        sizePolicy = QtWidgets.QSizePolicy(QtWidgets.QSizePolicy.Preferred, QtWidgets.QSizePolicy.Preferred)
+        sizePolicy.setHorizontalStretch(0)
+        sizePolicy.setVerticalStretch(0)
+        sizePolicy.setHeightForWidth(self.pluginVersion.sizePolicy().hasHeightForWidth())
+        self.pluginVersion.setSizePolicy(sizePolicy)
+        self.pluginVersion.setObjectName("pluginVersion")
+        self.aboutHL.addWidget(self.pluginVersion)
+        self.lblPluginVersion = QtWidgets.QLabel(self.aboutTab)
+        sizePolicy = QtWidgets.QSizePolicy(QtWidgets.QSizePolicy.Expanding, QtWidgets.QSizePolicy.Preferred)
+        sizePolicy.setHorizontalStretch(0)
+        sizePolicy.setVerticalStretch(0)
+        sizePolicy.setHeightForWidth(self.lblPluginVersion.sizePolicy().hasHeightForWidth())
+        self.lblPluginVersion.setSizePolicy(sizePolicy)
+        self.lblPluginVersion.setText("")
+        self.lblPluginVersion.setObjectName("lblPluginVersion")
+        self.aboutHL.addWidget(self.lblPluginVersion)
+        self.gridLayout_2.addLayout(self.aboutHL, 2, 0, 1, 1)
+        self.aboutText = QtWidgets.QTextBrowser(self.aboutTab)
+        self.aboutText.setObjectName("aboutText")
+        self.gridLayout_2.addWidget(self.aboutText, 3, 0, 1, 1)
+        self.qtwContentsTabs.addTab(self.aboutTab, "")
+        self.pluginSetting = QtWidgets.QWidget()
+        self.pluginSetting.setObjectName("pluginSetting")
+        self.gridLayout_5 = QtWidgets.QGridLayout(self.pluginSetting)
+        self.gridLayout_5.setObjectName("gridLayout_5")
+        self.SettingLabel = QtWidgets.QLabel(self.pluginSetting)
+        self.SettingLabel.setObjectName("SettingLabel")
+        self.gridLayout_5.addWidget(self.SettingLabel, 0, 0, 1, 1)
+        self.horizontalLayout = QtWidgets.QHBoxLayout()
+        self.horizontalLayout.setObjectName("horizontalLayout")
+        self.lessonPathlabel = QtWidgets.QLabel(self.pluginSetting)
+        self.lessonPathlabel.setObjectName("lessonPathlabel")
+        self.horizontalLayout.addWidget(self.lessonPathlabel)
+        spacerItem2 = QtWidgets.QSpacerItem(65, 20, QtWidgets.QSizePolicy.Expanding, QtWidgets.QSizePolicy.Minimum)
+        self.horizontalLayout.addItem(spacerItem2)
+        self.btnAddLessonPath = QtWidgets.QToolButton(self.pluginSetting)
+        self.btnAddLessonPath.setObjectName("btnAddLessonPath")
+        self.horizontalLayout.addWidget(self.btnAddLessonPath)
+        self.btnRemoveLessonPath = QtWidgets.QToolButton(self.pluginSetting)
+        self.btnRemoveLessonPath.setObjectName("btnRemoveLessonPath")
+        self.horizontalLayout.addWidget(self.btnRemoveLessonPath)
+        self.gridLayout_5.addLayout(self.horizontalLayout, 1, 0, 1, 1)
+        self.lstLessonPaths = QtWidgets.QListWidget(self.pluginSetting)
+        self.lstLessonPaths.setObjectName("lstLessonPaths")
+        self.gridLayout_5.addWidget(self.lstLessonPaths, 2, 0, 1, 1)
+        spacerItem3 = QtWidgets.QSpacerItem(20, 212, QtWidgets.QSizePolicy.Minimum, QtWidgets.QSizePolicy.Expanding)
+        self.gridLayout_5.addItem(spacerItem3, 3, 0, 1, 1)
+        self.qtwContentsTabs.addTab(self.pluginSetting, "")
+        self.gridLayout.addWidget(self.qtwContentsTabs, 0, 0, 1, 1)
+        Qlesson.setWidget(self.contentsMenu)
+
+        self.retranslateUi(Qlesson)
+        self.qtwContentsTabs.setCurrentIndex(1)
+        QtCore.QMetaObject.connectSlotsByName(Qlesson)
+
+    def retranslateUi(self, Qlesson):
+        _translate = QtCore.QCoreApplication.translate
+        Qlesson.setWindowTitle(_translate("Qlesson", "QLesson"))
+        self.leSearchLessons.setPlaceholderText(_translate("Qlesson", "Search lessons…"))
+        self.btnStartLesson.setText(_translate("Qlesson", "Start Lesson"))
+        self.btnAddLessons.setText(_translate("Qlesson", "Add Lessons…"))
+        self.btnRemoveLessons.setText(_translate("Qlesson", "Remove Lesson(s)"))
+        self.progressLessons.setFormat(_translate("Qlesson", "Loading lessons… %p%"))
+        self.btnCancelLoading.setText(_translate("Qlesson", "Cancel"))
+        self.qtwContentsTabs.setTabText(self.qtwContentsTabs.indexOf(self.libraryTab), _translate("Qlesson", "Library"))
+        self.btnNextStep.setText(_translate("Qlesson", "Next"))
+        self.btnExecuteStep.setText(_translate("Qlesson", "Execute"))
+        self.btnRestartLesson.setText(_translate("Qlesson", "Restart"))
+        self.btnQuitLesson.setText(_translate("Qlesson", "Quit"))
+        self.btnCancelStep.setText(_translate("Qlesson", "Cancel"))
+        self.qtwContentsTabs.setTabText(self.qtwContentsTabs.indexOf(self.lessonTab), _translate("Qlesson", "Lesson"))
+        self.qtwContentsTabs.setTabText(self.qtwContentsTabs.indexOf(self.creatorTab), _translate("Qlesson", "Creator"))
+        self.qtwContentsTabs.setTabText(self.qtwContentsTabs.indexOf(self.cloudTab), _translate("Qlesson", "Cloud"))
+        self.pluginLogo.setText(_translate("Qlesson", "TextLabel"))
+        self.pluginNamelbl.setText(_translate("Qlesson", "TextLabel"))
+        self.pluginVersion.setText(_translate("Qlesson", "<b>Plugin version:</b>"))
+        self.qtwContentsTabs.setTabText(self.qtwContentsTabs.indexOf(self.aboutTab), _translate("Qlesson", "About"))
+        self.SettingLabel.setText(_translate("Qlesson", "<b>Lesson Paths</b>"))
+        self.lessonPathlabel.setText(_translate("Qlesson", "Path(s) to search for Lessons"))
+        self.btnAddLessonPath.setText(_translate("Qlesson", "..."))
+        self.btnRemoveLessonPath.setText(_translate("Qlesson", "..."))
+        self.qtwContentsTabs.setTabText(self.qtwContentsTabs.indexOf(self.pluginSetting), _translate("Qlesson", "Setting..."))